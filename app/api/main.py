@@ -4,7 +4,7 @@ API 路由主文件
 """
 
 from fastapi import APIRouter
-from app.api.routes import users, subscriptions, settings, reports, dashboard
+from app.api.routes import users, subscriptions, settings, reports, dashboard, webhooks
 
 # 创建主路由器
 api_router = APIRouter()
@@ -39,4 +39,5 @@ api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(subscriptions.router, prefix="/subscriptions", tags=["subscriptions"])
 api_router.include_router(settings.router, prefix="/settings", tags=["settings"])
 api_router.include_router(reports.router, prefix="/reports", tags=["reports"])
-api_router.include_router(dashboard.router, prefix="/dashboard", tags=["dashboard"]) 
\ No newline at end of file
+api_router.include_router(dashboard.router, prefix="/dashboard", tags=["dashboard"])
+api_router.include_router(webhooks.router, prefix="/webhooks", tags=["webhooks"])
@@ -8,11 +8,12 @@ from datetime import datetime, timedelta
 from fastapi import APIRouter, HTTPException, Query
 from sqlalchemy import func, and_, desc
 from sqlalchemy import select
-from sqlalchemy.orm import selectinload
 
+from app.core.cache import cache, TAG_ACTIVITIES, TAG_REPORTS, TAG_SUBSCRIPTIONS
 from app.core.database import get_db_session
 from app.core.logger import get_logger
 from app.models.subscription import Subscription, RepositoryActivity
+from app.services.activity_rollup_service import activity_rollup_service
 from app.services.report_service import ReportService
 from app.services.subscription_service import SubscriptionService
 from app.utils.timezone_utils import beijing_now
@@ -21,8 +22,12 @@ logger = get_logger(__name__)
 
 router = APIRouter()
 
+# 最近活动中描述的最大展示长度（字符）
+ACTIVITY_DESCRIPTION_PREVIEW = 100
+
 
 @router.get("/stats")
+@cache.cached("dashboard:stats", tags=[TAG_REPORTS, TAG_SUBSCRIPTIONS])
 async def get_dashboard_stats():
     """获取仪表板统计数据"""
     try:
@@ -73,82 +78,37 @@ async def get_dashboard_stats():
         raise HTTPException(status_code=500, detail=f"获取仪表板统计数据失败: {str(e)}")
 
 
+# 图表中的活动类型 -> 返回字段
+CHART_ACTIVITY_TYPES = {
+    'commit': 'commits',
+    'issue': 'issues',
+    'pull_request': 'pull_requests',
+    'release': 'releases'
+}
+
+
 @router.get("/activity-chart")
+@cache.cached("dashboard:activity-chart", tags=[TAG_ACTIVITIES])
 async def get_activity_chart_data(days: int = Query(7, ge=1, le=30, description="天数")):
     """获取活动图表数据"""
     try:
         logger.info(f"📈 开始获取 {days} 天的活动图表数据")
         
-        async with get_db_session() as session:
-            # 计算日期范围
-            end_date = datetime.now().date()
-            start_date = end_date - timedelta(days=days-1)
-            
-            # 生成日期列表
-            date_list = []
-            current_date = start_date
-            while current_date <= end_date:
-                date_list.append(current_date)
-                current_date += timedelta(days=1)
-            
-            # 查询每日活动数据
-            activity_data = {}
-            for date in date_list:
-                # 查询当日各类型活动数量
-                commits = await session.scalar(
-                    select(func.count(RepositoryActivity.id)).filter(
-                        and_(
-                            func.date(RepositoryActivity.created_at) == date,
-                            RepositoryActivity.activity_type == 'commit'
-                        )
-                    )
-                ) or 0
-                
-                issues = await session.scalar(
-                    select(func.count(RepositoryActivity.id)).filter(
-                        and_(
-                            func.date(RepositoryActivity.created_at) == date,
-                            RepositoryActivity.activity_type == 'issue'
-                        )
-                    )
-                ) or 0
-                
-                pull_requests = await session.scalar(
-                    select(func.count(RepositoryActivity.id)).filter(
-                        and_(
-                            func.date(RepositoryActivity.created_at) == date,
-                            RepositoryActivity.activity_type == 'pull_request'
-                        )
-                    )
-                ) or 0
-                
-                releases = await session.scalar(
-                    select(func.count(RepositoryActivity.id)).filter(
-                        and_(
-                            func.date(RepositoryActivity.created_at) == date,
-                            RepositoryActivity.activity_type == 'release'
-                        )
-                    )
-                ) or 0
-                
-                activity_data[date.strftime('%Y-%m-%d')] = {
-                    'commits': commits,
-                    'issues': issues,
-                    'pull_requests': pull_requests,
-                    'releases': releases
-                }
-            
-            # 格式化为前端需要的格式
-            chart_data = {
-                'dates': [date.strftime('%m-%d') for date in date_list],
-                'commits': [activity_data[date.strftime('%Y-%m-%d')]['commits'] for date in date_list],
-                'issues': [activity_data[date.strftime('%Y-%m-%d')]['issues'] for date in date_list],
-                'pull_requests': [activity_data[date.strftime('%Y-%m-%d')]['pull_requests'] for date in date_list],
-                'releases': [activity_data[date.strftime('%Y-%m-%d')]['releases'] for date in date_list]
-            }
-            
-            logger.info(f"✅ 活动图表数据获取成功，共 {len(date_list)} 天数据")
-            return chart_data
+        # 按配置时区计算日期范围
+        end_date = activity_rollup_service.today()
+        start_date = end_date - timedelta(days=days-1)
+        date_list = [start_date + timedelta(days=offset) for offset in range(days)]
+        
+        # 从每日汇总表读取，按 GitHub 创建时间所在的日期统计
+        counts = await activity_rollup_service.daily_counts(start_date, end_date)
+        
+        # 格式化为前端需要的格式，没有活动的日期补零
+        chart_data = {'dates': [day.strftime('%m-%d') for day in date_list]}
+        for activity_type, field in CHART_ACTIVITY_TYPES.items():
+            chart_data[field] = [counts.get((day, activity_type), 0) for day in date_list]
+        
+        logger.info(f"✅ 活动图表数据获取成功，共 {len(date_list)} 天数据")
+        return chart_data
             
     except Exception as e:
         logger.error(f"❌ 获取活动图表数据失败: {str(e)}")
@@ -157,35 +117,20 @@ async def get_activity_chart_data(days: int = Query(7, ge=1, le=30, description=
 
 
 @router.get("/repository-stats")
+@cache.cached("dashboard:repository-stats", tags=[TAG_ACTIVITIES, TAG_SUBSCRIPTIONS])
 async def get_repository_stats():
     """获取仓库统计数据"""
     try:
         logger.info("📊 开始获取仓库统计数据")
         
+        # 最活跃的仓库和活动类型分布均从每日汇总表读取
+        repository_totals = await activity_rollup_service.repository_totals(limit=10)
+        type_totals = await activity_rollup_service.type_totals()
+        
         async with get_db_session() as session:
-            # 获取最活跃的仓库
-            # 查询每个仓库的活动数量
-            repo_activity_query = select(
-                Subscription.repository,
-                func.count(RepositoryActivity.id).label('activity_count')
-            ).select_from(
-                Subscription
-            ).outerjoin(
-                RepositoryActivity, 
-                Subscription.id == RepositoryActivity.subscription_id
-            ).group_by(
-                Subscription.repository
-            ).order_by(
-                desc('activity_count')
-            ).limit(10)
-            
-            result = await session.execute(repo_activity_query)
             top_repositories = []
             
-            for row in result:
-                repo_name = row.repository
-                activity_count = row.activity_count or 0
-                
+            for repo_name, activity_count in repository_totals:
                 # 获取订阅状态
                 subscription = await session.scalar(
                     select(Subscription).filter(Subscription.repository == repo_name)
@@ -199,14 +144,10 @@ async def get_repository_stats():
                 })
             
             # 获取活动类型分布
-            activity_types = {}
-            for activity_type in ['commit', 'issue', 'pull_request', 'release', 'discussion']:
-                count = await session.scalar(
-                    select(func.count(RepositoryActivity.id)).filter(
-                        RepositoryActivity.activity_type == activity_type
-                    )
-                ) or 0
-                activity_types[activity_type] = count
+            activity_types = {
+                activity_type: type_totals.get(activity_type, 0)
+                for activity_type in ['commit', 'issue', 'pull_request', 'release', 'discussion']
+            }
             
             stats = {
                 'top_repositories': top_repositories,
@@ -223,6 +164,7 @@ async def get_repository_stats():
 
 
 @router.get("/recent-activity")
+@cache.cached("dashboard:recent-activity", tags=[TAG_ACTIVITIES, TAG_REPORTS, TAG_SUBSCRIPTIONS])
 async def get_recent_activity(days: int = Query(0, ge=0, le=365, description="时间周期（天数），0表示所有时间")):
     """获取最近活动"""
     try:
@@ -239,10 +181,19 @@ async def get_recent_activity(days: int = Query(0, ge=0, le=365, description="
                 time_filter = RepositoryActivity.github_created_at >= cutoff_time
                 logger.info(f"⏰ 时间筛选: 从 {cutoff_time} 开始（基于GitHub创建时间）")
             
-            # 获取最近的仓库活动
-            recent_activities_query = select(RepositoryActivity).options(
-                selectinload(RepositoryActivity.subscription)
-            )
+            # 获取最近的仓库活动：只读取动态需要的列，描述在数据库中截断，不读取活动正文
+            recent_activities_query = select(
+                RepositoryActivity.id,
+                RepositoryActivity.activity_type,
+                RepositoryActivity.title,
+                func.substr(RepositoryActivity.description, 1, ACTIVITY_DESCRIPTION_PREVIEW + 1).label("description"),
+                RepositoryActivity.url,
+                RepositoryActivity.author_login,
+                RepositoryActivity.state,
+                RepositoryActivity.github_created_at,
+                RepositoryActivity.created_at,
+                Subscription.repository,
+            ).outerjoin(Subscription, Subscription.id == RepositoryActivity.subscription_id)
             
             if time_filter is not None:
                 recent_activities_query = recent_activities_query.filter(time_filter)
@@ -252,7 +203,7 @@ async def get_recent_activity(days: int = Query(0, ge=0, le=365, description="
             ).limit(50)  # 增加限制以获取更多数据
             
             result = await session.execute(recent_activities_query)
-            recent_activities = result.scalars().all()
+            recent_activities = result.all()
             
             for activity in recent_activities:
                 # 根据活动类型设置图标和标签
@@ -274,8 +225,8 @@ async def get_recent_activity(days: int = Query(0, ge=0, le=365, description="
                     "id": f"{activity.activity_type}_{activity.id}",
                     "type": activity.activity_type,
                     "title": activity.title or f"New {activity.activity_type}",
-                    "description": activity.description[:100] + "..." if activity.description and len(activity.description) > 100 else activity.description or "",
-                    "repository": activity.subscription.repository if activity.subscription else "Unknown",
+                    "description": activity.description[:ACTIVITY_DESCRIPTION_PREVIEW] + "..." if activity.description and len(activity.description) > ACTIVITY_DESCRIPTION_PREVIEW else activity.description or "",
+                    "repository": activity.repository or "Unknown",
                     "author": activity.author_login,
                     "time": activity.github_created_at.isoformat() if activity.github_created_at else activity.created_at.isoformat(),
                     "status": activity.state or "active",
@@ -448,6 +399,7 @@ async def get_quick_actions():
 
 
 @router.get("/performance-metrics")
+@cache.cached("dashboard:performance-metrics", tags=[TAG_ACTIVITIES, TAG_REPORTS, TAG_SUBSCRIPTIONS])
 async def get_performance_metrics(period: str = Query("7d", description="时间周期: 7d, 30d, 90d")):
     """获取性能指标"""
     try:
@@ -462,23 +414,15 @@ async def get_performance_metrics(period: str = Query("7d", description="时间
             end_time = beijing_now()
             start_time = end_time - timedelta(days=days)
             
-            # 获取活动统计
-            total_activities = await session.scalar(
-                select(func.count(RepositoryActivity.id)).filter(
-                    RepositoryActivity.created_at >= start_time
-                )
-            ) or 0
+            # 获取活动统计（每日汇总表，最近 days 天含今天）
+            today = activity_rollup_service.today()
+            start_day = today - timedelta(days=days-1)
+            total_activities = await activity_rollup_service.total(start_day, today)
             
-            # 获取每日活动数据用于计算趋势
-            prev_start_time = start_time - timedelta(days=days)
-            prev_activities = await session.scalar(
-                select(func.count(RepositoryActivity.id)).filter(
-                    and_(
-                        RepositoryActivity.created_at >= prev_start_time,
-                        RepositoryActivity.created_at < start_time
-                    )
-                )
-            ) or 0
+            # 获取上一周期的活动数用于计算趋势
+            prev_activities = await activity_rollup_service.total(
+                start_day - timedelta(days=days), start_day - timedelta(days=1)
+            )
             
             # 计算活动趋势
             activity_trend = 0
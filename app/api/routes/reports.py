@@ -3,40 +3,49 @@
 """
 
 from typing import List, Optional
-from fastapi import APIRouter, HTTPException, Query, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Query, BackgroundTasks, Request
 from pydantic import BaseModel
+from app.services.report_data_service import report_data_service
 from app.services.report_service import ReportService
 from app.schemas.report_schemas import (
     ReportCreate, ReportUpdate, ReportResponse, 
     ReportListResponse, ReportTemplateResponse
 )
+from app.core.blob_store import blob_store
+from app.core.cache import cache, TAG_REPORTS
 from app.core.logger import get_logger
-from app.collectors.github_collector import GitHubCollector
 from app.services.subscription_service import SubscriptionService
+from app.utils.http_utils import choose_encoding, http_date, is_not_modified
+from app.utils.pagination import next_cursor
 from app.utils.timezone_utils import beijing_now, format_beijing_time
+import hashlib
 import json
 from datetime import datetime
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
 import re
 
 logger = get_logger(__name__)
 
 router = APIRouter()
 
+# 已完成报告的下载缓存策略（内容不可变）
+REPORT_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
 
 @router.get("/", response_model=ReportListResponse)
 async def get_reports(
     skip: int = Query(0, ge=0, description="跳过的记录数"),
     limit: int = Query(100, ge=1, le=1000, description="限制返回的记录数"),
     report_type: Optional[str] = Query(None, description="报告类型"),
-    status: Optional[str] = Query(None, description="报告状态")
+    status: Optional[str] = Query(None, description="报告状态"),
+    cursor: Optional[str] = Query(None, description="分页游标（上一页返回的 next_cursor），传入时忽略 skip")
 ):
     """获取报告列表"""
     try:
-        logger.info(f"📊 获取报告列表 - skip: {skip}, limit: {limit}")
+        logger.info(f"📊 获取报告列表 - skip: {skip}, limit: {limit}, cursor: {cursor}")
         
         reports = await ReportService.get_all_reports(
-            skip=skip, limit=limit, report_type=report_type, status=status
+            skip=skip, limit=limit, report_type=report_type, status=status, cursor=cursor
         )
         total = await ReportService.get_report_count(report_type=report_type, status=status)
         
@@ -46,8 +55,11 @@ async def get_reports(
             reports=reports,
             total=total,
             skip=skip,
-            limit=limit
+            limit=limit,
+            next_cursor=next_cursor(reports, "created_at", limit)
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"💥 获取报告列表失败: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"获取报告列表失败: {str(e)}")
@@ -76,12 +88,12 @@ async def get_report(report_id: int):
 @router.post("/", response_model=ReportResponse)
 async def create_report(report_data: ReportCreate, background_tasks: BackgroundTasks):
     """创建新报告"""
-    from datetime import datetime, timedelta
+    from datetime import timedelta
     try:
         logger.info(f"📝 开始创建报告: {report_data.title}")
         
-        # 设置报告时间范围（默认为过去一天）
-        period_end = datetime.now()
+        # 设置报告时间范围（默认为过去一天，与其它报告入口一致使用北京时间）
+        period_end = beijing_now()
         period_start = period_end - timedelta(days=1)
         
         report = await ReportService.create_report(
@@ -183,6 +195,7 @@ async def get_report_templates():
 
 
 @router.get("/stats/summary")
+@cache.cached("reports:stats", tags=[TAG_REPORTS])
 async def get_report_stats():
     """获取报告统计信息"""
     try:
@@ -208,25 +221,31 @@ async def get_report_stats():
 
 
 @router.get("/{report_id}/download")
-async def download_report(report_id: int):
-    """下载报告"""
-    from fastapi.responses import Response
+async def download_report(report_id: int, request: Request):
+    """
+    下载报告
+
+    已写入文件存储的报告从磁盘流式返回，按 Accept-Encoding 返回 br/gzip 压缩文件；正文仍在数据库中的旧报告
+    按同样的编码在内存中压缩后返回。响应带强 ETag（报告内容哈希）和 Last-Modified（生成完成时间），
+    条件请求命中时返回 304
+    """
     try:
         logger.info(f"📥 开始下载报告 - ID: {report_id}")
         
-        # 获取报告
-        report = await ReportService.get_report(report_id)
+        # 获取报告（正文不读入内存）
+        report = await ReportService.get_report(report_id, load_content=False)
         if not report:
             logger.warning(f"❌ 报告不存在 - ID: {report_id}")
             raise HTTPException(status_code=404, detail="报告不存在")
         
-        if not report.content:
+        stored = bool(report.file_hash) and blob_store.exists(report.file_hash)
+        if not stored and not report.content:
             logger.warning(f"❌ 报告内容为空 - ID: {report_id}")
             raise HTTPException(status_code=400, detail="报告内容为空")
         
-        # 生成带时间戳的文件名
-        current_time = beijing_now()
-        timestamp = current_time.strftime("%Y.%m.%d_%H.%M.%S")
+        # 文件名使用报告生成时间，同一报告每次下载的响应头一致
+        last_modified = report.generated_at or report.created_at
+        timestamp = (last_modified or beijing_now()).strftime("%Y.%m.%d_%H.%M.%S")
         
         # 确定文件名和内容类型
         if report.format.lower() in ["markdown", "md"]:
@@ -240,16 +259,53 @@ async def download_report(report_id: int):
         filename = re.sub(r'[^\w\s.-]', '', filename).strip()
         filename = re.sub(r'[-\s]+', '-', filename)
         
-        logger.info(f"✅ 报告下载准备完成 - 文件名: {filename}")
+        headers = {
+            "Content-Disposition": f"attachment; filename={filename}",
+            "Content-Type": content_type
+        }
         
-        return Response(
-            content=report.content,
-            media_type=content_type,
-            headers={
-                "Content-Disposition": f"attachment; filename={filename}",
-                "Content-Type": content_type
-            }
-        )
+        # 旧报告的正文仍保存在数据库中（或未启用文件存储），按内容计算哈希
+        if stored:
+            content, digest = None, report.file_hash
+        else:
+            content = report.content.encode("utf-8")
+            digest = hashlib.sha256(content).hexdigest()
+        
+        # 不同编码的响应体不同，强 ETag 带上编码后缀
+        encoding = choose_encoding(request.headers.get("accept-encoding"), blob_store.encodings)
+        etag = f'"{digest}-{encoding}"' if encoding else f'"{digest}"'
+        validators = {
+            "ETag": etag,
+            "Vary": "Accept-Encoding",
+            # 已完成的报告内容不再变化，客户端和 CDN 可以长期缓存
+            "Cache-Control": REPORT_CACHE_CONTROL if report.status == "completed" else "no-cache",
+        }
+        if last_modified:
+            validators["Last-Modified"] = http_date(last_modified)
+        
+        if is_not_modified(request.headers, etag, last_modified):
+            logger.info(f"✅ 报告未修改 - ID: {report_id}")
+            return Response(status_code=304, headers=validators)
+        
+        headers.update(validators)
+        if content is not None:
+            if encoding:
+                content = await blob_store.encode(content, encoding)
+                headers["Content-Encoding"] = encoding
+            logger.info(f"✅ 报告下载准备完成 - 文件名: {filename}, 编码: {encoding or 'identity'}")
+            return Response(content=content, media_type=content_type, headers=headers)
+        
+        if encoding:
+            path = await blob_store.encoded_path(report.file_hash, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(path.stat().st_size)
+            body = blob_store.iter_file(path)
+        else:
+            headers["Content-Length"] = str(report.file_size)
+            body = blob_store.iter_decompressed(report.file_hash)
+        
+        logger.info(f"✅ 报告下载准备完成 - 文件名: {filename}, 编码: {encoding or 'identity'}")
+        return StreamingResponse(body, media_type=content_type, headers=headers)
         
     except HTTPException:
         raise
@@ -265,7 +321,7 @@ async def delete_report(report_id: int):
         logger.info(f"🗑️ 开始删除报告 - ID: {report_id}")
         
         # 检查报告是否存在
-        report = await ReportService.get_report(report_id)
+        report = await ReportService.get_report(report_id, load_content=False)
         if not report:
             logger.warning(f"❌ 报告不存在 - ID: {report_id}")
             raise HTTPException(status_code=404, detail="报告不存在")
@@ -304,7 +360,8 @@ async def update_report(report_id: int, report_data: ReportUpdate):
             raise HTTPException(status_code=404, detail="报告不存在")
         
         logger.info(f"✅ 报告更新成功: {updated_report.title}")
-        return updated_report
+        # 重新读取以返回保存在文件存储中的报告正文
+        return await ReportService.get_report(report_id)
         
     except HTTPException:
         raise
@@ -322,7 +379,7 @@ async def generate_report_content(report_id: int):
         await ReportService.update_report(report_id, status="generating")
         
         # 获取报告信息
-        report = await ReportService.get_report(report_id)
+        report = await ReportService.get_report(report_id, load_content=False)
         if not report:
             logger.error(f"❌ 报告不存在 - ID: {report_id}")
             return
@@ -348,15 +405,13 @@ async def generate_report_content(report_id: int):
             await ReportService.update_report(report_id, status="failed", error_message="仓库格式错误")
             return
         
-        owner, repo = repo_parts
-        logger.info(f"📊 开始收集仓库数据: {owner}/{repo}")
-        
-        # 初始化GitHub收集器
-        github_collector = GitHubCollector()
-        
-        # 收集仓库数据
+        logger.info(f"📊 开始收集仓库数据: {subscription.repository}")
+
+        # 从已入库的活动构建报告数据（与通知使用同一份数据），最后同步之后的部分实时补齐
         try:
-            repo_data = await github_collector.collect_repository_data(owner, repo)
+            repo_data = await report_data_service.build_repository_data(
+                subscription, report.period_start, report.period_end
+            )
             logger.info(f"✅ 仓库数据收集完成: {repo_data['summary']}")
         except Exception as e:
             logger.error(f"💥 收集仓库数据失败: {e}")
@@ -376,6 +431,7 @@ async def generate_report_content(report_id: int):
             
             # 准备 AI 分析的数据
             analysis_data = {
+                "subscription_id": subscription.id,  # 用于读取每日活动汇总中的历史趋势
                 "repository": repo_data['repository'],
                 "commits": repo_data['commits'][:20],  # 最近20个提交
                 "issues": repo_data['issues'][:10],    # 最近10个issues
@@ -3,14 +3,16 @@
 """
 
 from typing import List, Optional
-from fastapi import APIRouter, HTTPException, Query, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Query, BackgroundTasks, Response
 from app.services.subscription_service import SubscriptionService
 from app.collectors.github_collector import GitHubCollector
 from app.schemas.subscription_schemas import (
     SubscriptionCreate, SubscriptionUpdate, SubscriptionResponse, 
     SubscriptionListResponse, RepositoryActivityResponse
 )
+from app.core.cache import cache, TAG_SUBSCRIPTIONS
 from app.core.logger import get_logger
+from app.utils.pagination import next_cursor
 
 logger = get_logger(__name__)
 
@@ -45,12 +47,13 @@ async def get_subscriptions(
     skip: int = Query(0, ge=0, description="跳过的记录数"),
     limit: int = Query(100, ge=1, le=1000, description="限制返回的记录数"),
     status: Optional[str] = Query(None, description="订阅状态"),
-    repository: Optional[str] = Query(None, description="仓库名称")
+    repository: Optional[str] = Query(None, description="仓库名称"),
+    cursor: Optional[str] = Query(None, description="分页游标（上一页返回的 next_cursor），传入时忽略 skip")
 ):
     """获取所有订阅列表"""
     try:
         subscriptions = await SubscriptionService.get_all_subscriptions(
-            skip=skip, limit=limit, status=status, repository=repository
+            skip=skip, limit=limit, status=status, repository=repository, cursor=cursor
         )
         total = await SubscriptionService.get_subscription_count(status=status)
         
@@ -58,8 +61,11 @@ async def get_subscriptions(
             subscriptions=subscriptions,
             total=total,
             skip=skip,
-            limit=limit
+            limit=limit,
+            next_cursor=next_cursor(subscriptions, "created_at", limit)
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取订阅列表失败: {str(e)}")
 
@@ -69,12 +75,13 @@ async def get_user_subscriptions(
     user_id: int,
     skip: int = Query(0, ge=0, description="跳过的记录数"),
     limit: int = Query(100, ge=1, le=1000, description="限制返回的记录数"),
-    status: Optional[str] = Query(None, description="订阅状态")
+    status: Optional[str] = Query(None, description="订阅状态"),
+    cursor: Optional[str] = Query(None, description="分页游标（上一页返回的 next_cursor），传入时忽略 skip")
 ):
     """获取用户的订阅列表"""
     try:
         subscriptions = await SubscriptionService.get_user_subscriptions(
-            user_id=user_id, skip=skip, limit=limit, status=status
+            user_id=user_id, skip=skip, limit=limit, status=status, cursor=cursor
         )
         total = await SubscriptionService.get_subscription_count(user_id=user_id, status=status)
         
@@ -82,8 +89,11 @@ async def get_user_subscriptions(
             subscriptions=subscriptions,
             total=total,
             skip=skip,
-            limit=limit
+            limit=limit,
+            next_cursor=next_cursor(subscriptions, "created_at", limit)
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取用户订阅列表失败: {str(e)}")
 
@@ -154,19 +164,27 @@ async def delete_subscription(subscription_id: int):
 @router.get("/{subscription_id}/activities", response_model=List[RepositoryActivityResponse])
 async def get_subscription_activities(
     subscription_id: int,
+    response: Response,
     activity_type: Optional[str] = Query(None, description="活动类型"),
     skip: int = Query(0, ge=0, description="跳过的记录数"),
-    limit: int = Query(100, ge=1, le=1000, description="限制返回的记录数")
+    limit: int = Query(100, ge=1, le=1000, description="限制返回的记录数"),
+    cursor: Optional[str] = Query(None, description="分页游标（上一页返回的 next_cursor），传入时忽略 skip")
 ):
-    """获取订阅的活动记录"""
+    """获取订阅的活动记录（下一页游标通过 X-Next-Cursor 响应头返回）"""
     try:
         activities = await SubscriptionService.get_subscription_activities(
             subscription_id=subscription_id,
             activity_type=activity_type,
             skip=skip,
-            limit=limit
+            limit=limit,
+            cursor=cursor
         )
+        cursor_value = next_cursor(activities, "github_created_at", limit)
+        if cursor_value:
+            response.headers["X-Next-Cursor"] = cursor_value
         return activities
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取活动记录失败: {str(e)}")
 
@@ -190,6 +208,7 @@ async def sync_subscription(subscription_id: int, background_tasks: BackgroundTa
 
 
 @router.get("/stats/summary")
+@cache.cached("subscriptions:stats", tags=[TAG_SUBSCRIPTIONS])
 async def get_subscription_stats():
     """获取订阅统计信息"""
     try:
@@ -216,8 +235,9 @@ async def get_subscription_stats():
 async def update_repository_info(subscription_id: int, repository: str):
     """更新仓库基本信息"""
     try:
+        owner, repo = repository.split('/')
         collector = GitHubCollector()
-        repo_info = await collector.get_repository_info(repository)
+        repo_info = await collector.get_repository_info(owner, repo)
         
         if repo_info:
             await SubscriptionService.update_repository_info(
@@ -229,15 +249,24 @@ async def update_repository_info(subscription_id: int, repository: str):
                 repository_forks=repo_info.get("forks_count")
             )
     except Exception as e:
-        print(f"更新仓库信息失败: {e}")
+        logger.error(f"更新仓库信息失败 {repository}: {e}")
 
 
 async def sync_subscription_data(subscription_id: int, repository: str):
     """同步订阅数据"""
     try:
+        subscription = await SubscriptionService.get_subscription(subscription_id)
+        if not subscription:
+            logger.warning(f"❌ 订阅不存在，跳过同步 - ID: {subscription_id}")
+            return
+        
+        logger.info(f"🔄 正在同步仓库 {repository} 的数据...")
         collector = GitHubCollector()
-        # 这里可以添加具体的数据同步逻辑
-        # 例如获取最新的commits, issues, PRs等
-        print(f"正在同步仓库 {repository} 的数据...")
+        result = await collector.collect_repository_activities(
+            subscription,
+            days=1,
+            include_states=['open', 'closed', 'merged']
+        )
+        logger.info(f"✅ 仓库 {repository} 同步完成，共 {result['total_activities']} 条活动")
     except Exception as e:
-        print(f"同步数据失败: {e}") 
\ No newline at end of file
+        logger.error(f"同步数据失败 {repository}: {e}")
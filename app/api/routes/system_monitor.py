@@ -335,14 +335,64 @@ async def get_chart_data(
         )
 
 
+@router.get("/github-rate-limit")
+async def get_github_rate_limit(
+    current_user: User = Depends(get_current_user)
+):
+    """获取 GitHub API 配额与请求调度状态"""
+    try:
+        from app.collectors.rate_limiter import rate_limit_governor
+        from app.collectors.response_cache import response_cache
+        from app.collectors.github_collector import fetch_flight
+        from app.collectors.event_probe import event_probe
+        from app.services.webhook_service import webhook_service
+        
+        return {
+            "rate_limit": rate_limit_governor.get_status(),
+            "conditional_cache": response_cache.get_stats(),
+            "shared_fetches": fetch_flight.get_stats(),
+            "event_probe": event_probe.get_stats(),
+            "webhooks": webhook_service.get_stats(),
+            "timestamp": datetime.now()
+        }
+        
+    except Exception as e:
+        logger.error(f"获取 GitHub 配额状态失败: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"获取 GitHub 配额状态失败: {str(e)}"
+        )
+
+
+@router.get("/cache-stats")
+async def get_cache_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """获取接口结果缓存的命中统计"""
+    try:
+        from app.core.cache import cache
+        
+        return {
+            "cache": cache.get_stats(),
+            "timestamp": datetime.now()
+        }
+        
+    except Exception as e:
+        logger.error(f"获取缓存统计失败: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"获取缓存统计失败: {str(e)}"
+        )
+
+
 @router.post("/actions/clear-cache")
 async def clear_cache(
     current_user: User = Depends(get_current_user)
 ):
     """清理缓存"""
     try:
-        # 这里应该实现实际的缓存清理逻辑
-        await asyncio.sleep(1)  # 模拟操作延迟
+        from app.core.cache import cache
+        await cache.clear()
         
         return {"message": "缓存清理成功"}
         
@@ -419,4 +469,26 @@ async def run_health_check(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"健康检查失败: {str(e)}"
-        ) 
\ No newline at end of file
+        )
+
+
+@router.get("/polling-schedule")
+async def get_polling_schedule(
+    current_user: User = Depends(get_current_user)
+):
+    """获取各订阅的自适应轮询计划"""
+    try:
+        from app.services.scheduler_service import scheduler_service
+        
+        return {
+            "adaptive_polling": scheduler_service.settings.schedule.adaptive_polling,
+            "subscriptions": await scheduler_service.poll_scheduler.get_schedule(),
+            "timestamp": datetime.now()
+        }
+        
+    except Exception as e:
+        logger.error(f"获取轮询计划失败: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"获取轮询计划失败: {str(e)}"
+        )
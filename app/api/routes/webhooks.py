@@ -0,0 +1,52 @@
+"""
+GitHub Webhook 接收路由
+校验签名并按投递ID去重后立即返回，事件在后台转换为仓库活动记录
+"""
+
+import json
+
+from fastapi import APIRouter, Header, HTTPException, Request, status
+from typing import Optional
+
+from app.core.logger import get_logger
+from app.services.webhook_service import webhook_service, WebhookQueueFull
+
+logger = get_logger(__name__)
+router = APIRouter()
+
+
+@router.post("/github", status_code=status.HTTP_202_ACCEPTED)
+async def receive_github_webhook(
+    request: Request,
+    x_github_event: str = Header(..., alias="X-GitHub-Event"),
+    x_github_delivery: str = Header(..., alias="X-GitHub-Delivery"),
+    x_hub_signature_256: Optional[str] = Header(None, alias="X-Hub-Signature-256")
+):
+    """接收 GitHub Webhook 推送"""
+    body = await request.body()
+    
+    if not webhook_service.verify_signature(body, x_hub_signature_256):
+        logger.warning(f"⚠️ Webhook 签名校验失败: {x_github_event} ({x_github_delivery})")
+        raise HTTPException(status_code=401, detail="Webhook 签名无效")
+    
+    if x_github_event == "ping":
+        return {"message": "pong", "delivery_id": x_github_delivery}
+    
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Webhook 载荷不是有效的 JSON")
+    
+    try:
+        queued = await webhook_service.enqueue(x_github_delivery, x_github_event, payload)
+    except WebhookQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.error(f"💥 接收 Webhook 失败: {e}")
+        raise HTTPException(status_code=500, detail=f"接收 Webhook 失败: {str(e)}")
+    
+    return {
+        "delivery_id": x_github_delivery,
+        "event": x_github_event,
+        "status": "queued" if queued else "duplicate"
+    }
@@ -0,0 +1,213 @@
+"""
+仓库事件探测
+完整收集前先以条件请求轮询 /repos/{owner}/{repo}/events，根据新事件的类型判断哪些端点发生了变化，
+未变化的端点本轮跳过；空闲仓库每轮只消耗一次（通常为 304 的）条件请求。
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import httpx
+from loguru import logger
+
+from app.core.config import get_settings
+from app.collectors.rate_limiter import RateLimitGovernor, rate_limit_governor
+
+
+# 事件类型到端点的映射
+EVENT_ENDPOINTS = {
+    "PushEvent": "commits",
+    "IssuesEvent": "issues",
+    "PullRequestEvent": "pull_requests",
+    "PullRequestReviewEvent": "pull_requests",
+    "PullRequestReviewCommentEvent": "pull_requests",
+    "PullRequestReviewThreadEvent": "pull_requests",
+    "ReleaseEvent": "releases",
+}
+
+
+@dataclass
+class ProbeDecision:
+    """一次探测的结论"""
+    repository: str
+    changed: Set[str]
+    reason: str
+    etag: Optional[str] = None
+    newest_event_id: Optional[int] = None
+
+    def should_fetch(self, endpoint: str) -> bool:
+        return endpoint in self.changed
+
+
+@dataclass
+class _RepositoryState:
+    etag: Optional[str] = None
+    last_event_id: Optional[int] = None
+    next_poll_at: float = 0.0
+
+
+@dataclass
+class _ProbeStats:
+    probes: int = 0
+    not_modified: int = 0
+    not_due: int = 0
+    unknown: int = 0
+    endpoints_skipped: int = 0
+    endpoints_fetched: int = 0
+    reasons: Dict[str, int] = field(default_factory=dict)
+
+
+class EventProbe:
+    """仓库事件探测器"""
+
+    ALL_ENDPOINTS = ("commits", "issues", "pull_requests", "releases")
+
+    def __init__(self, governor: Optional[RateLimitGovernor] = None):
+        self.settings = get_settings()
+        self.enabled = self.settings.github.event_probe
+        self.base_url = self.settings.github.api_url
+        self.governor = governor or rate_limit_governor
+        self.headers = {
+            "Accept": "application/vnd.github.v3+json",
+            "User-Agent": "GitHub-Sentinel/1.0.0"
+        }
+        self._states: Dict[str, _RepositoryState] = {}
+        self.stats = _ProbeStats()
+
+    async def probe(self, client: httpx.AsyncClient, owner: str, repo: str) -> ProbeDecision:
+        """探测仓库自上次成功收集以来发生变化的端点"""
+        repository = f"{owner}/{repo}".lower()
+        state = self._states.setdefault(repository, _RepositoryState())
+
+        # 遵守 X-Poll-Interval，间隔内不重复请求
+        if time.time() < state.next_poll_at:
+            return self._record(ProbeDecision(repository, set(), "not_due"))
+
+        headers = dict(self.headers)
+        if state.etag:
+            headers["If-None-Match"] = state.etag
+
+        try:
+            response = await self.governor.request(
+                client, "GET", f"{self.base_url}/repos/{owner}/{repo}/events",
+                headers=headers, params={"per_page": 100}
+            )
+        except Exception as e:
+            logger.warning(f"探测仓库事件失败 {repository}，本轮完整收集: {e}")
+            return self._record(ProbeDecision(repository, set(self.ALL_ENDPOINTS), "probe_failed"))
+
+        state.next_poll_at = time.time() + self._poll_interval(response)
+
+        if response.status_code == 304:
+            return self._record(ProbeDecision(repository, set(), "not_modified", etag=state.etag))
+
+        if response.status_code != 200:
+            logger.warning(f"探测仓库事件返回 {response.status_code} {repository}，本轮完整收集")
+            return self._record(ProbeDecision(repository, set(self.ALL_ENDPOINTS), f"status_{response.status_code}"))
+
+        events = response.json()
+        changed, reason, newest = self._classify(events, state.last_event_id)
+        return self._record(ProbeDecision(
+            repository, changed, reason,
+            etag=response.headers.get("ETag"),
+            newest_event_id=newest
+        ))
+
+    def commit(self, decision: ProbeDecision) -> None:
+        """收集成功后记录探测位置；收集失败时不调用，下次探测会重新报告这些变化"""
+        if decision.etag is None and decision.newest_event_id is None:
+            return
+        state = self._states.setdefault(decision.repository, _RepositoryState())
+        if decision.etag:
+            state.etag = decision.etag
+        if decision.newest_event_id is not None:
+            state.last_event_id = max(decision.newest_event_id, state.last_event_id or 0)
+
+    def record_endpoints(self, fetched: int, skipped: int) -> None:
+        """记录按探测结论实际请求和跳过的端点数"""
+        self.stats.endpoints_fetched += fetched
+        self.stats.endpoints_skipped += skipped
+
+    def _classify(
+        self,
+        events: List[Dict[str, Any]],
+        last_event_id: Optional[int]
+    ) -> Tuple[Set[str], str, Optional[int]]:
+        """根据上次位置之后的新事件判断变化的端点"""
+        ids = [self._event_id(event) for event in events]
+        newest = max((event_id for event_id in ids if event_id is not None), default=None)
+
+        if last_event_id is None:
+            # 首次探测没有基准，无法判断变化
+            return set(self.ALL_ENDPOINTS), "no_baseline", newest
+
+        new_events = [event for event, event_id in zip(events, ids) if event_id is not None and event_id > last_event_id]
+        if not new_events:
+            return set(), "no_new_events", newest
+
+        if len(new_events) == len(events):
+            # 整页都是新事件，可能还有更早的事件没有返回
+            return set(self.ALL_ENDPOINTS), "possible_gap", newest
+
+        changed = set()
+        for event in new_events:
+            endpoint = self._event_endpoint(event)
+            if endpoint:
+                changed.add(endpoint)
+        return changed, "events", newest
+
+    def _event_endpoint(self, event: Dict[str, Any]) -> Optional[str]:
+        event_type = event.get("type")
+        payload = event.get("payload") or {}
+        if event_type == "IssueCommentEvent":
+            # PR 上的评论也以 IssueCommentEvent 出现
+            return "pull_requests" if (payload.get("issue") or {}).get("pull_request") else "issues"
+        if event_type in ("CreateEvent", "DeleteEvent"):
+            return "releases" if payload.get("ref_type") == "tag" else None
+        return EVENT_ENDPOINTS.get(event_type)
+
+    def _event_id(self, event: Dict[str, Any]) -> Optional[int]:
+        try:
+            return int(event.get("id"))
+        except (TypeError, ValueError):
+            return None
+
+    def _poll_interval(self, response: httpx.Response) -> float:
+        try:
+            return float(response.headers.get("X-Poll-Interval", 0))
+        except ValueError:
+            return 0.0
+
+    def _record(self, decision: ProbeDecision) -> ProbeDecision:
+        self.stats.probes += 1
+        if decision.reason == "not_modified":
+            self.stats.not_modified += 1
+        elif decision.reason == "not_due":
+            self.stats.not_due += 1
+        elif decision.changed == set(self.ALL_ENDPOINTS):
+            self.stats.unknown += 1
+        self.stats.reasons[decision.reason] = self.stats.reasons.get(decision.reason, 0) + 1
+        logger.debug(f"仓库事件探测 {decision.repository}: {decision.reason}，变化端点 {sorted(decision.changed)}")
+        return decision
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取探测统计：304 比例、跳过的端点比例等"""
+        stats = self.stats
+        total_endpoints = stats.endpoints_fetched + stats.endpoints_skipped
+        return {
+            "enabled": self.enabled,
+            "probes": stats.probes,
+            "not_modified": stats.not_modified,
+            "not_due": stats.not_due,
+            "full_collections": stats.unknown,
+            "reasons": dict(stats.reasons),
+            "endpoints_fetched": stats.endpoints_fetched,
+            "endpoints_skipped": stats.endpoints_skipped,
+            "skip_rate": round(stats.endpoints_skipped / total_endpoints * 100, 1) if total_endpoints else 0.0,
+            "tracked_repositories": len(self._states)
+        }
+
+
+# 全局探测器实例
+event_probe = EventProbe()
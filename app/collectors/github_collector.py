@@ -5,35 +5,250 @@ GitHub 数据收集器
 
 import asyncio
 import json
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, replace
 from datetime import datetime, timedelta, timezone
-from typing import Dict, List, Any, Optional
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Any, Optional, Set, Tuple
 
 import httpx
 from loguru import logger
-from sqlalchemy import select
+from sqlalchemy import Boolean, literal_column, select, text, update
 
+from app.core.cache import cache, TAG_ACTIVITIES
 from app.core.config import get_settings
 from app.core.database import get_db_session
-from app.models.subscription import Subscription, RepositoryActivity, SubscriptionStatus, ReportFrequency
+from app.core.http_client import create_http_client, get_http_client
+from app.collectors.response_cache import CachedResponse, response_cache
+from app.collectors.rate_limiter import rate_limit_governor
+from app.collectors.token_pool import TokenState
+from app.collectors.sweep import CollectionSweep, SweepResult
+from app.collectors.graphql_collector import GraphQLBatchCollector, RepositoryTarget
+from app.collectors.event_probe import ProbeDecision, event_probe
+from app.models.subscription import Subscription, RepositoryActivity, SubscriptionStatus, ReportFrequency, SyncWatermark
 from app.models.report import Report, ReportStatus, ReportType
+from app.utils.single_flight import SingleFlight
+
+
+@dataclass
+class SyncPlan:
+    """单个订阅本次同步的起始位置"""
+    window_start: datetime
+    incremental: bool
+    watermarks: Dict[str, SyncWatermark]
+    full_sync: Dict[str, bool]
+    as_utc: Callable[[datetime], datetime]
+
+    def since(self, endpoint: str) -> datetime:
+        """有水位线且无需全量对账时从水位线开始，否则回溯整个时间窗口"""
+        watermark = self.watermarks.get(endpoint)
+        if self.full_sync[endpoint] or watermark is None or watermark.last_updated_at is None:
+            return self.window_start
+        return max(self.window_start, self.as_utc(watermark.last_updated_at))
+
+    def stop_id(self, endpoint: str) -> Optional[str]:
+        watermark = self.watermarks.get(endpoint)
+        return None if self.full_sync[endpoint] or watermark is None else watermark.last_item_id
+
+
+@dataclass
+class RepositoryRequest:
+    """一个仓库本轮需要获取的数据（由订阅该仓库的所有订阅合并而来）"""
+    owner: str
+    repo: str
+    endpoints: Tuple[str, ...]
+    since: Dict[str, datetime]
+    stop_ids: Dict[str, Optional[str]]
+    states: Tuple[str, ...]
+
+    @property
+    def key(self) -> Tuple:
+        """single-flight 键：相同仓库、相同范围的请求可以共享结果"""
+        return (
+            self.owner.lower(),
+            self.repo.lower(),
+            self.endpoints,
+            tuple((endpoint, self.since[endpoint].isoformat()) for endpoint in self.endpoints),
+            tuple((endpoint, self.stop_ids[endpoint]) for endpoint in self.endpoints),
+            self.states
+        )
+
+
+@dataclass
+class RepositoryFetch:
+    """仓库级获取结果：按端点汇总的数据，以及失败的端点/状态"""
+    items: Dict[str, List[Dict[str, Any]]]
+    errors: Dict[str, BaseException]
+
+
+# 仓库级获取的 single-flight，所有收集器实例共享
+fetch_flight = SingleFlight()
 
 
 class GitHubCollector:
     """GitHub 数据收集器"""
     
+    # 列表接口每页条数（GitHub 允许的最大值）
+    PER_PAGE = 100
+    # 流式写入数据库的批大小
+    STORE_BATCH_SIZE = 100
+    # 可按状态查询的 Issue/PR 状态
+    LISTABLE_STATES = ('open', 'closed', 'all')
+    # 活动记录的唯一键
+    ACTIVITY_KEY = ("subscription_id", "activity_type", "activity_id")
+    # 按水位线增量同步的端点
+    WATERMARK_ENDPOINTS = ('commits', 'issues', 'pull_requests', 'releases')
+    
     def __init__(self):
         self.settings = get_settings()
+        # Authorization 由请求调度器从令牌池中按请求注入
         self.headers = {
-            "Authorization": f"token {self.settings.github.token}",
             "Accept": "application/vnd.github.v3+json",
             "User-Agent": "GitHub-Sentinel/1.0.0"
         }
         self.base_url = self.settings.github.api_url
+        self.response_cache = response_cache
+        self.governor = rate_limit_governor
+        self.graphql_collector = GraphQLBatchCollector(self.governor)
+        self.fetch_flight = fetch_flight
+        self.event_probe = event_probe
+        
+    @asynccontextmanager
+    async def _get_client(self) -> AsyncIterator[httpx.AsyncClient]:
+        """获取 HTTP 客户端
+        
+        优先复用应用启动时创建的全局连接池；在 CLI 等未初始化连接池的场景下，
+        临时创建一个客户端并在使用后关闭。
+        """
+        client = get_http_client()
+        if client is not None:
+            yield client
+            return
+        
+        async with create_http_client() as client:
+            yield client
         
     def _utc_now(self) -> datetime:
         """获取带时区信息的UTC当前时间"""
         return datetime.now(timezone.utc)
 
+    def _window_start(self, days: int) -> datetime:
+        """计算时间窗口起点
+        
+        截断到整点，使同一小时内的重复轮询得到相同的请求 URL，从而可以命中条件请求缓存。
+        """
+        since = self._utc_now() - timedelta(days=days)
+        return since.replace(minute=0, second=0, microsecond=0)
+
+    def _since_param(self, since: datetime) -> str:
+        """生成 GitHub since 参数（ISO 8601 UTC）"""
+        return since.astimezone(timezone.utc).isoformat()
+
+    async def _get_page(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        params: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Any, Optional[str]]:
+        """发送带条件请求头的 GET 请求，返回 (解析结果, 下一页URL)，304 时返回缓存内容
+        
+        缓存按令牌区分：令牌池选定令牌后才查找该令牌的缓存条目，重试换用令牌时重新查找
+        """
+        cache_key: Optional[str] = None
+        cached: Optional[CachedResponse] = None
+        
+        async def conditional_headers(state: TokenState) -> Dict[str, str]:
+            nonlocal cache_key, cached
+            cache_key = self.response_cache.make_key(url, params, state.fingerprint)
+            cached = await self.response_cache.get(cache_key)
+            headers = {}
+            if cached is not None:
+                if cached.etag:
+                    headers["If-None-Match"] = cached.etag
+                if cached.last_modified:
+                    headers["If-Modified-Since"] = cached.last_modified
+            return headers
+        
+        response = await self.governor.request(
+            client, "GET", url, headers=self.headers, params=params, token_headers=conditional_headers
+        )
+        
+        if response.status_code == 304 and cached is not None:
+            self.response_cache.record(hit=True)
+            return cached.payload, cached.next_url
+        
+        response.raise_for_status()
+        self.response_cache.record(hit=False)
+        
+        payload = response.json()
+        next_url = response.links.get("next", {}).get("url")
+        await self.response_cache.set(
+            cache_key,
+            url,
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+            payload,
+            next_url
+        )
+        return payload, next_url
+
+    async def _get_json(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        params: Optional[Dict[str, Any]] = None
+    ) -> Any:
+        """发送带条件请求头的 GET 请求，304 时返回缓存的解析结果"""
+        payload, _ = await self._get_page(client, url, params)
+        return payload
+
+    async def _paginate(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        params: Dict[str, Any]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """沿 Link: rel="next" 逐页读取列表接口，逐条产出数据
+        
+        调用方停止迭代（break）即不再请求后续页面，可用于按时间窗口提前终止。
+        """
+        page_url: Optional[str] = url
+        page_params: Optional[Dict[str, Any]] = {**params, "per_page": params.get("per_page", self.PER_PAGE)}
+        pages = 0
+        
+        while page_url:
+            payload, next_url = await self._get_page(client, page_url, page_params)
+            for item in payload:
+                yield item
+            
+            pages += 1
+            if pages >= self.settings.github.max_pages:
+                if next_url:
+                    logger.warning(f"分页数达到上限 {self.settings.github.max_pages}，停止读取: {url}")
+                break
+            
+            # 下一页 URL 已包含全部查询参数
+            page_url, page_params = next_url, None
+
+    async def _gather_partial(
+        self,
+        tasks: Dict[str, Awaitable[Any]]
+    ) -> Tuple[Dict[str, Any], Dict[str, Exception]]:
+        """并发执行多个相互独立的请求，单个失败不影响其它请求的结果"""
+        names = list(tasks)
+        outcomes = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        
+        results: Dict[str, Any] = {}
+        errors: Dict[str, Exception] = {}
+        for name, outcome in zip(names, outcomes):
+            if isinstance(outcome, asyncio.CancelledError):
+                raise outcome
+            if isinstance(outcome, Exception):
+                errors[name] = outcome
+            else:
+                results[name] = outcome
+        return results, errors
+
     def _parse_github_datetime(self, date_string: str) -> datetime:
         """解析GitHub API返回的时间字符串"""
         if not date_string:
@@ -58,21 +273,28 @@ class GitHubCollector:
         logger.info(f"开始收集仓库数据: {owner}/{repo}")
         
         try:
-            async with httpx.AsyncClient() as client:
-                # 获取仓库基本信息
-                repo_info = await self._get_repository_info(client, owner, repo)
-                
-                # 获取最新的提交
-                commits = await self._get_recent_commits(client, owner, repo)
+            async with self._get_client() as client:
+                # 仓库信息、提交、Issues、PR、发布并发获取
+                results, errors = await self._gather_partial({
+                    "repository": self._get_repository_info(client, owner, repo),
+                    "commits": self._get_recent_commits(client, owner, repo),
+                    "issues": self._get_recent_issues(client, owner, repo),
+                    "pull_requests": self._get_recent_pull_requests(client, owner, repo),
+                    "releases": self._get_recent_releases(client, owner, repo)
+                })
                 
-                # 获取最新的 Issues
-                issues = await self._get_recent_issues(client, owner, repo)
+                # 仓库基本信息是报告的基础，获取失败时整体失败
+                if "repository" in errors:
+                    raise errors["repository"]
                 
-                # 获取最新的 Pull Requests
-                pull_requests = await self._get_recent_pull_requests(client, owner, repo)
+                for name, error in errors.items():
+                    logger.warning(f"获取 {owner}/{repo} 的 {name} 失败，已跳过: {error}")
                 
-                # 获取最新的 Releases
-                releases = await self._get_recent_releases(client, owner, repo)
+                repo_info = results["repository"]
+                commits = results.get("commits", [])
+                issues = results.get("issues", [])
+                pull_requests = results.get("pull_requests", [])
+                releases = results.get("releases", [])
                 
                 # 汇总数据
                 collected_data = {
@@ -87,7 +309,8 @@ class GitHubCollector:
                         "issues_count": len(issues),
                         "pull_requests_count": len(pull_requests),
                         "releases_count": len(releases)
-                    }
+                    },
+                    "errors": {name: str(error) for name, error in errors.items()}
                 }
                 
                 logger.info(f"仓库数据收集完成: {owner}/{repo}")
@@ -97,13 +320,15 @@ class GitHubCollector:
             logger.error(f"收集仓库数据失败 {owner}/{repo}: {e}", exc_info=True)
             raise
             
+    async def fetch_repository_info(self, owner: str, repo: str) -> Dict[str, Any]:
+        """获取仓库基本信息（经过条件请求缓存，仓库未变化时 304 不消耗速率限制额度）"""
+        async with self._get_client() as client:
+            return await self._get_repository_info(client, owner, repo)
+
     async def _get_repository_info(self, client: httpx.AsyncClient, owner: str, repo: str) -> Dict[str, Any]:
         """获取仓库基本信息"""
         url = f"{self.base_url}/repos/{owner}/{repo}"
-        response = await client.get(url, headers=self.headers)
-        response.raise_for_status()
-        
-        data = response.json()
+        data = await self._get_json(client, url)
         return {
             "name": data["name"],
             "full_name": data["full_name"],
@@ -123,141 +348,196 @@ class GitHubCollector:
             "size": data["size"]
         }
         
-    async def _get_recent_commits(self, client: httpx.AsyncClient, owner: str, repo: str, days: int = 7) -> List[Dict[str, Any]]:
-        """获取最近的提交"""
-        since = (self._utc_now() - timedelta(days=days)).isoformat()
-        url = f"{self.base_url}/repos/{owner}/{repo}/commits"
-        params = {
-            "since": since,
-            "per_page": 50
+    def _parse_commit(self, commit_data: Dict[str, Any]) -> Dict[str, Any]:
+        """解析提交数据"""
+        return {
+            "sha": commit_data["sha"],
+            "message": commit_data["commit"]["message"],
+            "author": {
+                "name": commit_data["commit"]["author"]["name"],
+                "email": commit_data["commit"]["author"]["email"],
+                "login": commit_data.get("author", {}).get("login", "") if commit_data.get("author") else ""
+            },
+            "date": commit_data["commit"]["author"]["date"],
+            "html_url": commit_data["html_url"]
         }
+
+    def _parse_issue(self, issue_data: Dict[str, Any]) -> Dict[str, Any]:
+        """解析 Issue 数据"""
+        return {
+            "number": issue_data["number"],
+            "title": issue_data["title"],
+            "body": (issue_data.get("body") or "")[:1000],  # 限制长度
+            "state": issue_data["state"],
+            "user": {
+                "login": issue_data.get("user", {}).get("login", "unknown") if issue_data.get("user") else "unknown",
+                "avatar_url": issue_data.get("user", {}).get("avatar_url", "") if issue_data.get("user") else ""
+            },
+            "labels": [label["name"] for label in issue_data.get("labels", [])],
+            "assignees": [assignee["login"] for assignee in issue_data.get("assignees", [])],
+            "milestone": issue_data.get("milestone", {}).get("title", "") if issue_data.get("milestone") else "",
+            "comments": issue_data.get("comments", 0),
+            "created_at": issue_data["created_at"],
+            "updated_at": issue_data["updated_at"],
+            "closed_at": issue_data.get("closed_at"),
+            "html_url": issue_data["html_url"]
+        }
+
+    def _parse_pull_request(self, pr_data: Dict[str, Any]) -> Dict[str, Any]:
+        """解析 Pull Request 数据"""
+        return {
+            "number": pr_data["number"],
+            "title": pr_data["title"],
+            "body": (pr_data.get("body") or "")[:1000],
+            "state": pr_data["state"],
+            "user": {
+                "login": pr_data.get("user", {}).get("login", "unknown") if pr_data.get("user") else "unknown",
+                "avatar_url": pr_data.get("user", {}).get("avatar_url", "") if pr_data.get("user") else ""
+            },
+            "labels": [label["name"] for label in pr_data.get("labels", [])],
+            "assignees": [assignee["login"] for assignee in pr_data.get("assignees", [])],
+            "milestone": pr_data.get("milestone", {}).get("title", "") if pr_data.get("milestone") else "",
+            "comments": pr_data.get("comments", 0),
+            "commits": pr_data.get("commits", 0),
+            "additions": pr_data.get("additions", 0),
+            "deletions": pr_data.get("deletions", 0),
+            "changed_files": pr_data.get("changed_files", 0),
+            # 列表接口不返回 merged 字段，根据 merged_at 判断
+            "merged": pr_data.get("merged", pr_data.get("merged_at") is not None),
+            "merged_at": pr_data.get("merged_at"),
+            "draft": pr_data.get("draft", False),
+            "created_at": pr_data["created_at"],
+            "updated_at": pr_data["updated_at"],
+            "closed_at": pr_data.get("closed_at"),
+            "html_url": pr_data["html_url"]
+        }
+
+    def _parse_release(self, release_data: Dict[str, Any]) -> Dict[str, Any]:
+        """解析发布数据"""
+        return {
+            "id": release_data["id"],
+            "tag_name": release_data["tag_name"],
+            "name": release_data.get("name", ""),
+            "body": (release_data.get("body") or "")[:1000],
+            "draft": release_data["draft"],
+            "prerelease": release_data["prerelease"],
+            "author": {
+                "login": release_data["author"]["login"],
+                "avatar_url": release_data["author"]["avatar_url"]
+            },
+            "created_at": release_data["created_at"],
+            "published_at": release_data["published_at"],
+            "html_url": release_data["html_url"]
+        }
+
+    async def _iter_recent_commits(
+        self,
+        client: httpx.AsyncClient,
+        owner: str,
+        repo: str,
+        since: datetime,
+        stop_sha: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """逐条产出 since 之后的提交（服务端按 since 过滤），遇到 stop_sha 即停止"""
+        url = f"{self.base_url}/repos/{owner}/{repo}/commits"
+        params = {"since": self._since_param(since)}
         
-        response = await client.get(url, headers=self.headers, params=params)
-        response.raise_for_status()
-        
-        commits = []
-        for commit_data in response.json():
-            commits.append({
-                "sha": commit_data["sha"],
-                "message": commit_data["commit"]["message"],
-                "author": {
-                    "name": commit_data["commit"]["author"]["name"],
-                    "email": commit_data["commit"]["author"]["email"],
-                    "login": commit_data.get("author", {}).get("login", "") if commit_data.get("author") else ""
-                },
-                "date": commit_data["commit"]["author"]["date"],
-                "html_url": commit_data["html_url"]
-            })
-            
-        return commits
-        
-    async def _get_recent_issues(self, client: httpx.AsyncClient, owner: str, repo: str, days: int = 7) -> List[Dict[str, Any]]:
-        """获取最近的 Issues"""
-        since = (self._utc_now() - timedelta(days=days)).isoformat()
+        async for commit_data in self._paginate(client, url, params):
+            if stop_sha and commit_data["sha"] == stop_sha:
+                break
+            yield self._parse_commit(commit_data)
+
+    async def _iter_recent_issues(
+        self,
+        client: httpx.AsyncClient,
+        owner: str,
+        repo: str,
+        since: datetime,
+        state: str
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """逐条产出指定状态下 since 之后更新的 Issues（服务端按 since 过滤）"""
         url = f"{self.base_url}/repos/{owner}/{repo}/issues"
         params = {
-            "state": "all",
-            "since": since,
-            "per_page": 50,
-            "sort": "updated"
+            "state": state,
+            "since": self._since_param(since),
+            "sort": "updated",
+            "direction": "desc"
         }
         
-        response = await client.get(url, headers=self.headers, params=params)
-        response.raise_for_status()
-        
-        issues = []
-        for issue_data in response.json():
+        async for issue_data in self._paginate(client, url, params):
             # 跳过 Pull Requests
             if "pull_request" in issue_data:
                 continue
-                
-            issues.append({
-                "number": issue_data["number"],
-                "title": issue_data["title"],
-                "body": (issue_data.get("body") or "")[:1000],  # 限制长度
-                "state": issue_data["state"],
-                "user": {
-                    "login": issue_data.get("user", {}).get("login", "unknown") if issue_data.get("user") else "unknown",
-                    "avatar_url": issue_data.get("user", {}).get("avatar_url", "") if issue_data.get("user") else ""
-                },
-                "labels": [label["name"] for label in issue_data.get("labels", [])],
-                "assignees": [assignee["login"] for assignee in issue_data.get("assignees", [])],
-                "milestone": issue_data.get("milestone", {}).get("title", "") if issue_data.get("milestone") else "",
-                "comments": issue_data.get("comments", 0),
-                "created_at": issue_data["created_at"],
-                "updated_at": issue_data["updated_at"],
-                "closed_at": issue_data.get("closed_at"),
-                "html_url": issue_data["html_url"]
-            })
-            
-        return issues
+            yield self._parse_issue(issue_data)
+
+    async def _iter_recent_pull_requests(
+        self,
+        client: httpx.AsyncClient,
+        owner: str,
+        repo: str,
+        since: datetime,
+        state: str
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """逐条产出指定状态下 since 之后更新的 Pull Requests
         
-    async def _get_recent_pull_requests(self, client: httpx.AsyncClient, owner: str, repo: str, days: int = 7) -> List[Dict[str, Any]]:
-        """获取最近的 Pull Requests"""
+        该接口不支持 since 参数，列表按 updated 倒序返回，遇到第一条早于 since 的数据即停止翻页。
+        """
         url = f"{self.base_url}/repos/{owner}/{repo}/pulls"
         params = {
-            "state": "all",
-            "per_page": 50,
+            "state": state,
             "sort": "updated",
             "direction": "desc"
         }
         
-        response = await client.get(url, headers=self.headers, params=params)
-        response.raise_for_status()
+        async for pr_data in self._paginate(client, url, params):
+            updated_at = self._parse_github_datetime(pr_data["updated_at"])
+            if updated_at and updated_at < since:
+                break
+            yield self._parse_pull_request(pr_data)
+
+    async def _iter_recent_releases(
+        self,
+        client: httpx.AsyncClient,
+        owner: str,
+        repo: str,
+        limit: int = 10,
+        since: Optional[datetime] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """逐条产出最近的发布，最多 limit 条；指定 since 时遇到更早创建的发布即停止"""
+        url = f"{self.base_url}/repos/{owner}/{repo}/releases"
+        params = {"per_page": min(limit, self.PER_PAGE)}
         
-        cutoff_date = self._utc_now() - timedelta(days=days)
-        pull_requests = []
+        if limit <= 0:
+            return
         
-        for pr_data in response.json():
-            updated_at = self._parse_github_datetime(pr_data["updated_at"])
-            if updated_at < cutoff_date:
-                continue
-                
-            pull_requests.append({
-                "number": pr_data["number"],
-                "title": pr_data["title"],
-                "state": pr_data["state"],
-                "user": {
-                    "login": pr_data.get("user", {}).get("login", "unknown") if pr_data.get("user") else "unknown",
-                    "avatar_url": pr_data.get("user", {}).get("avatar_url", "") if pr_data.get("user") else ""
-                },
-                "merged": pr_data.get("merged", False),
-                "created_at": pr_data["created_at"],
-                "updated_at": pr_data["updated_at"],
-                "html_url": pr_data["html_url"]
-            })
-            
-        return pull_requests
+        count = 0
+        async for release_data in self._paginate(client, url, params):
+            if since is not None:
+                created_at = self._parse_github_datetime(release_data["created_at"])
+                if created_at and created_at < since:
+                    break
+            yield self._parse_release(release_data)
+            count += 1
+            # 达到上限立即结束，上限恰好落在分页边界时不再请求下一页
+            if count >= limit:
+                return
+
+    async def _get_recent_commits(self, client: httpx.AsyncClient, owner: str, repo: str, days: int = 7) -> List[Dict[str, Any]]:
+        """获取最近的提交"""
+        since = self._window_start(days)
+        return [commit async for commit in self._iter_recent_commits(client, owner, repo, since)]
         
-    async def _get_recent_releases(self, client: httpx.AsyncClient, owner: str, repo: str, limit: int = 10) -> List[Dict[str, Any]]:
-        """获取最近的发布"""
-        url = f"{self.base_url}/repos/{owner}/{repo}/releases"
-        params = {
-            "per_page": limit
-        }
+    async def _get_recent_issues(self, client: httpx.AsyncClient, owner: str, repo: str, days: int = 7) -> List[Dict[str, Any]]:
+        """获取最近的 Issues"""
+        return await self._get_recent_issues_by_state(client, owner, repo, days, ['all'])
         
-        response = await client.get(url, headers=self.headers, params=params)
-        response.raise_for_status()
+    async def _get_recent_pull_requests(self, client: httpx.AsyncClient, owner: str, repo: str, days: int = 7) -> List[Dict[str, Any]]:
+        """获取最近的 Pull Requests"""
+        return await self._get_recent_pull_requests_by_state(client, owner, repo, days, ['all'])
         
-        releases = []
-        for release_data in response.json():
-            releases.append({
-                "id": release_data["id"],
-                "tag_name": release_data["tag_name"],
-                "name": release_data.get("name", ""),
-                "body": release_data.get("body", "")[:1000],
-                "draft": release_data["draft"],
-                "prerelease": release_data["prerelease"],
-                "author": {
-                    "login": release_data["author"]["login"],
-                    "avatar_url": release_data["author"]["avatar_url"]
-                },
-                "created_at": release_data["created_at"],
-                "published_at": release_data["published_at"],
-                "html_url": release_data["html_url"]
-            })
-            
-        return releases
+    async def _get_recent_releases(self, client: httpx.AsyncClient, owner: str, repo: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """获取最近的发布"""
+        return [release async for release in self._iter_recent_releases(client, owner, repo, limit)]
         
     async def generate_repository_report(self, owner: str, repo: str) -> str:
         """生成仓库报告"""
@@ -340,147 +620,541 @@ class GitHubCollector:
     async def collect_daily_updates(self) -> Dict[str, Any]:
         """收集每日更新数据"""
         logger.info("开始收集每日更新数据")
-        
+        return await self._collect_updates(ReportFrequency.DAILY, days=1)
+
+    async def collect_weekly_updates(self) -> Dict[str, Any]:
+        """收集每周更新数据"""
+        logger.info("开始收集每周更新数据")
+        return await self._collect_updates(ReportFrequency.WEEKLY, days=7)
+
+    async def _collect_updates(self, frequency: ReportFrequency, days: int) -> Dict[str, Any]:
+        """并发收集指定频率的所有活跃订阅"""
         async with get_db_session() as session:
             # 获取所有活跃订阅
             subscriptions = await session.execute(
                 select(Subscription).where(
                     Subscription.status == SubscriptionStatus.ACTIVE,
-                    Subscription.frequency.in_([ReportFrequency.DAILY])
+                    Subscription.frequency.in_([frequency])
                 )
             )
             subscriptions = subscriptions.scalars().all()
+        
+        success_count = 0
+        error_count = 0
+        collected_data = []
+        
+        # 新增活动的通知在入库时发送（_finish_sync），这里不再重复通知
+        async for result in self.collect_subscriptions(subscriptions, days, ['open', 'closed', 'merged']):
+            if result.ok:
+                collected_data.append(result.data)
+                success_count += 1
+            else:
+                error_count += 1
+        
+        return {
+            "success_count": success_count,
+            "error_count": error_count,
+            "collected_data": collected_data,
+            "total_subscriptions": len(subscriptions)
+        }
+
+    async def collect_subscriptions(
+        self,
+        subscriptions: List[Subscription],
+        days: int,
+        include_states: List[str] = None,
+        incremental: bool = False
+    ) -> AsyncIterator[SweepResult]:
+        """按配置的收集器后端（rest/graphql）收集多个订阅，逐个产出每个订阅的结果
+        
+        订阅同一仓库的多个订阅合并为一次仓库级请求，结果再分发到各订阅，API 调用量只与仓库数相关。
+        """
+        if include_states is None:
+            include_states = ['open', 'closed']
+        
+        groups: Dict[str, List[Subscription]] = {}
+        for subscription in subscriptions:
+            groups.setdefault(subscription.repository.lower(), []).append(subscription)
+        logger.info(f"{sum(len(group) for group in groups.values())} 个订阅合并为 {len(groups)} 个仓库请求")
+        
+        if self.settings.github.collector_backend == "graphql":
+            async for result in self._collect_groups_graphql(list(groups.values()), days, include_states, incremental):
+                yield result
+            return
+        
+        # 以每组的第一个订阅作为代表参与有界并发调度
+        members = {group[0].id: group for group in groups.values()}
+        
+        async def _collect(representative: Subscription) -> Dict[str, Any]:
+            return {"results": await self._collect_group(members[representative.id], days, include_states, incremental)}
+        
+        async for group_result in CollectionSweep().run([group[0] for group in groups.values()], _collect):
+            if group_result.ok:
+                for result in group_result.data["results"]:
+                    yield result
+            else:
+                for subscription in members[group_result.subscription.id]:
+                    yield SweepResult(subscription, error=group_result.error, duration=group_result.duration)
+
+    async def _collect_group(
+        self,
+        group: List[Subscription],
+        days: int,
+        include_states: List[str],
+        incremental: bool
+    ) -> List[SweepResult]:
+        """获取一次仓库数据并分发给订阅该仓库的所有订阅"""
+        started = time.monotonic()
+        plans = [(subscription, await self._plan_sync(subscription.id, days, incremental)) for subscription in group]
+        request = self._build_request(plans, include_states)
+        
+        async with self._get_client() as client:
+            decision = None
+            if incremental and self.event_probe.enabled:
+                decision = await self.event_probe.probe(client, request.owner, request.repo)
+                request = self._apply_probe(request, plans, decision)
             
-            success_count = 0
-            error_count = 0
-            collected_data = []
-            
-            for subscription in subscriptions:
-                try:
-                    owner, repo = subscription.repository.split('/')
-                    data = await self.collect_repository_activities(
-                        subscription, 
-                        days=1,
-                        include_states=['open', 'closed', 'merged']
-                    )
-                    collected_data.append(data)
-                    success_count += 1
+            if request.endpoints:
+                fetch = await self._fetch_repository(client, request)
+            else:
+                fetch = RepositoryFetch(items={}, errors={})
+        
+        # 只有完整收集成功才推进探测位置，失败的变化下次仍会被探测到
+        if decision is not None and not fetch.errors:
+            self.event_probe.commit(decision)
+        
+        results = []
+        for subscription, plan in plans:
+            try:
+                data = await self._fan_out(subscription, plan, request, fetch)
+                results.append(SweepResult(subscription, data=data, duration=time.monotonic() - started))
+            except Exception as e:
+                logger.error(f"收集订阅 {subscription.id} ({subscription.repository}) 数据失败: {e}")
+                results.append(SweepResult(subscription, error=e, duration=time.monotonic() - started))
+        return results
+
+    async def _collect_groups_graphql(
+        self,
+        groups: List[List[Subscription]],
+        days: int,
+        include_states: List[str],
+        incremental: bool
+    ) -> AsyncIterator[SweepResult]:
+        """GraphQL 后端：每次查询批量获取 graphql_batch_size 个仓库
+        
+        批次之间串行执行，GraphQL 按查询复杂度计费，串行可以避免触发二级速率限制。
+        """
+        batch_size = max(1, self.settings.github.graphql_batch_size)
+        
+        async with self._get_client() as client:
+            for offset in range(0, len(groups), batch_size):
+                started = time.monotonic()
+                batch: List[Tuple[List[Tuple[Subscription, SyncPlan]], RepositoryRequest, Optional[ProbeDecision]]] = []
+                targets: List[RepositoryTarget] = []
+                
+                for group in groups[offset:offset + batch_size]:
+                    if len(group[0].repository.split('/')) != 2:
+                        for subscription in group:
+                            yield SweepResult(subscription, error=ValueError(f"仓库格式错误: {subscription.repository}"))
+                        continue
                     
-                    # 发送通知
-                    await self._send_activity_notifications(subscription, data)
+                    plans = [(subscription, await self._plan_sync(subscription.id, days, incremental)) for subscription in group]
+                    request = self._build_request(plans, include_states)
+                    decision = None
+                    if incremental and self.event_probe.enabled:
+                        decision = await self.event_probe.probe(client, request.owner, request.repo)
+                        request = self._apply_probe(request, plans, decision)
                     
+                    if not request.endpoints:
+                        # 探测表明仓库没有变化，不参与本轮批量查询
+                        if decision is not None:
+                            self.event_probe.commit(decision)
+                        for subscription, plan in plans:
+                            data = await self._fan_out(subscription, plan, request, RepositoryFetch(items={}, errors={}))
+                            yield SweepResult(subscription, data=data, duration=time.monotonic() - started)
+                        continue
+                    
+                    batch.append((plans, request, decision))
+                    targets.append(RepositoryTarget(
+                        key=len(batch) - 1,
+                        owner=request.owner,
+                        name=request.repo,
+                        since=request.since,
+                        connections=request.endpoints,
+                        states=list(request.states)
+                    ))
+                
+                if not targets:
+                    continue
+                
+                try:
+                    batch_results = await self.graphql_collector.fetch(client, targets)
                 except Exception as e:
-                    logger.error(f"收集订阅 {subscription.id} 数据失败: {e}")
-                    error_count += 1
-            
-            return {
-                "success_count": success_count,
-                "error_count": error_count,
-                "collected_data": collected_data,
-                "total_subscriptions": len(subscriptions)
-            }
+                    logger.error(f"GraphQL 批量收集失败 ({len(targets)} 个仓库): {e}")
+                    for plans, _, _ in batch:
+                        for subscription, _ in plans:
+                            yield SweepResult(subscription, error=e, duration=time.monotonic() - started)
+                    continue
+                
+                for batch_result in batch_results:
+                    plans, request, decision = batch[batch_result.target.key]
+                    if batch_result.ok:
+                        fetch = RepositoryFetch(
+                            items={endpoint: batch_result.items[endpoint] for endpoint in request.endpoints},
+                            errors={}
+                        )
+                        if decision is not None:
+                            self.event_probe.commit(decision)
+                    else:
+                        error = RuntimeError(batch_result.error)
+                        fetch = RepositoryFetch(items={}, errors={endpoint: error for endpoint in request.endpoints})
+                    
+                    for subscription, plan in plans:
+                        try:
+                            data = await self._fan_out(subscription, plan, request, fetch)
+                            yield SweepResult(subscription, data=data, duration=time.monotonic() - started)
+                        except Exception as e:
+                            logger.error(f"收集订阅 {subscription.id} ({subscription.repository}) 数据失败: {e}")
+                            yield SweepResult(subscription, error=e, duration=time.monotonic() - started)
 
-    async def collect_weekly_updates(self) -> Dict[str, Any]:
-        """收集每周更新数据"""
-        logger.info("开始收集每周更新数据")
+    def _monitored_endpoints(self, subscription: Subscription) -> Tuple[str, ...]:
+        """订阅需要收集的端点"""
+        flags = {
+            "commits": subscription.monitor_commits,
+            "issues": subscription.monitor_issues,
+            "pull_requests": subscription.monitor_pull_requests,
+            "releases": subscription.monitor_releases
+        }
+        return tuple(endpoint for endpoint in self.WATERMARK_ENDPOINTS if flags[endpoint])
+
+    def _build_request(
+        self,
+        plans: List[Tuple[Subscription, "SyncPlan"]],
+        include_states: List[str]
+    ) -> "RepositoryRequest":
+        """合并订阅同一仓库的各订阅需求：端点取并集，起始时间取最早"""
+        owner, repo = plans[0][0].repository.split('/')
         
-        async with get_db_session() as session:
-            # 获取所有活跃的周报订阅
-            subscriptions = await session.execute(
-                select(Subscription).where(
-                    Subscription.status == SubscriptionStatus.ACTIVE,
-                    Subscription.frequency.in_([ReportFrequency.WEEKLY])
-                )
-            )
-            subscriptions = subscriptions.scalars().all()
+        endpoints = []
+        since: Dict[str, datetime] = {}
+        stop_ids: Dict[str, Optional[str]] = {}
+        for endpoint in self.WATERMARK_ENDPOINTS:
+            interested = [plan for subscription, plan in plans if endpoint in self._monitored_endpoints(subscription)]
+            if not interested:
+                continue
+            endpoints.append(endpoint)
+            since[endpoint] = min(plan.since(endpoint) for plan in interested)
+            # 只有所有订阅的水位线一致时才能按已知的最新提交提前停止
+            ids = {plan.stop_id(endpoint) for plan in interested}
+            same_since = all(plan.since(endpoint) == since[endpoint] for plan in interested)
+            stop_ids[endpoint] = ids.pop() if len(ids) == 1 and same_since else None
+        
+        return RepositoryRequest(
+            owner=owner,
+            repo=repo,
+            endpoints=tuple(endpoints),
+            since=since,
+            stop_ids=stop_ids,
+            states=tuple(self._listable_states(include_states))
+        )
+
+    def _apply_probe(
+        self,
+        request: "RepositoryRequest",
+        plans: List[Tuple[Subscription, "SyncPlan"]],
+        decision: ProbeDecision
+    ) -> "RepositoryRequest":
+        """根据探测结论去掉未变化的端点；需要全量对账的端点始终保留"""
+        endpoints = tuple(
+            endpoint for endpoint in request.endpoints
+            if decision.should_fetch(endpoint) or any(plan.full_sync[endpoint] for _, plan in plans)
+        )
+        self.event_probe.record_endpoints(fetched=len(endpoints), skipped=len(request.endpoints) - len(endpoints))
+        return replace(request, endpoints=endpoints)
+
+    async def _fetch_repository(self, client: httpx.AsyncClient, request: "RepositoryRequest") -> "RepositoryFetch":
+        """获取仓库数据；相同请求正在进行时（如并发的手动同步）直接共享其结果"""
+        return await self.fetch_flight.do(request.key, lambda: self._fetch_repository_rest(client, request))
+
+    async def _fetch_repository_rest(self, client: httpx.AsyncClient, request: "RepositoryRequest") -> "RepositoryFetch":
+        """通过 REST 接口并发获取各端点/状态的数据，部分失败时保留成功部分"""
+        owner, repo = request.owner, request.repo
+        
+        async def _drain(items: AsyncIterator[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            return [item async for item in items]
+        
+        tasks = {}
+        if "commits" in request.endpoints:
+            tasks["commits"] = _drain(self._iter_recent_commits(
+                client, owner, repo, request.since["commits"], request.stop_ids["commits"]
+            ))
+        if "issues" in request.endpoints:
+            for state in request.states:
+                tasks[f"issues:{state}"] = _drain(self._iter_recent_issues(
+                    client, owner, repo, request.since["issues"], state
+                ))
+        if "pull_requests" in request.endpoints:
+            for state in request.states:
+                tasks[f"pull_requests:{state}"] = _drain(self._iter_recent_pull_requests(
+                    client, owner, repo, request.since["pull_requests"], state
+                ))
+        if "releases" in request.endpoints:
+            tasks["releases"] = _drain(self._iter_recent_releases(
+                client, owner, repo, limit=10, since=request.since["releases"]
+            ))
+        
+        results, errors = await self._gather_partial(tasks)
+        
+        items: Dict[str, List[Dict[str, Any]]] = {}
+        for name, payload in results.items():
+            endpoint = name.split(':')[0]
+            items.setdefault(endpoint, []).extend(payload)
+        
+        # 同一个编号可能在不同状态查询中出现
+        for endpoint in ("issues", "pull_requests"):
+            if endpoint in items:
+                items[endpoint] = list({item["number"]: item for item in items[endpoint]}.values())
+        
+        return RepositoryFetch(items=items, errors=errors)
+
+    async def _fan_out(
+        self,
+        subscription: Subscription,
+        plan: "SyncPlan",
+        request: "RepositoryRequest",
+        fetch: "RepositoryFetch"
+    ) -> Dict[str, Any]:
+        """按订阅的监控配置和水位线筛选仓库数据，转换为该订阅的活动记录入库"""
+        endpoints = self._monitored_endpoints(subscription)
+        errors = {name: error for name, error in fetch.errors.items() if name.split(':')[0] in endpoints}
+        converters = {
+            "commits": self._convert_commits_to_activities,
+            "issues": self._convert_issues_to_activities,
+            "pull_requests": self._convert_prs_to_activities,
+            "releases": self._convert_releases_to_activities
+        }
+        
+        results: Dict[str, List[Dict]] = {}
+        marks: Dict[str, Tuple[datetime, str]] = {}
+        for endpoint in endpoints:
+            if endpoint not in fetch.items:
+                continue
             
-            success_count = 0
-            error_count = 0
-            collected_data = []
+            items = fetch.items[endpoint]
+            # 合并请求的起始时间早于本订阅的水位线时，跳过本订阅已同步过的数据
+            since = plan.since(endpoint)
+            if since > request.since[endpoint]:
+                items = [item for item in items if (self._item_mark(endpoint, item)[0] or since) >= since]
             
-            for subscription in subscriptions:
-                try:
-                    data = await self.collect_repository_activities(
-                        subscription, 
-                        days=7,
-                        include_states=['open', 'closed', 'merged']
-                    )
-                    collected_data.append(data)
-                    success_count += 1
-                    
-                    # 发送通知
-                    await self._send_activity_notifications(subscription, data)
-                    
-                except Exception as e:
-                    logger.error(f"收集订阅 {subscription.id} 数据失败: {e}")
-                    error_count += 1
+            for item in items:
+                mark_time, mark_id = self._item_mark(endpoint, item)
+                if mark_time and (endpoint not in marks or mark_time > marks[endpoint][0]):
+                    marks[endpoint] = (mark_time, mark_id)
             
-            return {
-                "success_count": success_count,
-                "error_count": error_count,
-                "collected_data": collected_data,
-                "total_subscriptions": len(subscriptions)
-            }
+            results[endpoint] = await self._store_in_batches(converters[endpoint](items, subscription.id))
+        
+        # 所有端点都失败时视为整体失败，否则保留成功部分
+        if errors and not results:
+            raise next(iter(errors.values()))
+        for name, error in errors.items():
+            logger.warning(f"获取 {subscription.repository} 的 {name} 失败，已跳过: {error}")
+        
+        return await self._finish_sync(subscription, plan, results, errors, marks)
 
     async def collect_repository_activities(
         self, 
         subscription: Subscription, 
         days: int = 7,
-        include_states: List[str] = None
+        include_states: List[str] = None,
+        incremental: bool = False
     ) -> Dict[str, Any]:
         """
         收集仓库活动数据并存储到数据库
         
         Args:
             subscription: 订阅对象
-            days: 收集天数
+            days: 收集天数（增量模式下为首次同步和全量对账的回溯天数）
             include_states: 包含的状态列表
+            incremental: 是否按水位线增量同步，只拉取上次同步之后的新数据
         """
         if include_states is None:
             include_states = ['open', 'closed']
             
         owner, repo = subscription.repository.split('/')
-        logger.info(f"收集仓库活动: {owner}/{repo} (最近{days}天)")
+        logger.info(f"收集仓库活动: {owner}/{repo} (最近{days}天{'，增量' if incremental else ''})")
         
         try:
-            async with httpx.AsyncClient() as client:
-                activities = []
-                
-                # 根据订阅配置收集不同类型的活动
-                if subscription.monitor_commits:
-                    commits = await self._get_recent_commits(client, owner, repo, days)
-                    activities.extend(self._convert_commits_to_activities(commits, subscription.id))
-                
-                if subscription.monitor_issues:
-                    issues = await self._get_recent_issues_by_state(client, owner, repo, days, include_states)
-                    activities.extend(self._convert_issues_to_activities(issues, subscription.id))
-                
-                if subscription.monitor_pull_requests:
-                    prs = await self._get_recent_pull_requests_by_state(client, owner, repo, days, include_states)
-                    activities.extend(self._convert_prs_to_activities(prs, subscription.id))
-                
-                if subscription.monitor_releases:
-                    releases = await self._get_recent_releases(client, owner, repo, limit=10)
-                    activities.extend(self._convert_releases_to_activities(releases, subscription.id))
-                
-                # 存储活动数据到数据库
-                stored_activities = await self._store_activities(activities)
-                
-                # 更新订阅的最后同步时间
-                await self._update_subscription_sync_time(subscription.id)
-                
-                return {
-                    "subscription_id": subscription.id,
-                    "repository": subscription.repository,
-                    "activities": stored_activities,
-                    "total_activities": len(stored_activities),
-                    "collected_at": self._utc_now().isoformat()
-                }
+            plan = await self._plan_sync(subscription.id, days, incremental)
+            request = self._build_request([(subscription, plan)], include_states)
+            
+            async with self._get_client() as client:
+                fetch = await self._fetch_repository(client, request)
+            
+            return await self._fan_out(subscription, plan, request, fetch)
                 
         except Exception as e:
             logger.error(f"收集仓库活动失败 {owner}/{repo}: {e}")
             raise
 
+    def _as_utc(self, value: datetime) -> datetime:
+        """数据库（如 SQLite）读出的时间可能不带时区，按 UTC 处理"""
+        if value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc)
+
+    def _needs_full_sync(self, watermark: Optional[SyncWatermark]) -> bool:
+        """没有水位线或距上次全量对账超过间隔时需要全量同步"""
+        if watermark is None or watermark.last_full_sync_at is None:
+            return True
+        interval = timedelta(hours=self.settings.schedule.full_sync_interval_hours)
+        return self._utc_now() - self._as_utc(watermark.last_full_sync_at) >= interval
+
+    async def _plan_sync(self, subscription_id: int, days: int, incremental: bool) -> "SyncPlan":
+        """根据水位线确定各端点的起始时间"""
+        watermarks = await self._load_watermarks(subscription_id) if incremental else {}
+        return SyncPlan(
+            window_start=self._window_start(days),
+            incremental=incremental,
+            watermarks=watermarks,
+            full_sync={
+                endpoint: self._needs_full_sync(watermarks.get(endpoint))
+                for endpoint in self.WATERMARK_ENDPOINTS
+            },
+            as_utc=self._as_utc
+        )
+
+    async def _finish_sync(
+        self,
+        subscription: Subscription,
+        plan: "SyncPlan",
+        results: Dict[str, List[Dict]],
+        errors: Dict[str, Any],
+        marks: Dict[str, Tuple[datetime, str]]
+    ) -> Dict[str, Any]:
+        """汇总已入库的活动，推进水位线并更新同步时间"""
+        # 不同状态查询可能返回同一条记录，按类型和ID去重
+        unique_activities = {}
+        for stored in results.values():
+            for activity in stored:
+                unique_activities[(activity["activity_type"], activity["id"])] = activity
+        stored_activities = list(unique_activities.values())
+        new_activities = [activity for activity in stored_activities if activity["inserted"]]
+        
+        # 只推进全部状态都成功的端点的水位线，失败的端点下次从原水位线重新拉取
+        if plan.incremental:
+            failed_endpoints = {name.split(':')[0] for name in errors}
+            synced_endpoints = {name.split(':')[0] for name in results} - failed_endpoints
+            await self._save_watermarks(
+                subscription.id,
+                {endpoint: marks.get(endpoint) for endpoint in synced_endpoints},
+                {endpoint for endpoint in synced_endpoints if plan.full_sync[endpoint]}
+            )
+        
+        # 更新订阅的最后同步时间
+        await self._update_subscription_sync_time(subscription.id)
+        
+        # 所有入库路径（定时收集、自适应轮询、报告补齐、每日/每周收集）都经过这里，
+        # 新增的活动在入库后立即通知，之后的收集只会看到已有记录，不会重复通知
+        await self._send_activity_notifications(subscription, new_activities)
+        
+        return {
+            "subscription_id": subscription.id,
+            "repository": subscription.repository,
+            "activities": stored_activities,
+            "total_activities": len(stored_activities),
+            "new_activities": new_activities,
+            "inserted_count": len(new_activities),
+            "updated_count": len(stored_activities) - len(new_activities),
+            "collected_at": self._utc_now().isoformat(),
+            "full_sync_endpoints": sorted(
+                endpoint for endpoint, full in plan.full_sync.items() if full and plan.incremental
+            ),
+            "errors": {name: str(error) for name, error in errors.items()}
+        }
+
+    def _item_mark(self, endpoint: str, item: Dict[str, Any]) -> Tuple[Optional[datetime], str]:
+        """提取数据的水位线标记 (时间, ID)"""
+        if endpoint == "commits":
+            return self._parse_github_datetime(item["date"]), item["sha"]
+        if endpoint == "releases":
+            return self._parse_github_datetime(item["created_at"]), str(item["id"])
+        return self._parse_github_datetime(item["updated_at"]), str(item["number"])
+
+    async def _load_watermarks(self, subscription_id: int) -> Dict[str, SyncWatermark]:
+        """读取订阅各端点的水位线"""
+        async with get_db_session() as session:
+            result = await session.execute(
+                select(SyncWatermark).where(SyncWatermark.subscription_id == subscription_id)
+            )
+            return {watermark.endpoint: watermark for watermark in result.scalars().all()}
+
+    async def _save_watermarks(
+        self,
+        subscription_id: int,
+        marks: Dict[str, Optional[Tuple[datetime, str]]],
+        full_synced: set
+    ) -> None:
+        """推进水位线（只前进不后退），并记录全量对账时间"""
+        if not marks:
+            return
+        
+        now = self._utc_now()
+        async with get_db_session() as session:
+            result = await session.execute(
+                select(SyncWatermark).where(SyncWatermark.subscription_id == subscription_id)
+            )
+            existing = {watermark.endpoint: watermark for watermark in result.scalars().all()}
+            
+            for endpoint, mark in marks.items():
+                watermark = existing.get(endpoint)
+                if watermark is None:
+                    watermark = SyncWatermark(subscription_id=subscription_id, endpoint=endpoint)
+                    session.add(watermark)
+                
+                if mark is not None:
+                    mark_time, mark_id = mark
+                    if watermark.last_updated_at is None or mark_time >= self._as_utc(watermark.last_updated_at):
+                        watermark.last_updated_at = mark_time
+                        watermark.last_item_id = mark_id
+                
+                if endpoint in full_synced:
+                    watermark.last_full_sync_at = now
+            
+            await session.commit()
+
+    def _listable_states(self, include_states: List[str]) -> List[str]:
+        """过滤出列表接口支持的状态（merged 等状态由 closed 覆盖）"""
+        states = [state for state in include_states if state in self.LISTABLE_STATES]
+        return ['all'] if 'all' in states else states
+
+    async def _collect_states(
+        self,
+        include_states: List[str],
+        build_iterator: Callable[[str], AsyncIterator[Dict[str, Any]]],
+        label: str
+    ) -> List[Dict[str, Any]]:
+        """并发读取各状态的数据并按编号去重；部分状态失败时保留其余结果，全部失败时抛出异常"""
+        states = self._listable_states(include_states)
+        if not states:
+            return []
+        
+        async def _drain(state: str) -> List[Dict[str, Any]]:
+            return [item async for item in build_iterator(state)]
+        
+        results, errors = await self._gather_partial({state: _drain(state) for state in states})
+        
+        if errors and not results:
+            raise next(iter(errors.values()))
+        for state, error in errors.items():
+            logger.warning(f"获取 {label} (state={state}) 失败，已跳过: {error}")
+        
+        # 去重（同一个编号可能在不同状态查询中出现）
+        unique_items = {}
+        for state in states:
+            for item in results.get(state, []):
+                unique_items[item["number"]] = item
+        return list(unique_items.values())
+
     async def _get_recent_issues_by_state(
         self, 
         client: httpx.AsyncClient, 
@@ -490,54 +1164,12 @@ class GitHubCollector:
         include_states: List[str]
     ) -> List[Dict[str, Any]]:
         """根据状态获取最近的Issues"""
-        since = (self._utc_now() - timedelta(days=days)).isoformat()
-        all_issues = []
-        
-        for state in include_states:
-            if state not in ['open', 'closed', 'all']:
-                continue
-                
-            url = f"{self.base_url}/repos/{owner}/{repo}/issues"
-            params = {
-                "state": state,
-                "since": since,
-                "per_page": 50,
-                "sort": "updated"
-            }
-            
-            response = await client.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-            
-            for issue_data in response.json():
-                # 跳过 Pull Requests
-                if "pull_request" in issue_data:
-                    continue
-                    
-                all_issues.append({
-                    "number": issue_data["number"],
-                    "title": issue_data["title"],
-                    "body": (issue_data.get("body") or "")[:1000],  # 限制长度
-                    "state": issue_data["state"],
-                    "user": {
-                        "login": issue_data.get("user", {}).get("login", "unknown") if issue_data.get("user") else "unknown",
-                        "avatar_url": issue_data.get("user", {}).get("avatar_url", "") if issue_data.get("user") else ""
-                    },
-                    "labels": [label["name"] for label in issue_data.get("labels", [])],
-                    "assignees": [assignee["login"] for assignee in issue_data.get("assignees", [])],
-                    "milestone": issue_data.get("milestone", {}).get("title", "") if issue_data.get("milestone") else "",
-                    "comments": issue_data.get("comments", 0),
-                    "created_at": issue_data["created_at"],
-                    "updated_at": issue_data["updated_at"],
-                    "closed_at": issue_data.get("closed_at"),
-                    "html_url": issue_data["html_url"]
-                })
-        
-        # 去重（同一个issue可能在不同状态查询中出现）
-        unique_issues = {}
-        for issue in all_issues:
-            unique_issues[issue["number"]] = issue
-        
-        return list(unique_issues.values())
+        since = self._window_start(days)
+        return await self._collect_states(
+            include_states,
+            lambda state: self._iter_recent_issues(client, owner, repo, since, state),
+            f"{owner}/{repo} issues"
+        )
 
     async def _get_recent_pull_requests_by_state(
         self, 
@@ -548,61 +1180,19 @@ class GitHubCollector:
         include_states: List[str]
     ) -> List[Dict[str, Any]]:
         """根据状态获取最近的Pull Requests"""
-        cutoff_date = self._utc_now() - timedelta(days=days)
-        all_prs = []
-        
-        for state in include_states:
-            if state not in ['open', 'closed', 'all']:
-                continue
-                
-            url = f"{self.base_url}/repos/{owner}/{repo}/pulls"
-            params = {
-                "state": state,
-                "per_page": 50,
-                "sort": "updated",
-                "direction": "desc"
-            }
-            
-            response = await client.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-            
-            for pr_data in response.json():
-                updated_at = self._parse_github_datetime(pr_data["updated_at"])
-                if updated_at < cutoff_date:
-                    continue
-                    
-                all_prs.append({
-                    "number": pr_data["number"],
-                    "title": pr_data["title"],
-                    "body": (pr_data.get("body") or "")[:1000],
-                    "state": pr_data["state"],
-                    "user": {
-                        "login": pr_data.get("user", {}).get("login", "unknown") if pr_data.get("user") else "unknown",
-                        "avatar_url": pr_data.get("user", {}).get("avatar_url", "") if pr_data.get("user") else ""
-                    },
-                    "labels": [label["name"] for label in pr_data.get("labels", [])],
-                    "assignees": [assignee["login"] for assignee in pr_data.get("assignees", [])],
-                    "milestone": pr_data.get("milestone", {}).get("title", "") if pr_data.get("milestone") else "",
-                    "comments": pr_data.get("comments", 0),
-                    "commits": pr_data.get("commits", 0),
-                    "additions": pr_data.get("additions", 0),
-                    "deletions": pr_data.get("deletions", 0),
-                    "changed_files": pr_data.get("changed_files", 0),
-                    "merged": pr_data.get("merged", False),
-                    "merged_at": pr_data.get("merged_at"),
-                    "draft": pr_data.get("draft", False),
-                    "created_at": pr_data["created_at"],
-                    "updated_at": pr_data["updated_at"],
-                    "closed_at": pr_data.get("closed_at"),
-                    "html_url": pr_data["html_url"]
-                })
-        
-        # 去重
-        unique_prs = {}
-        for pr in all_prs:
-            unique_prs[pr["number"]] = pr
-        
-        return list(unique_prs.values())
+        since = self._window_start(days)
+        return await self._collect_states(
+            include_states,
+            lambda state: self._iter_recent_pull_requests(client, owner, repo, since, state),
+            f"{owner}/{repo} pull requests"
+        )
+
+    async def _store_in_batches(self, activities: List[Dict]) -> List[Dict]:
+        """分批写入活动记录，避免单个事务过大"""
+        stored: List[Dict] = []
+        for offset in range(0, len(activities), self.STORE_BATCH_SIZE):
+            stored.extend(await self._store_activities(activities[offset:offset + self.STORE_BATCH_SIZE]))
+        return stored
 
     def _convert_commits_to_activities(self, commits: List[Dict], subscription_id: int) -> List[Dict]:
         """将提交数据转换为活动记录"""
@@ -641,7 +1231,8 @@ class GitHubCollector:
                 "comments_count": issue.get("comments", 0),
                 "state": issue["state"],
                 "github_created_at": self._parse_github_datetime(issue["created_at"]),
-                "github_updated_at": self._parse_github_datetime(issue["updated_at"])
+                "github_updated_at": self._parse_github_datetime(issue["updated_at"]),
+                "github_closed_at": self._parse_github_datetime(issue.get("closed_at"))
             })
         return activities
 
@@ -665,8 +1256,15 @@ class GitHubCollector:
                 "state": pr["state"],
                 "is_draft": pr.get("draft", False),
                 "is_merged": pr.get("merged", False),
+                # REST 列表接口不返回提交数和行数（为 0），GraphQL 和 Webhook 载荷中有完整数据
+                "commits_count": pr.get("commits", 0),
+                "additions": pr.get("additions", 0),
+                "deletions": pr.get("deletions", 0),
+                "changed_files": pr.get("changed_files", 0),
                 "github_created_at": self._parse_github_datetime(pr["created_at"]),
-                "github_updated_at": self._parse_github_datetime(pr["updated_at"])
+                "github_updated_at": self._parse_github_datetime(pr["updated_at"]),
+                "github_closed_at": self._parse_github_datetime(pr.get("closed_at")),
+                "github_merged_at": self._parse_github_datetime(pr.get("merged_at"))
             })
         return activities
 
@@ -689,50 +1287,186 @@ class GitHubCollector:
         return activities
 
     async def _store_activities(self, activities: List[Dict]) -> List[Dict]:
-        """存储活动数据到数据库"""
+        """
+        批量写入活动记录（按唯一键 upsert）
+        
+        GitHub 更新时间未变化的记录直接跳过；返回新增和有变化的记录，inserted 标记是否为新增。
+        新增/更新以写入语句的实际结果为准，Webhook 与轮询并发写入同一条记录时只有一方记为新增
+        """
         if not activities:
             return []
-            
+        
+        # 同一批次中重复的记录保留最后一条
+        rows: Dict[Tuple, Dict] = {}
+        for activity_data in activities:
+            rows[tuple(activity_data[key] for key in self.ACTIVITY_KEY)] = self._activity_row(activity_data)
+        
         async with get_db_session() as session:
-            stored_activities = []
+            dialect = session.bind.dialect.name
+            if dialect == "sqlite":
+                # SQLite 无法从 upsert 结果区分新增和更新：先取得写锁再查询，并发写入串行执行，查询结果不会过期
+                await session.execute(text("BEGIN IMMEDIATE"))
+            existing = await self._load_existing_activities(session, list(rows))
             
-            for activity_data in activities:
-                # 检查是否已存在
-                existing = await session.execute(
-                    select(RepositoryActivity).where(
-                        RepositoryActivity.subscription_id == activity_data["subscription_id"],
-                        RepositoryActivity.activity_type == activity_data["activity_type"],
-                        RepositoryActivity.activity_id == activity_data["activity_id"]
-                    )
+            inserted = [key for key in rows if key not in existing]
+            updated = [
+                key for key, (_, updated_at) in existing.items()
+                if key in rows and self._activity_changed(updated_at, rows[key]["github_updated_at"])
+            ]
+            if not inserted and not updated:
+                return []
+            
+            changed = [rows[key] for key in inserted + updated]
+            if dialect in ("sqlite", "postgresql"):
+                ids, inserted_keys = await self._upsert_activities(session, dialect, changed, set(inserted))
+            else:
+                ids = await self._write_activities(
+                    session,
+                    [rows[key] for key in inserted],
+                    existing,
+                    [rows[key] for key in updated]
                 )
-                existing = existing.scalar_one_or_none()
-                
-                if existing:
-                    # 更新现有记录
-                    for key, value in activity_data.items():
-                        if hasattr(existing, key):
-                            setattr(existing, key, value)
-                    stored_activities.append(existing)
-                else:
-                    # 创建新记录
-                    activity = RepositoryActivity(**activity_data)
-                    session.add(activity)
-                    stored_activities.append(activity)
+                inserted_keys = set(inserted)
             
+            # 新增记录计入每日汇总，与活动记录在同一事务中提交
+            from app.services.activity_rollup_service import activity_rollup_service
+            await activity_rollup_service.refresh(session, [rows[key] for key in inserted_keys])
             await session.commit()
-            
-            # 转换为字典格式返回
-            return [
-                {
-                    "id": activity.id,
-                    "activity_type": activity.activity_type,
-                    "title": activity.title,
-                    "author_login": activity.author_login,
-                    "created_at": activity.github_created_at.isoformat() if activity.github_created_at else None,
-                    "url": activity.url
-                }
-                for activity in stored_activities
-            ]
+        
+        await cache.invalidate(TAG_ACTIVITIES)
+        
+        return [
+            {
+                "id": ids[key],
+                "activity_type": row["activity_type"],
+                "title": row["title"],
+                "author_login": row["author_login"],
+                "created_at": row["github_created_at"].isoformat() if row["github_created_at"] else None,
+                "url": row["url"],
+                "inserted": key in inserted_keys
+            }
+            for key, row in ((key, rows[key]) for key in inserted + updated)
+            if key in ids
+        ]
+
+    def _activity_row(self, activity_data: Dict) -> Dict:
+        """补全缺省列，使同一条 INSERT 语句中各行的列一致"""
+        row = {}
+        for column in RepositoryActivity.__table__.columns:
+            if column.name == "id":
+                continue
+            if column.name in activity_data:
+                row[column.name] = activity_data[column.name]
+            elif column.default is not None and column.default.is_scalar:
+                row[column.name] = column.default.arg
+            elif column.default is not None and column.default.is_callable:
+                row[column.name] = column.default.arg(None)
+            else:
+                row[column.name] = None
+        return row
+
+    def _activity_changed(self, stored_at: Optional[datetime], updated_at: Optional[datetime]) -> bool:
+        """比较 GitHub 更新时间判断记录是否有变化"""
+        if stored_at is None or updated_at is None:
+            return True
+        return self._as_utc(stored_at) != self._as_utc(updated_at)
+
+    async def _load_existing_activities(self, session, keys: List[Tuple]) -> Dict[Tuple, Tuple[int, Optional[datetime]]]:
+        """一次查询批次中已存在的记录，返回 唯一键 -> (ID, GitHub更新时间)"""
+        result = await session.execute(
+            select(
+                RepositoryActivity.id,
+                RepositoryActivity.subscription_id,
+                RepositoryActivity.activity_type,
+                RepositoryActivity.activity_id,
+                RepositoryActivity.github_updated_at
+            ).where(
+                RepositoryActivity.subscription_id.in_({key[0] for key in keys}),
+                RepositoryActivity.activity_type.in_({key[1] for key in keys}),
+                RepositoryActivity.activity_id.in_({key[2] for key in keys})
+            )
+        )
+        wanted = set(keys)
+        existing = {}
+        for activity_id, subscription_id, activity_type, github_id, updated_at in result.all():
+            key = (subscription_id, activity_type, github_id)
+            if key in wanted:
+                existing[key] = (activity_id, updated_at)
+        return existing
+
+    async def _upsert_activities(
+        self,
+        session,
+        dialect: str,
+        rows: List[Dict],
+        inserted: Set[Tuple]
+    ) -> Tuple[Dict[Tuple, int], Set[Tuple]]:
+        """
+        INSERT ... ON CONFLICT DO UPDATE，返回 (唯一键 -> ID, 新增记录的唯一键)
+
+        PostgreSQL 由 RETURNING (xmax = 0) 给出每行是否为本语句插入；SQLite 在写锁下查询，
+        沿用调用方查询得到的新增集合 inserted
+        """
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        
+        stmt = insert(RepositoryActivity)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(self.ACTIVITY_KEY),
+            set_={
+                name: stmt.excluded[name]
+                for name in rows[0]
+                if name not in self.ACTIVITY_KEY and name != "created_at"
+            },
+            # 与并发写入（如 Webhook）竞争时，同样跳过没有变化的记录
+            where=RepositoryActivity.github_updated_at.is_distinct_from(stmt.excluded.github_updated_at)
+        )
+        
+        returning = [
+            RepositoryActivity.id,
+            RepositoryActivity.subscription_id,
+            RepositoryActivity.activity_type,
+            RepositoryActivity.activity_id
+        ]
+        if dialect == "postgresql":
+            # 新插入的行 xmax 为 0，冲突后更新的行 xmax 为当前事务ID
+            returning.append(literal_column("xmax = 0", Boolean))
+        
+        result = await session.execute(stmt.returning(*returning), rows)
+        
+        returned = result.all()
+        ids = {(row[1], row[2], row[3]): row[0] for row in returned}
+        if dialect == "postgresql":
+            return ids, {(row[1], row[2], row[3]) for row in returned if row[4]}
+        return ids, {key for key in inserted if key in ids}
+
+    async def _write_activities(
+        self,
+        session,
+        inserted: List[Dict],
+        existing: Dict[Tuple, Tuple[int, Optional[datetime]]],
+        updated: List[Dict]
+    ) -> Dict[Tuple, int]:
+        """不支持 ON CONFLICT 的数据库：批量插入新记录，按主键批量更新变化的记录"""
+        ids: Dict[Tuple, int] = {}
+        
+        if updated:
+            params = []
+            for row in updated:
+                key = tuple(row[name] for name in self.ACTIVITY_KEY)
+                params.append({**row, "id": existing[key][0]})
+                ids[key] = existing[key][0]
+            await session.execute(update(RepositoryActivity), params)
+        
+        new_activities = [RepositoryActivity(**row) for row in inserted]
+        session.add_all(new_activities)
+        await session.flush()
+        for activity in new_activities:
+            ids[(activity.subscription_id, activity.activity_type, activity.activity_id)] = activity.id
+        
+        return ids
 
     async def _update_subscription_sync_time(self, subscription_id: int) -> None:
         """更新订阅的最后同步时间"""
@@ -742,9 +1476,9 @@ class GitHubCollector:
                 subscription.last_sync_at = self._utc_now()
                 await session.commit()
 
-    async def _send_activity_notifications(self, subscription: Subscription, data: Dict[str, Any]) -> None:
-        """发送活动通知"""
-        if not data.get("activities"):
+    async def _send_activity_notifications(self, subscription: Subscription, new_activities: List[Dict]) -> None:
+        """发送活动通知（只通知新增的活动，已有记录的更新不重复通知）"""
+        if not new_activities:
             return
             
         try:
@@ -753,7 +1487,7 @@ class GitHubCollector:
             notification_service = NotificationService()
             
             # 为每个新活动发送通知
-            for activity in data["activities"]:
+            for activity in new_activities:
                 activity_data = {
                     "activity_type": activity["activity_type"],
                     "activity_title": activity["title"],
@@ -777,5 +1511,5 @@ class GitHubCollector:
         
     async def get_repository_info(self, owner: str, repo: str) -> Dict[str, Any]:
         """获取仓库基本信息（公开方法）"""
-        async with httpx.AsyncClient() as client:
+        async with self._get_client() as client:
             return await self._get_repository_info(client, owner, repo) 
\ No newline at end of file
@@ -0,0 +1,428 @@
+"""
+GitHub GraphQL 批量收集器
+一次 GraphQL 请求通过别名子查询同时获取多个仓库的基本信息、最近的 Issues、Pull Requests、
+发布和默认分支提交历史；未取完的连接按游标继续分页。
+解析结果与 REST 收集器的 _parse_* 输出结构一致，可直接复用 _convert_*_to_activities。
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from loguru import logger
+
+from app.core.config import get_settings
+from app.collectors.rate_limiter import RateLimitGovernor, rate_limit_governor
+
+
+# 支持的连接类型
+CONNECTIONS = ("commits", "issues", "pull_requests", "releases")
+
+# 订阅状态到 GraphQL 枚举的映射（REST 的 closed 包含已合并的 PR）
+ISSUE_STATES = {"open": ["OPEN"], "closed": ["CLOSED"], "all": ["OPEN", "CLOSED"]}
+PULL_REQUEST_STATES = {
+    "open": ["OPEN"],
+    "closed": ["CLOSED", "MERGED"],
+    "merged": ["MERGED"],
+    "all": ["OPEN", "CLOSED", "MERGED"]
+}
+
+REPOSITORY_FIELDS = """
+      name
+      nameWithOwner
+      description
+      url
+      primaryLanguage { name }
+      stargazerCount
+      forkCount
+      watchers { totalCount }
+      openIssues: issues(states: OPEN) { totalCount }
+      createdAt
+      updatedAt
+      pushedAt
+      defaultBranchRef { name }
+      repositoryTopics(first: 20) { nodes { topic { name } } }
+      licenseInfo { name }
+      diskUsage"""
+
+PAGE_INFO = "pageInfo { hasNextPage endCursor }"
+
+ACTOR_FIELDS = "author { login avatarUrl }"
+
+LABEL_FIELDS = """
+          labels(first: 20) { nodes { name } }
+          assignees(first: 10) { nodes { login } }
+          milestone { title }
+          comments { totalCount }"""
+
+
+@dataclass
+class RepositoryTarget:
+    """批量查询中的单个仓库"""
+    key: Any
+    owner: str
+    name: str
+    since: Dict[str, datetime]
+    connections: Tuple[str, ...] = CONNECTIONS
+    states: List[str] = field(default_factory=lambda: ["open", "closed"])
+    release_limit: int = 10
+
+    @property
+    def full_name(self) -> str:
+        return f"{self.owner}/{self.name}"
+
+
+@dataclass
+class RepositoryBatchResult:
+    """单个仓库的批量查询结果"""
+    target: RepositoryTarget
+    repository: Optional[Dict[str, Any]] = None
+    items: Dict[str, List[Dict[str, Any]]] = field(default_factory=lambda: {name: [] for name in CONNECTIONS})
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class GraphQLError(Exception):
+    """GraphQL 请求整体失败"""
+
+
+class GraphQLBatchCollector:
+    """GitHub GraphQL 批量收集器"""
+
+    def __init__(self, governor: Optional[RateLimitGovernor] = None):
+        self.settings = get_settings()
+        self.url = self.settings.github.graphql_url
+        self.max_pages = self.settings.github.max_pages
+        self.governor = governor or rate_limit_governor
+        self.headers = {
+            "Accept": "application/json",
+            "User-Agent": "GitHub-Sentinel/1.0"
+        }
+
+        # 统计信息
+        self.total_queries = 0
+        self.total_repositories = 0
+
+    async def fetch(self, client: httpx.AsyncClient, targets: List[RepositoryTarget]) -> List[RepositoryBatchResult]:
+        """批量获取多个仓库的数据；单个仓库出错只影响该仓库，请求整体失败时抛出 GraphQLError"""
+        results = [RepositoryBatchResult(target) for target in targets]
+        # 待查询项：(仓库下标, {连接: 游标}, 是否包含仓库基本信息)
+        pending: List[Tuple[int, Dict[str, Optional[str]], bool]] = [
+            (index, {name: None for name in target.connections if name in CONNECTIONS}, True)
+            for index, target in enumerate(targets)
+        ]
+        self.total_repositories += len(targets)
+
+        pages = 0
+        while pending:
+            if pages >= self.max_pages:
+                logger.warning(f"GraphQL 分页数达到上限 {self.max_pages}，停止读取 {len(pending)} 个仓库的后续数据")
+                break
+
+            query, variables = self._build_query(targets, pending)
+            data, alias_errors = await self._execute(client, query, variables)
+            pages += 1
+
+            next_pending = []
+            for index, cursors, with_info in pending:
+                alias = f"r{index}"
+                result = results[index]
+                node = data.get(alias)
+                if node is None:
+                    result.error = alias_errors.get(alias, f"仓库不存在或无权访问: {result.target.full_name}")
+                    continue
+
+                if with_info:
+                    result.repository = self._parse_repository(node)
+
+                next_cursors = {}
+                for name in cursors:
+                    cursor = self._consume(name, node, result)
+                    if cursor:
+                        next_cursors[name] = cursor
+                if next_cursors:
+                    next_pending.append((index, next_cursors, False))
+
+            pending = next_pending
+
+        return results
+
+    def _build_query(
+        self,
+        targets: List[RepositoryTarget],
+        pending: List[Tuple[int, Dict[str, Optional[str]], bool]]
+    ) -> Tuple[str, Dict[str, Any]]:
+        """为待查询项生成带别名的查询语句和变量"""
+        declarations = []
+        selections = []
+        variables: Dict[str, Any] = {}
+
+        for index, cursors, with_info in pending:
+            target = targets[index]
+            declarations += [f"$o{index}: String!", f"$n{index}: String!"]
+            variables[f"o{index}"] = target.owner
+            variables[f"n{index}"] = target.name
+
+            fields = [REPOSITORY_FIELDS] if with_info else []
+            for name, cursor in cursors.items():
+                after_var = f"a{index}_{name}"
+                declarations.append(f"${after_var}: String")
+                variables[after_var] = cursor
+                fields.append(self._connection_fields(name, index, target, after_var, declarations, variables))
+
+            selections.append(
+                f"  r{index}: repository(owner: $o{index}, name: $n{index}) {{{''.join(fields)}\n  }}"
+            )
+
+        query = f"query Batch({', '.join(declarations)}) {{\n" + "\n".join(selections) + "\n}"
+        return query, variables
+
+    def _connection_fields(
+        self,
+        name: str,
+        index: int,
+        target: RepositoryTarget,
+        after_var: str,
+        declarations: List[str],
+        variables: Dict[str, Any]
+    ) -> str:
+        """生成单个连接的查询片段"""
+        since = target.since[name].astimezone(timezone.utc).isoformat()
+
+        if name == "commits":
+            declarations.append(f"$s{index}: GitTimestamp")
+            variables[f"s{index}"] = since
+            return f"""
+      defaultBranchRef {{
+        target {{
+          ... on Commit {{
+            history(first: 100, since: $s{index}, after: ${after_var}) {{
+              {PAGE_INFO}
+              nodes {{ oid message url author {{ name email date user {{ login }} }} }}
+            }}
+          }}
+        }}
+      }}"""
+
+        if name == "issues":
+            declarations.append(f"$t{index}: DateTime")
+            variables[f"t{index}"] = since
+            states = self._states(ISSUE_STATES, target.states)
+            return f"""
+      issues(first: 100, after: ${after_var}, orderBy: {{field: UPDATED_AT, direction: DESC}}, filterBy: {{since: $t{index}, states: [{states}]}}) {{
+        {PAGE_INFO}
+        nodes {{
+          number title body state url createdAt updatedAt closedAt
+          {ACTOR_FIELDS}{LABEL_FIELDS}
+        }}
+      }}"""
+
+        if name == "pull_requests":
+            states = self._states(PULL_REQUEST_STATES, target.states)
+            return f"""
+      pullRequests(first: 50, after: ${after_var}, states: [{states}], orderBy: {{field: UPDATED_AT, direction: DESC}}) {{
+        {PAGE_INFO}
+        nodes {{
+          number title body state url createdAt updatedAt closedAt
+          isDraft merged mergedAt additions deletions changedFiles
+          commits {{ totalCount }}
+          {ACTOR_FIELDS}{LABEL_FIELDS}
+        }}
+      }}"""
+
+        return f"""
+      releases(first: {min(target.release_limit, 100)}, after: ${after_var}, orderBy: {{field: CREATED_AT, direction: DESC}}) {{
+        {PAGE_INFO}
+        nodes {{
+          databaseId tagName name description isDraft isPrerelease url createdAt publishedAt
+          {ACTOR_FIELDS}
+        }}
+      }}"""
+
+    def _states(self, mapping: Dict[str, List[str]], states: List[str]) -> str:
+        values: List[str] = []
+        for state in states:
+            for value in mapping.get(state, []):
+                if value not in values:
+                    values.append(value)
+        return ", ".join(values or mapping["all"])
+
+    async def _execute(
+        self,
+        client: httpx.AsyncClient,
+        query: str,
+        variables: Dict[str, Any]
+    ) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """发送 GraphQL 请求，返回 (data, 按别名归类的错误)"""
+        response = await self.governor.request(
+            client,
+            "POST",
+            self.url,
+            resource="graphql",
+            headers=self.headers,
+            json={"query": query, "variables": variables}
+        )
+        response.raise_for_status()
+        self.total_queries += 1
+
+        body = response.json()
+        data = body.get("data")
+        errors = body.get("errors") or []
+
+        alias_errors: Dict[str, str] = {}
+        for error in errors:
+            path = error.get("path") or []
+            if path:
+                alias_errors.setdefault(str(path[0]), error.get("message", "未知错误"))
+
+        if data is None:
+            messages = "; ".join(error.get("message", "未知错误") for error in errors)
+            raise GraphQLError(f"GraphQL 请求失败: {messages or '响应中没有数据'}")
+
+        return data, alias_errors
+
+    def _consume(self, name: str, node: Dict[str, Any], result: RepositoryBatchResult) -> Optional[str]:
+        """解析连接中的数据并追加到结果，返回需要继续读取的游标"""
+        target = result.target
+        since = target.since[name]
+        items = result.items[name]
+
+        if name == "commits":
+            branch = node.get("defaultBranchRef") or {}
+            connection = (branch.get("target") or {}).get("history")
+        elif name == "pull_requests":
+            connection = node.get("pullRequests")
+        else:
+            connection = node.get(name)
+        if not connection:
+            # 空仓库没有默认分支等情况
+            return None
+
+        reached_end = False
+        for item in connection.get("nodes") or []:
+            if name == "commits":
+                items.append(self._parse_commit(item))
+            elif name == "issues":
+                items.append(self._parse_issue(item))
+            elif name == "pull_requests":
+                # 该连接不支持 since 过滤，按 updated 倒序遇到早于 since 的数据即停止
+                if _parse_datetime(item["updatedAt"]) < since:
+                    reached_end = True
+                    break
+                items.append(self._parse_pull_request(item))
+            else:
+                if len(items) >= target.release_limit or _parse_datetime(item["createdAt"]) < since:
+                    reached_end = True
+                    break
+                items.append(self._parse_release(item))
+
+        page_info = connection.get("pageInfo") or {}
+        if reached_end or not page_info.get("hasNextPage"):
+            return None
+        if name == "releases" and len(items) >= target.release_limit:
+            return None
+        return page_info.get("endCursor")
+
+    def _parse_repository(self, node: Dict[str, Any]) -> Dict[str, Any]:
+        """解析仓库基本信息（与 REST _get_repository_info 结构一致）"""
+        return {
+            "name": node["name"],
+            "full_name": node["nameWithOwner"],
+            "description": node.get("description") or "",
+            "html_url": node["url"],
+            "language": (node.get("primaryLanguage") or {}).get("name", ""),
+            "stargazers_count": node["stargazerCount"],
+            "forks_count": node["forkCount"],
+            "watchers_count": node["watchers"]["totalCount"],
+            "open_issues_count": node["openIssues"]["totalCount"],
+            "created_at": node["createdAt"],
+            "updated_at": node["updatedAt"],
+            "pushed_at": node["pushedAt"],
+            "default_branch": (node.get("defaultBranchRef") or {}).get("name", ""),
+            "topics": [topic["topic"]["name"] for topic in node["repositoryTopics"]["nodes"]],
+            "license": (node.get("licenseInfo") or {}).get("name", ""),
+            "size": node["diskUsage"]
+        }
+
+    def _parse_commit(self, node: Dict[str, Any]) -> Dict[str, Any]:
+        author = node.get("author") or {}
+        return {
+            "sha": node["oid"],
+            "message": node["message"],
+            "author": {
+                "name": author.get("name", ""),
+                "email": author.get("email", ""),
+                "login": (author.get("user") or {}).get("login", "")
+            },
+            "date": author.get("date"),
+            "html_url": node["url"]
+        }
+
+    def _parse_issue(self, node: Dict[str, Any]) -> Dict[str, Any]:
+        author = node.get("author") or {}
+        return {
+            "number": node["number"],
+            "title": node["title"],
+            "body": (node.get("body") or "")[:1000],
+            "state": node["state"].lower(),
+            "user": {
+                "login": author.get("login", "unknown"),
+                "avatar_url": author.get("avatarUrl", "")
+            },
+            "labels": [label["name"] for label in node["labels"]["nodes"]],
+            "assignees": [assignee["login"] for assignee in node["assignees"]["nodes"]],
+            "milestone": (node.get("milestone") or {}).get("title", ""),
+            "comments": node["comments"]["totalCount"],
+            "created_at": node["createdAt"],
+            "updated_at": node["updatedAt"],
+            "closed_at": node.get("closedAt"),
+            "html_url": node["url"]
+        }
+
+    def _parse_pull_request(self, node: Dict[str, Any]) -> Dict[str, Any]:
+        pull_request = self._parse_issue(node)
+        pull_request.update({
+            # REST 中已合并的 PR 状态为 closed
+            "state": "closed" if node["state"] == "MERGED" else node["state"].lower(),
+            "commits": node["commits"]["totalCount"],
+            "additions": node.get("additions", 0),
+            "deletions": node.get("deletions", 0),
+            "changed_files": node.get("changedFiles", 0),
+            "merged": node.get("merged", False),
+            "merged_at": node.get("mergedAt"),
+            "draft": node.get("isDraft", False)
+        })
+        return pull_request
+
+    def _parse_release(self, node: Dict[str, Any]) -> Dict[str, Any]:
+        author = node.get("author") or {}
+        return {
+            "id": node["databaseId"],
+            "tag_name": node["tagName"],
+            "name": node.get("name") or "",
+            "body": (node.get("description") or "")[:1000],
+            "draft": node["isDraft"],
+            "prerelease": node["isPrerelease"],
+            "author": {
+                "login": author.get("login", "ghost"),
+                "avatar_url": author.get("avatarUrl", "")
+            },
+            "created_at": node["createdAt"],
+            "published_at": node.get("publishedAt"),
+            "html_url": node["url"]
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取批量查询统计信息"""
+        return {
+            "total_queries": self.total_queries,
+            "total_repositories": self.total_repositories
+        }
+
+
+def _parse_datetime(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
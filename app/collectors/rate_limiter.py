@@ -0,0 +1,200 @@
+"""
+GitHub API 速率限制调度器
+所有收集器请求统一经过此处：从令牌池中选择配额最充足的令牌、按令牌桶和
+X-RateLimit 响应头控制节奏、遇到速率限制或服务端错误时按指数退避（带抖动）重试
+"""
+
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import httpx
+from loguru import logger
+
+from app.core.config import get_settings
+from app.collectors.token_pool import DEFAULT_RESOURCE, RateBudget, TokenPool, TokenState
+
+
+class RateLimitGovernor:
+    """GitHub 请求调度器"""
+
+    RETRYABLE_STATUS = {500, 502, 503, 504}
+
+    def __init__(self, token_pool: Optional[TokenPool] = None):
+        settings = get_settings()
+        github_config = settings.github
+
+        self.max_requests_per_hour = github_config.max_requests_per_hour
+        self.retry_attempts = github_config.retry_attempts
+        self.retry_delay = github_config.retry_delay
+        self.reserve = github_config.rate_limit_reserve
+        self.token_pool = token_pool or TokenPool.from_settings()
+
+        # 统计信息
+        self.total_requests = 0
+        self.throttled_requests = 0
+        self.throttled_seconds = 0.0
+        self.retries = 0
+        self.rate_limited_responses = 0
+
+    async def request(
+        self,
+        client: httpx.AsyncClient,
+        method: str,
+        url: str,
+        resource: str = DEFAULT_RESOURCE,
+        token_headers: Optional[Callable[[TokenState], Awaitable[Dict[str, str]]]] = None,
+        **kwargs: Any
+    ) -> httpx.Response:
+        """经调度器发送请求，自动选择令牌，必要时等待并重试
+
+        resource 为请求计入的 GitHub 速率限制资源（REST 为 core，GraphQL 为 graphql），
+        令牌选择、限速和暂停都按该资源的预算进行。token_headers 在每次发送前按选中的令牌
+        返回附加请求头（如该令牌缓存的条件请求校验值），重试换用其它令牌时会重新获取
+        """
+        base_headers = dict(kwargs.pop("headers", None) or {})
+        attempt = 0
+        while True:
+            state = await self.token_pool.select(resource)
+            await self._pace(state, resource)
+
+            headers = dict(base_headers)
+            if token_headers is not None:
+                headers.update(await token_headers(state))
+            if state.auth_header:
+                headers["Authorization"] = state.auth_header
+
+            try:
+                response = await client.request(method, url, headers=headers, **kwargs)
+            except httpx.TransportError as e:
+                if attempt >= self.retry_attempts:
+                    raise
+                delay = self._backoff_delay(attempt)
+                logger.warning(f"GitHub 请求网络错误，{delay:.1f}秒后重试 ({attempt + 1}/{self.retry_attempts}): {e}")
+                self.retries += 1
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+
+            self.total_requests += 1
+            state.total_requests += 1
+            response_resource = state.update_from_response(response, resource)
+            budget = state.budget(response_resource)
+
+            if attempt < self.retry_attempts:
+                delay = self._retry_after(budget, response)
+                if delay is not None:
+                    self.rate_limited_responses += 1
+                    state.rate_limited_responses += 1
+                    logger.warning(
+                        f"GitHub 速率限制 ({response.status_code}, {state.name})，"
+                        f"{delay:.1f}秒内暂停该令牌后重试 ({attempt + 1}/{self.retry_attempts}): {url}"
+                    )
+                    # 主配额耗尽只暂停该资源，二级速率限制暂停整个令牌；
+                    # 令牌池会切换到其它可用令牌，或等待最早恢复的令牌
+                    primary = response.headers.get("X-RateLimit-Remaining") == "0"
+                    state.park(time.time() + delay, response_resource if primary else None)
+                    self.retries += 1
+                    attempt += 1
+                    continue
+
+                if response.status_code in self.RETRYABLE_STATUS:
+                    delay = self._backoff_delay(attempt)
+                    logger.warning(
+                        f"GitHub 服务端错误 ({response.status_code})，{delay:.1f}秒后重试 "
+                        f"({attempt + 1}/{self.retry_attempts}): {url}"
+                    )
+                    self.retries += 1
+                    await asyncio.sleep(delay)
+                    attempt += 1
+                    continue
+
+            return response
+
+    async def _pace(self, state: TokenState, resource: str = DEFAULT_RESOURCE) -> None:
+        """请求前限速：令牌自身的令牌桶 + 服务端对应资源的剩余预算"""
+        waited = await state.bucket.acquire()
+
+        budget = state.budget(resource)
+        delay = self._budget_delay(budget)
+        if delay > 0:
+            logger.info(
+                f"GitHub Token {state.name} {resource} 剩余配额 {budget.remaining}，等待 {delay:.1f} 秒以避免耗尽"
+            )
+            await asyncio.sleep(delay)
+            waited += delay
+
+        if waited > 0:
+            self.throttled_requests += 1
+            self.throttled_seconds += waited
+
+    def _budget_delay(self, budget: RateBudget) -> float:
+        """剩余预算低于保留值时，把剩余请求均匀分布到重置时间之前"""
+        if budget.remaining is None or budget.reset_at is None:
+            return 0.0
+
+        now = time.time()
+        if now >= budget.reset_at:
+            # 窗口已重置，等待下一个响应刷新预算
+            budget.remaining = None
+            return 0.0
+
+        if budget.remaining > self.reserve:
+            return 0.0
+
+        window = budget.reset_at - now
+        if budget.remaining <= 0:
+            return window + 1
+        return window / (budget.remaining + 1)
+
+    def _retry_after(self, budget: RateBudget, response: httpx.Response) -> Optional[float]:
+        """判断响应是否为速率限制，返回重试前需等待的秒数"""
+        if response.status_code not in (403, 429):
+            return None
+
+        headers = response.headers
+
+        retry_after = headers.get("Retry-After")
+        if retry_after:
+            try:
+                return float(retry_after) + random.uniform(0, 1)
+            except ValueError:
+                pass
+
+        if headers.get("X-RateLimit-Remaining") == "0" and budget.reset_at:
+            return max(0.0, budget.reset_at - time.time()) + random.uniform(1, 3)
+
+        if response.status_code == 429 or "rate limit" in response.text.lower():
+            # 二级速率限制未给出 Retry-After 时，GitHub 建议至少等待一分钟
+            return self.retry_delay + random.uniform(0, 5)
+
+        # 普通的 403（权限不足等）不重试
+        return None
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """指数退避（带随机抖动），上限为 retry_delay"""
+        ceiling = min(self.retry_delay, 2 ** attempt)
+        return random.uniform(ceiling / 2, ceiling)
+
+    def get_status(self) -> Dict[str, Any]:
+        """获取当前预算、各令牌用量和调度统计"""
+        tokens = self.token_pool.get_status()
+        return {
+            "token_count": len(self.token_pool),
+            "available_tokens": len([t for t in tokens if not t["parked"]]),
+            "remaining": self.token_pool.total_remaining(),
+            "graphql_remaining": self.token_pool.total_remaining("graphql"),
+            "reserve": self.reserve,
+            "max_requests_per_hour": self.max_requests_per_hour,
+            "tokens": tokens,
+            "total_requests": self.total_requests,
+            "throttled_requests": self.throttled_requests,
+            "throttled_seconds": round(self.throttled_seconds, 1),
+            "retries": self.retries,
+            "rate_limited_responses": self.rate_limited_responses
+        }
+
+
+# 全局调度器实例
+rate_limit_governor = RateLimitGovernor()
@@ -0,0 +1,158 @@
+"""
+GitHub 条件请求缓存
+保存 ETag / Last-Modified 校验值，命中 304 时直接返回缓存的解析结果
+"""
+
+import hashlib
+import json
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+from loguru import logger
+from sqlalchemy import delete
+
+from app.core.config import get_settings
+from app.core.database import get_db_session
+from app.models.github_cache import GitHubResponseCache
+from app.utils.timezone_utils import beijing_now
+
+
+@dataclass
+class CachedResponse:
+    """缓存的响应条目"""
+    etag: Optional[str]
+    last_modified: Optional[str]
+    payload: Any
+    next_url: Optional[str] = None
+
+
+class ResponseCache:
+    """两级校验缓存：进程内 LRU + 数据库持久化"""
+
+    def __init__(self, max_entries: Optional[int] = None):
+        settings = get_settings()
+        self.enabled = settings.github.conditional_requests
+        self.max_entries = max_entries or settings.github.response_cache_size
+        self.ttl_hours = settings.github.response_cache_ttl_hours
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(url: str, params: Optional[Dict[str, Any]] = None, token: Optional[str] = None) -> str:
+        """
+        根据 URL、查询参数和令牌指纹生成缓存键
+
+        ETag 和响应内容随 Authorization 变化（私有仓库、令牌权限不同），每个令牌的条目分开保存
+        """
+        normalized = json.dumps(
+            {"url": url, "params": sorted((params or {}).items()), "token": token},
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    async def get(self, cache_key: str) -> Optional[CachedResponse]:
+        """获取缓存条目，内存未命中时回源数据库"""
+        if not self.enabled:
+            return None
+
+        entry = self._entries.get(cache_key)
+        if entry is not None:
+            self._entries.move_to_end(cache_key)
+            return entry
+
+        try:
+            async with get_db_session() as session:
+                row = await session.get(GitHubResponseCache, cache_key)
+                if row is None:
+                    return None
+                entry = CachedResponse(row.etag, row.last_modified, row.payload, row.next_url)
+        except Exception as e:
+            logger.debug(f"读取条件请求缓存失败: {e}")
+            return None
+
+        self._remember(cache_key, entry)
+        return entry
+
+    async def set(
+        self,
+        cache_key: str,
+        url: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        payload: Any,
+        next_url: Optional[str] = None
+    ) -> None:
+        """写入缓存条目（无校验值的响应不缓存）"""
+        if not self.enabled or not (etag or last_modified):
+            return
+
+        self._remember(cache_key, CachedResponse(etag, last_modified, payload, next_url))
+
+        try:
+            async with get_db_session() as session:
+                row = await session.get(GitHubResponseCache, cache_key)
+                if row is None:
+                    row = GitHubResponseCache(cache_key=cache_key, url=url[:1000])
+                    session.add(row)
+                row.etag = etag
+                row.last_modified = last_modified
+                row.payload = payload
+                row.next_url = next_url[:1000] if next_url else None
+                # 内容未变化时 onupdate 不会触发，显式刷新写入时间，避免被当作过期条目清理
+                row.updated_at = beijing_now()
+        except Exception as e:
+            logger.debug(f"写入条件请求缓存失败: {e}")
+
+    async def prune(self, max_age_hours: Optional[int] = None) -> int:
+        """
+        删除超过保留时间未写入的数据库缓存条目
+
+        缓存键包含 since 参数（全量窗口每小时变化，增量同步每次变化），旧参数的条目不会再被读取；
+        仍在使用的条目被清理后只是下次多一次完整请求
+        """
+        if not self.enabled:
+            return 0
+
+        cutoff = beijing_now() - timedelta(hours=max_age_hours or self.ttl_hours)
+        async with get_db_session() as session:
+            result = await session.execute(
+                delete(GitHubResponseCache).where(GitHubResponseCache.updated_at < cutoff)
+            )
+            removed = result.rowcount or 0
+
+        if removed:
+            logger.info(f"清理过期的条件请求缓存: {removed} 条")
+        return removed
+
+    def record(self, hit: bool) -> None:
+        """记录 304 命中情况"""
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "not_modified_hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total * 100, 1) if total else 0.0
+        }
+
+    def _remember(self, cache_key: str, entry: CachedResponse) -> None:
+        self._entries[cache_key] = entry
+        self._entries.move_to_end(cache_key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+# 全局缓存实例
+response_cache = ResponseCache()
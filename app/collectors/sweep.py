@@ -0,0 +1,75 @@
+"""
+并发收集调度
+以全局并发上限和单个 owner 并发上限同时收集多个订阅，结果按完成顺序逐个产出
+"""
+
+import asyncio
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, Optional
+
+from loguru import logger
+
+from app.core.config import get_settings
+from app.models.subscription import Subscription
+
+
+@dataclass
+class SweepResult:
+    """单个订阅的收集结果"""
+    subscription: Subscription
+    data: Optional[Dict[str, Any]] = None
+    error: Optional[BaseException] = None
+    duration: float = 0.0
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class CollectionSweep:
+    """有界并发的订阅收集器
+
+    请求本身仍经过 RateLimitGovernor 限速，这里只限制同时进行的仓库数量：
+    全局上限避免连接池和数据库被打满，owner 上限避免对同一组织集中请求触发二级速率限制。
+    """
+
+    def __init__(self, max_concurrency: Optional[int] = None, per_owner_concurrency: Optional[int] = None):
+        settings = get_settings()
+        self.max_concurrency = max(1, max_concurrency or settings.schedule.collection_concurrency)
+        self.per_owner_concurrency = max(1, per_owner_concurrency or settings.schedule.collection_per_owner_concurrency)
+
+    async def run(
+        self,
+        subscriptions: Iterable[Subscription],
+        collect: Callable[[Subscription], Awaitable[Dict[str, Any]]]
+    ) -> AsyncIterator[SweepResult]:
+        """并发执行 collect，按完成顺序产出每个订阅的结果；单个失败不影响其它订阅"""
+        global_semaphore = asyncio.Semaphore(self.max_concurrency)
+        owner_semaphores: Dict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(self.per_owner_concurrency)
+        )
+
+        async def _run_one(subscription: Subscription) -> SweepResult:
+            owner = subscription.repository.split('/')[0].lower()
+            # 先占 owner 槽位再占全局槽位，避免排队中的同 owner 任务占用全局并发
+            async with owner_semaphores[owner]:
+                async with global_semaphore:
+                    started = time.monotonic()
+                    try:
+                        data = await collect(subscription)
+                        return SweepResult(subscription, data=data, duration=time.monotonic() - started)
+                    except Exception as e:
+                        logger.error(f"收集订阅 {subscription.id} ({subscription.repository}) 数据失败: {e}")
+                        return SweepResult(subscription, error=e, duration=time.monotonic() - started)
+
+        tasks = [asyncio.create_task(_run_one(subscription)) for subscription in subscriptions]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield await finished
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
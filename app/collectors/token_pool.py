@@ -0,0 +1,243 @@
+"""
+GitHub Token 池
+管理多个访问令牌（PAT 或 GitHub App 安装令牌），按剩余配额分配请求，
+配额按资源（core / graphql 等）分别记录，某个资源耗尽时只暂停该资源的请求
+"""
+
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import httpx
+from loguru import logger
+
+from app.core.config import get_settings
+
+# REST 接口默认计入的资源（GraphQL 请求计入 graphql）
+DEFAULT_RESOURCE = "core"
+# 本地令牌桶默认容量：短时间内的连续请求过多会触发 GitHub 二级速率限制
+DEFAULT_BURST_SIZE = 10
+
+
+class TokenBucket:
+    """异步令牌桶"""
+
+    def __init__(self, capacity: int, refill_per_second: float):
+        self.capacity = max(1, capacity)
+        self.refill_per_second = refill_per_second
+        self.tokens = float(self.capacity)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_second)
+
+    async def acquire(self) -> float:
+        """获取一个令牌，返回等待的秒数"""
+        waited = 0.0
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.refill_per_second
+                waited += delay
+                await asyncio.sleep(delay)
+
+
+@dataclass
+class RateBudget:
+    """服务端报告的单个资源预算（GitHub 按 core / graphql / search 等资源分别计数）"""
+    limit: Optional[int] = None
+    remaining: Optional[int] = None
+    reset_at: Optional[float] = None
+    # 该资源暂停使用直到此时间（epoch 秒）
+    parked_until: Optional[float] = None
+
+    def is_parked(self, now: float) -> bool:
+        if self.parked_until is not None and now >= self.parked_until:
+            self.parked_until = None
+            self.remaining = None
+        return self.parked_until is not None
+
+
+class TokenState:
+    """单个访问令牌的配额状态"""
+
+    def __init__(
+        self,
+        name: str,
+        token: Optional[str],
+        max_requests_per_hour: int,
+        burst_size: int = DEFAULT_BURST_SIZE
+    ):
+        self.name = name
+        self.token = token
+        self.max_requests_per_hour = max_requests_per_hour
+        # 只允许小规模突发，之后按每小时配额均匀放行
+        self.bucket = TokenBucket(
+            capacity=min(burst_size, max_requests_per_hour),
+            refill_per_second=max_requests_per_hour / 3600
+        )
+
+        # 服务端报告的预算，按 X-RateLimit-Resource 分别记录
+        self.budgets: Dict[str, RateBudget] = {}
+
+        # 整个令牌暂停使用直到此时间（epoch 秒），用于不区分资源的二级速率限制
+        self.parked_until: Optional[float] = None
+
+        # 统计信息
+        self.total_requests = 0
+        self.rate_limited_responses = 0
+
+    @property
+    def auth_header(self) -> Optional[str]:
+        return f"token {self.token}" if self.token else None
+
+    @property
+    def fingerprint(self) -> str:
+        """令牌指纹（不可逆），区分不同令牌的条件请求缓存条目"""
+        if not self.token:
+            return "anonymous"
+        return hashlib.sha256(self.token.encode("utf-8")).hexdigest()[:16]
+
+    @property
+    def hint(self) -> str:
+        """脱敏后的令牌标识"""
+        if not self.token:
+            return "anonymous"
+        if len(self.token) <= 8:
+            return "***"
+        return f"{self.token[:4]}…{self.token[-4:]}"
+
+    def budget(self, resource: str = DEFAULT_RESOURCE) -> RateBudget:
+        return self.budgets.setdefault(resource, RateBudget())
+
+    def is_parked(self, now: Optional[float] = None, resource: str = DEFAULT_RESOURCE) -> bool:
+        """令牌整体或指定资源的预算是否暂停使用"""
+        now = now or time.time()
+        if self.parked_until is not None and now >= self.parked_until:
+            self.parked_until = None
+        budget_parked = self.budget(resource).is_parked(now)
+        return self.parked_until is not None or budget_parked
+
+    def available_at(self, resource: str = DEFAULT_RESOURCE) -> float:
+        """指定资源恢复可用的时间（epoch 秒）"""
+        return max(self.parked_until or 0.0, self.budget(resource).parked_until or 0.0)
+
+    def effective_remaining(self, now: Optional[float] = None, resource: str = DEFAULT_RESOURCE) -> int:
+        """用于排序的剩余配额，未知或已过重置时间时视为满额"""
+        now = now or time.time()
+        budget = self.budget(resource)
+        if budget.remaining is None or (budget.reset_at is not None and now >= budget.reset_at):
+            return budget.limit or self.max_requests_per_hour
+        return budget.remaining
+
+    def update_from_response(self, response: httpx.Response, resource: str = DEFAULT_RESOURCE) -> str:
+        """根据响应头更新对应资源的剩余预算，返回响应所属的资源"""
+        headers = response.headers
+        resource = headers.get("X-RateLimit-Resource", resource)
+        budget = self.budget(resource)
+        try:
+            if "X-RateLimit-Limit" in headers:
+                budget.limit = int(headers["X-RateLimit-Limit"])
+            if "X-RateLimit-Remaining" in headers:
+                budget.remaining = int(headers["X-RateLimit-Remaining"])
+            if "X-RateLimit-Reset" in headers:
+                budget.reset_at = float(headers["X-RateLimit-Reset"])
+        except ValueError:
+            logger.debug(f"无法解析速率限制响应头: {dict(headers)}")
+
+        if budget.remaining == 0 and budget.reset_at:
+            self.park(budget.reset_at, resource)
+        return resource
+
+    def park(self, until: float, resource: Optional[str] = None) -> None:
+        """暂停使用该令牌直到指定时间；指定资源时只暂停该资源的请求"""
+        target = self.budget(resource) if resource else self
+        if target.parked_until is None or until > target.parked_until:
+            target.parked_until = until
+            wait = max(0, int(until - time.time()))
+            logger.warning(f"GitHub Token {self.name} 触发速率限制（{resource or '全部资源'}），暂停使用 {wait} 秒")
+
+    def get_status(self) -> Dict[str, Any]:
+        def _iso(ts: Optional[float]) -> Optional[str]:
+            return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat() if ts else None
+
+        now = time.time()
+        return {
+            "name": self.name,
+            "hint": self.hint,
+            "budgets": {
+                resource: {
+                    "limit": budget.limit,
+                    "remaining": budget.remaining,
+                    "reset_at": _iso(budget.reset_at),
+                    "parked": budget.is_parked(now),
+                    "parked_until": _iso(budget.parked_until)
+                }
+                for resource, budget in self.budgets.items()
+            },
+            "parked": self.is_parked(now),
+            "parked_until": _iso(self.parked_until),
+            "local_bucket_available": int(self.bucket.tokens),
+            "total_requests": self.total_requests,
+            "rate_limited_responses": self.rate_limited_responses
+        }
+
+
+class TokenPool:
+    """访问令牌池"""
+
+    def __init__(self, tokens: List[str], max_requests_per_hour: int, burst_size: int = DEFAULT_BURST_SIZE):
+        unique_tokens = list(dict.fromkeys(t for t in tokens if t))
+        self.tokens = [
+            TokenState(f"token-{index + 1}", token, max_requests_per_hour, burst_size)
+            for index, token in enumerate(unique_tokens)
+        ]
+        if not self.tokens:
+            # 未配置令牌时以匿名身份访问（GitHub 限额 60 次/小时）
+            self.tokens = [TokenState("anonymous", None, min(max_requests_per_hour, 60), burst_size)]
+
+    @classmethod
+    def from_settings(cls) -> "TokenPool":
+        settings = get_settings()
+        github_config = settings.github
+        return cls(
+            [github_config.token, *github_config.tokens],
+            github_config.max_requests_per_hour,
+            github_config.burst_size
+        )
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    async def select(self, resource: str = DEFAULT_RESOURCE) -> TokenState:
+        """选择指定资源剩余配额最多的可用令牌；全部耗尽时等待最早的恢复时间"""
+        while True:
+            now = time.time()
+            available = [state for state in self.tokens if not state.is_parked(now, resource)]
+            if available:
+                return max(available, key=lambda state: state.effective_remaining(now, resource))
+
+            earliest = min(state.available_at(resource) for state in self.tokens)
+            wait = max(0.0, earliest - now) + 1
+            logger.warning(f"所有 GitHub Token 的 {resource} 配额均已耗尽，等待 {wait:.0f} 秒")
+            await asyncio.sleep(wait)
+
+    def total_remaining(self, resource: str = DEFAULT_RESOURCE) -> Optional[int]:
+        known = [
+            state.budgets[resource].remaining for state in self.tokens
+            if resource in state.budgets and state.budgets[resource].remaining is not None
+        ]
+        return sum(known) if known else None
+
+    def get_status(self) -> List[Dict[str, Any]]:
+        return [state.get_status() for state in self.tokens]
@@ -6,17 +6,17 @@
 from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from datetime import datetime, timedelta
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime, timedelta, timezone
 import jwt
 import os
 
-from app.core.database import get_db
+from app.core.cache import MISSING, MemoryCacheBackend
+from app.core.database import get_db_session
 from app.models.subscription import User
 from app.core.logger import get_logger
-from app.core.config import get_settings
+from app.utils.single_flight import SingleFlight
 
 logger = get_logger(__name__)
 
@@ -25,19 +25,19 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# 令牌声明和用户记录的缓存时间（秒）与最大条目数
+AUTH_CACHE_TTL = 60
+AUTH_CACHE_SIZE = 1024
+
+DEMO_EMAIL = "demo@example.com"
+
 # HTTP Bearer 认证方案
 bearer_scheme = HTTPBearer()
 
-# 创建同步数据库引擎（用于认证）
-def get_sync_db_session():
-    """获取同步数据库会话（用于认证功能）"""
-    settings = get_settings()
-    # 将异步URL转换为同步URL
-    sync_url = settings.database.url.replace("aiosqlite:///", "sqlite:///").replace("asyncpg://", "postgresql://")
-    
-    engine = create_engine(sync_url)
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    return SessionLocal()
+# 全局认证缓存：令牌 -> 声明，用户名/邮箱 -> 用户（按用户ID打标签，用户更新时失效）
+_claims_cache = MemoryCacheBackend(max_entries=AUTH_CACHE_SIZE)
+_user_cache = MemoryCacheBackend(max_entries=AUTH_CACHE_SIZE)
+_user_flight = SingleFlight()
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -47,7 +47,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    
+
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
@@ -60,164 +60,133 @@ def verify_token(token: str) -> Optional[dict]:
         username: str = payload.get("sub")
         if username is None:
             return None
-        return {"username": username}
+        return {"username": username, "exp": payload.get("exp")}
     except jwt.PyJWTError:
         return None
 
 
-async def get_user_from_token(token: str, db: Session) -> Optional[User]:
-    """从令牌获取用户"""
-    try:
-        # 使用同步数据库会话
-        sync_db = get_sync_db_session()
-        
-        try:
-            # 开发环境简化认证
-            if token == "demo_token":
-                user = sync_db.query(User).filter(User.email == "demo@example.com").first()
-                if not user:
-                    user = User(
-                        email="demo@example.com",
-                        full_name="Demo User"
-                    )
-                    sync_db.add(user)
-                    sync_db.commit()
-                    sync_db.refresh(user)
-                return user
-            
-            payload = verify_token(token)
-            if payload is None:
-                # 如果token验证失败，在开发环境下仍然返回demo用户
-                logger.warning("令牌验证失败，使用demo用户")
-                user = sync_db.query(User).filter(User.email == "demo@example.com").first()
-                if not user:
-                    user = User(
-                        email="demo@example.com",
-                        full_name="Demo User"
-                    )
-                    sync_db.add(user)
-                    sync_db.commit()
-                    sync_db.refresh(user)
-                return user
-            
-            username = payload.get("username")
-            if username is None:
-                return None
-            
-            # 从数据库获取用户
-            user = sync_db.query(User).filter(User.username == username).first()
-            return user
-        finally:
-            sync_db.close()
-            
-    except Exception as e:
-        logger.error(f"从令牌获取用户失败: {e}")
-        # 开发环境容错处理
-        try:
-            sync_db = get_sync_db_session()
-            try:
-                user = sync_db.query(User).filter(User.email == "demo@example.com").first()
-                if not user:
-                    user = User(
-                        email="demo@example.com",
-                        full_name="Demo User"
-                    )
-                    sync_db.add(user)
-                    sync_db.commit()
-                    sync_db.refresh(user)
-                return user
-            finally:
-                sync_db.close()
-        except Exception:
-            return None
+async def get_token_claims(token: str) -> Optional[dict]:
+    """验证JWT令牌（缓存解码结果，缓存时间不超过令牌剩余有效期）"""
+    claims = await _claims_cache.get(token)
+    if claims is not MISSING:
+        return claims
 
+    claims = verify_token(token)
+    if claims is None:
+        return None
+
+    ttl = AUTH_CACHE_TTL
+    if claims.get("exp") is not None:
+        ttl = min(ttl, int(claims["exp"] - datetime.now(timezone.utc).timestamp()))
+    if ttl > 0:
+        await _claims_cache.set(token, claims, ttl)
+    return claims
+
+
+def _user_tag(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+async def _get_user_by(field: str, value: str) -> Optional[User]:
+    """按唯一字段查询用户（带缓存；并发的相同查询只访问一次数据库）"""
+    key = f"{field}:{value}"
+    user = await _user_cache.get(key)
+    if user is not MISSING:
+        return user
+
+    async def load() -> Optional[User]:
+        async with get_db_session() as session:
+            result = await session.execute(select(User).where(getattr(User, field) == value))
+            found = result.scalar_one_or_none()
+        if found is not None:
+            await _user_cache.set(key, found, AUTH_CACHE_TTL, tags=[_user_tag(found.id)])
+        return found
+
+    return await _user_flight.do(key, load)
+
+
+async def invalidate_user_cache(user_id: int) -> None:
+    """用户信息更新或删除后失效缓存的用户记录"""
+    await _user_cache.invalidate_tags([_user_tag(user_id)])
+
+
+async def _get_or_create_user(field: str, value: str, **defaults) -> User:
+    """获取用户，不存在时创建"""
+    user = await _get_user_by(field, value)
+    if user is not None:
+        return user
+
+    async def create() -> User:
+        async with get_db_session() as session:
+            created = User(**{field: value}, **defaults)
+            session.add(created)
+            await session.commit()
+            await session.refresh(created)
+        logger.info(f"Created user {value} for development")
+        return created
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
-    db: Session = Depends(get_db)
-) -> User:
-    """获取当前认证用户"""
     try:
-        # 验证令牌
-        token = credentials.credentials
-        
+        await _user_flight.do(f"create:{field}:{value}", create)
+    except IntegrityError:
+        # 其它进程已创建同一用户
+        pass
+    return await _get_user_by(field, value)
+
+
+async def get_or_create_demo_user() -> User:
+    """获取或创建demo用户"""
+    return await _get_or_create_user(
+        "email",
+        DEMO_EMAIL,
+        username="demo_user",
+        full_name="Demo User",
+        hashed_password="demo_password",
+        is_active=True,
+        is_superuser=False
+    )
+
+
+async def get_user_from_token(token: str, db=None) -> Optional[User]:
+    """从令牌获取用户"""
+    try:
         # 开发环境简化认证
         if token == "demo_token":
-            user = db.query(User).filter(User.email == "demo@example.com").first()
-            if not user:
-                user = User(
-                    email="demo@example.com",
-                    name="Demo User",
-                    github_username="demo_user"
-                )
-                db.add(user)
-                db.commit()
-                db.refresh(user)
-            return user
-        
-        payload = verify_token(token)
-        
+            return await get_or_create_demo_user()
+
+        payload = await get_token_claims(token)
         if payload is None:
             # 如果token验证失败，在开发环境下仍然返回demo用户
             logger.warning("令牌验证失败，使用demo用户")
-            user = db.query(User).filter(User.email == "demo@example.com").first()
-            if not user:
-                user = User(
-                    email="demo@example.com",
-                    name="Demo User", 
-                    github_username="demo_user"
-                )
-                db.add(user)
-                db.commit()
-                db.refresh(user)
-            return user
-        
+            return await get_or_create_demo_user()
+
         username = payload.get("username")
         if username is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="令牌中缺少用户信息",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        
+            return None
+
         # 从数据库获取用户
-        user = db.query(User).filter(User.name == username).first()
-        if user is None:
-            # 如果用户不存在，创建demo用户
-            user = User(
-                email="demo@example.com",
-                name="Demo User",
-                github_username="demo_user"
-            )
-            db.add(user)
-            db.commit()
-            db.refresh(user)
-        
-        return user
-        
-    except HTTPException:
-        raise
+        return await _get_user_by("username", username)
+
     except Exception as e:
-        logger.error(f"获取当前用户失败: {e}")
+        logger.error(f"从令牌获取用户失败: {e}")
         # 开发环境容错处理
         try:
-            user = db.query(User).filter(User.email == "demo@example.com").first()
-            if not user:
-                user = User(
-                    email="demo@example.com",
-                    name="Demo User",
-                    github_username="demo_user"
-                )
-                db.add(user)
-                db.commit()
-                db.refresh(user)
-            return user
+            return await get_or_create_demo_user()
         except Exception:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="认证失败",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+            return None
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)
+) -> User:
+    """获取当前认证用户"""
+    user = await get_user_from_token(credentials.credentials)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="认证失败",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
 
 
 async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
@@ -240,17 +209,17 @@ async def get_current_superuser(current_user: User = Depends(get_current_user))
     return current_user
 
 
-def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
+async def authenticate_user(username: str, password: str) -> Optional[User]:
     """验证用户凭据"""
     try:
-        user = db.query(User).filter(User.username == username).first()
+        user = await _get_user_by("username", username)
         if not user:
             return None
-        
+
         # 这里应该验证密码哈希，现在临时实现
         if user.hashed_password != f"hashed_{password}":
             return None
-        
+
         return user
     except Exception as e:
         logger.error(f"用户认证失败: {e}")
@@ -258,30 +227,23 @@ def authenticate_user(db: Session, username: str, password: str) -> Optional[Use
 
 
 # 可选的简化认证（用于开发环境）
-async def get_current_user_optional(
-    db: Session = Depends(get_db)
-) -> Optional[User]:
+async def get_current_user_optional() -> Optional[User]:
     """可选的用户认证，用于开发环境"""
     try:
         # 在开发环境中，可以返回默认用户
         # 生产环境中应该移除此功能
         if os.getenv("ENVIRONMENT") == "development":
             # 创建或获取默认用户
-            default_user = db.query(User).filter(User.username == "admin").first()
-            if not default_user:
-                default_user = User(
-                    username="admin",
-                    email="admin@example.com",
-                    full_name="管理员",
-                    hashed_password="hashed_admin",
-                    is_active=True,
-                    is_superuser=True
-                )
-                db.add(default_user)
-                db.commit()
-                db.refresh(default_user)
-            return default_user
+            return await _get_or_create_user(
+                "username",
+                "admin",
+                email="admin@example.com",
+                full_name="管理员",
+                hashed_password="hashed_admin",
+                is_active=True,
+                is_superuser=True
+            )
         return None
     except Exception as e:
         logger.error(f"获取默认用户失败: {e}")
-        return None 
\ No newline at end of file
+        return None
@@ -0,0 +1,216 @@
+"""
+报告文件存储
+报告正文按 SHA-256 内容寻址，gzip 压缩后分目录保存在本地磁盘（{root}/ab/cd/<sha256>.gz），
+内容相同的报告共用同一个文件。下载时直接从磁盘按块读取压缩文件，客户端支持 gzip 时原样返回；
+安装 brotli 后，首次以 br 编码下载时由 gzip 文件转码生成同目录的 <sha256>.br，之后直接返回
+"""
+
+import asyncio
+import gzip
+import hashlib
+import os
+import re
+import tempfile
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Iterable, Optional, Tuple
+
+import aiofiles
+
+try:
+    import brotli
+except ImportError:  # 可选依赖：未安装时只提供 gzip 编码
+    brotli = None
+
+from app.core.config import get_settings
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+BLOB_SUFFIX = ".gz"
+CHUNK_SIZE = 64 * 1024
+# br 文件只在首次请求时生成一次，使用最高压缩级别
+BROTLI_QUALITY = 11
+# 不在存储中的内容每次请求都要压缩，使用较低的压缩级别
+BROTLI_INLINE_QUALITY = 5
+
+_DIGEST_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+async def _run_in_thread(func, *args):
+    """在线程池中执行阻塞的文件操作"""
+    return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+
+@dataclass
+class BlobInfo:
+    """已保存内容的元数据"""
+    digest: str       # 原始内容的 SHA-256（十六进制）
+    path: str         # 相对存储目录的路径
+    size: int         # 原始内容字节数
+    stored_size: int  # 压缩后字节数
+    created: bool     # 是否新写入（False 表示已有相同内容）
+
+
+class BlobStore:
+    """内容寻址的本地压缩文件存储"""
+
+    def __init__(self, root: Optional[str] = None, compress_level: Optional[int] = None):
+        # 未指定时使用配置（每次读取，便于测试和运行时修改配置）
+        self._root = root
+        self._compress_level = compress_level
+
+    @property
+    def root(self) -> Path:
+        return Path(self._root or get_settings().storage.path)
+
+    @property
+    def compress_level(self) -> int:
+        return self._compress_level or get_settings().storage.compress_level
+
+    @staticmethod
+    def relative_path(digest: str) -> str:
+        """内容哈希对应的相对路径（按哈希前两级分目录，避免单个目录文件过多）"""
+        if not _DIGEST_PATTERN.match(digest or ""):
+            raise ValueError(f"无效的内容哈希: {digest}")
+        return f"{digest[:2]}/{digest[2:4]}/{digest}{BLOB_SUFFIX}"
+
+    def path_for(self, digest: str) -> Path:
+        return self.root / self.relative_path(digest)
+
+    def exists(self, digest: str) -> bool:
+        return self.path_for(digest).is_file()
+
+    def stored_size(self, digest: str) -> int:
+        """压缩文件的字节数"""
+        return self.path_for(digest).stat().st_size
+
+    @property
+    def encodings(self) -> Tuple[str, ...]:
+        """可直接提供的内容编码（按优先级排列）"""
+        return ("br", "gzip") if brotli is not None else ("gzip",)
+
+    async def encoded_path(self, digest: str, encoding: str) -> Path:
+        """指定内容编码的文件路径（gzip 为存储文件本身，br 文件在首次请求时生成）"""
+        path = self.path_for(digest)
+        if encoding == "gzip":
+            return path
+        if encoding != "br" or brotli is None:
+            raise ValueError(f"不支持的内容编码: {encoding}")
+
+        br_path = path.with_suffix(".br")
+        if not br_path.is_file():
+            await _run_in_thread(self._write_brotli, path, br_path)
+        return br_path
+
+    def _write_brotli(self, path: Path, br_path: Path) -> None:
+        data = brotli.compress(gzip.decompress(path.read_bytes()), quality=BROTLI_QUALITY)
+        self._write_atomic(br_path, data)
+
+    async def encode(self, data: bytes, encoding: str) -> bytes:
+        """按内容编码压缩不在存储中的内容（正文仍保存在数据库中的旧报告下载时使用）"""
+        if encoding == "gzip":
+            return await _run_in_thread(lambda: gzip.compress(data, compresslevel=self.compress_level, mtime=0))
+        if encoding != "br" or brotli is None:
+            raise ValueError(f"不支持的内容编码: {encoding}")
+        return await _run_in_thread(lambda: brotli.compress(data, quality=BROTLI_INLINE_QUALITY))
+
+    async def put(self, data: bytes) -> BlobInfo:
+        """保存内容，已存在相同内容时直接复用"""
+        return await _run_in_thread(self._put, data)
+
+    def _put(self, data: bytes) -> BlobInfo:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path_for(digest)
+
+        if path.is_file():
+            # 刷新修改时间，避免刚被复用的文件被清理
+            os.utime(path)
+            return BlobInfo(digest, self.relative_path(digest), len(data), path.stat().st_size, False)
+
+        # 固定 mtime，相同内容压缩结果也相同
+        compressed = gzip.compress(data, compresslevel=self.compress_level, mtime=0)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._write_atomic(path, compressed)
+
+        logger.debug(f"报告文件已保存: {digest} ({len(data)} -> {len(compressed)} 字节)")
+        return BlobInfo(digest, self.relative_path(digest), len(data), len(compressed), True)
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes) -> None:
+        """先写临时文件再原子替换，读取方不会看到写了一半的文件"""
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    async def get(self, digest: str) -> bytes:
+        """读取并解压完整内容"""
+        path = self.path_for(digest)
+        return await _run_in_thread(lambda: gzip.decompress(path.read_bytes()))
+
+    @staticmethod
+    async def iter_file(path: Path, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+        """按块读取文件"""
+        async with aiofiles.open(path, "rb") as f:
+            while True:
+                chunk = await f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    def iter_compressed(self, digest: str, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+        """按块读取压缩文件（gzip 格式，可直接作为 Content-Encoding: gzip 的响应体）"""
+        return self.iter_file(self.path_for(digest), chunk_size)
+
+    async def iter_decompressed(self, digest: str, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+        """按块读取并解压内容，不会把完整内容读入内存"""
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        async for chunk in self.iter_compressed(digest, chunk_size):
+            data = decompressor.decompress(chunk)
+            if data:
+                yield data
+        tail = decompressor.flush()
+        if tail:
+            yield tail
+
+    async def collect_garbage(self, referenced: Iterable[str], min_age: int = 3600) -> int:
+        """
+        删除没有被引用的文件
+
+        只删除修改时间早于 min_age 秒的文件：正在生成的报告可能已写入文件但尚未提交数据库记录
+        """
+        return await _run_in_thread(self._collect_garbage, set(referenced), min_age)
+
+    def _collect_garbage(self, referenced: set, min_age: int) -> int:
+        if not self.root.is_dir():
+            return 0
+
+        cutoff = time.time() - min_age
+        removed = 0
+        # 同时清理 br 文件和写入中断遗留的临时文件
+        for path in self.root.glob("*/*/*"):
+            digest = path.name.partition(".")[0]
+            if digest in referenced:
+                continue
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+
+# 全局报告文件存储实例
+blob_store = BlobStore()
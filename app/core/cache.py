@@ -0,0 +1,352 @@
+"""
+接口结果缓存模块
+为读多写少的接口和服务函数缓存计算结果：进程内 TTL/LRU 后端或 Redis 后端；
+并发未命中时只回源一次（single-flight），写入路径按标签主动失效相关条目
+"""
+
+import functools
+import inspect
+import json
+import pickle
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Sequence, Set, Tuple
+
+from loguru import logger
+
+from app.utils.single_flight import SingleFlight
+from .config import get_settings
+
+
+# 缓存标签：写入对应数据后失效带有该标签的缓存条目
+TAG_ACTIVITIES = "activities"
+TAG_REPORTS = "reports"
+TAG_SUBSCRIPTIONS = "subscriptions"
+
+# 未命中标记（缓存值本身可以是 None）
+MISSING = object()
+
+
+class CacheBackend:
+    """缓存后端接口"""
+
+    name = "base"
+
+    async def get(self, key: str) -> Any:
+        """获取缓存值，未命中返回 MISSING"""
+        raise NotImplementedError
+
+    async def set(self, key: str, value: Any, ttl: int, tags: Sequence[str] = ()) -> None:
+        raise NotImplementedError
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """删除带有任一标签的条目，返回删除的条目数"""
+        raise NotImplementedError
+
+    async def clear(self) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+    def size(self) -> Optional[int]:
+        return None
+
+
+class MemoryCacheBackend(CacheBackend):
+    """进程内 TTL + LRU 缓存（值按引用保存，调用方不应修改返回的结果）"""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any, Tuple[str, ...]]]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+        self.evictions = 0
+
+    async def get(self, key: str) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return MISSING
+
+        expires_at, value, _ = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            return MISSING
+
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: int, tags: Sequence[str] = ()) -> None:
+        self._remove(key)
+        self._entries[key] = (time.monotonic() + ttl, value, tuple(tags))
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> int:
+        removed = 0
+        for tag in tags:
+            for key in self._tags.pop(tag, ()):
+                if self._remove(key):
+                    removed += 1
+        return removed
+
+    async def clear(self) -> None:
+        self._entries.clear()
+        self._tags.clear()
+
+    def size(self) -> Optional[int]:
+        return len(self._entries)
+
+    def _remove(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+        return True
+
+
+class RedisCacheBackend(CacheBackend):
+    """Redis 缓存：多个进程共享缓存和失效；标签用集合记录其下的缓存键"""
+
+    name = "redis"
+
+    def __init__(self, client, key_prefix: str):
+        self.client = client
+        self.key_prefix = key_prefix
+
+    def _key(self, key: str) -> str:
+        return f"{self.key_prefix}:{key}"
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.key_prefix}:tag:{tag}"
+
+    async def get(self, key: str) -> Any:
+        data = await self.client.get(self._key(key))
+        if data is None:
+            return MISSING
+        return pickle.loads(data)
+
+    async def set(self, key: str, value: Any, ttl: int, tags: Sequence[str] = ()) -> None:
+        full_key = self._key(key)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.set(full_key, pickle.dumps(value), ex=ttl)
+        for tag in tags:
+            pipe.sadd(self._tag_key(tag), full_key)
+        await pipe.execute()
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> int:
+        removed = 0
+        for tag in tags:
+            tag_key = self._tag_key(tag)
+            keys = await self.client.smembers(tag_key)
+            if keys:
+                removed += await self.client.delete(*keys)
+            await self.client.delete(tag_key)
+        return removed
+
+    async def clear(self) -> None:
+        keys = [key async for key in self.client.scan_iter(match=f"{self.key_prefix}:*")]
+        if keys:
+            await self.client.delete(*keys)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+def create_cache_backend() -> CacheBackend:
+    """根据配置创建缓存后端，Redis 不可用时退回进程内缓存"""
+    settings = get_settings()
+    cache_config = settings.cache
+    redis_config = settings.redis
+
+    use_redis = cache_config.backend == "redis" or (cache_config.backend == "auto" and redis_config.enabled)
+    if use_redis:
+        try:
+            from redis import asyncio as redis_asyncio
+
+            client = redis_asyncio.Redis(
+                host=redis_config.host,
+                port=redis_config.port,
+                password=redis_config.password,
+                db=redis_config.db
+            )
+            logger.info(f"接口结果缓存使用 Redis: {redis_config.host}:{redis_config.port}/{redis_config.db}")
+            return RedisCacheBackend(client, cache_config.key_prefix)
+        except ImportError:
+            logger.warning("未安装 redis 依赖，接口结果缓存已降级为进程内缓存 (pip install redis)")
+
+    return MemoryCacheBackend(max_entries=cache_config.max_entries)
+
+
+class CacheManager:
+    """缓存入口：读穿缓存、标签失效和命中统计"""
+
+    def __init__(self, backend: Optional[CacheBackend] = None):
+        self.config = get_settings().cache
+        self._backend = backend
+        self._flight = SingleFlight()
+        # 每个标签的本进程失效次数，用于丢弃在失效之前开始计算的结果
+        self._tag_versions: Dict[str, int] = {}
+        # 统计信息
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.invalidations = 0
+        self.errors = 0
+
+    @property
+    def backend(self) -> CacheBackend:
+        if self._backend is None:
+            self._backend = create_cache_backend()
+        return self._backend
+
+    def use_backend(self, backend: CacheBackend) -> None:
+        """替换缓存后端（测试或运行时切换）"""
+        self._backend = backend
+
+    @staticmethod
+    def make_key(namespace: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """根据命名空间和参数生成缓存键"""
+        if not params:
+            return namespace
+        return f"{namespace}:{json.dumps(params, sort_keys=True, default=str)}"
+
+    async def get_or_set(
+        self,
+        key: str,
+        factory: Callable[[], Awaitable[Any]],
+        ttl: Optional[int] = None,
+        tags: Sequence[str] = ()
+    ) -> Any:
+        """读取缓存，未命中时执行 factory() 计算并写入；相同键的并发未命中只计算一次"""
+        if not self.config.enabled:
+            return await factory()
+
+        value = await self._get(key)
+        if value is not MISSING:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        return await self._flight.do(key, lambda: self._load(key, factory, ttl, tags))
+
+    async def _load(
+        self,
+        key: str,
+        factory: Callable[[], Awaitable[Any]],
+        ttl: Optional[int],
+        tags: Sequence[str]
+    ) -> Any:
+        versions = [self._tag_versions.get(tag, 0) for tag in tags]
+        value = await factory()
+
+        # 计算期间标签被失效时结果可能已过期，只返回不写入
+        if versions == [self._tag_versions.get(tag, 0) for tag in tags]:
+            try:
+                await self.backend.set(key, value, ttl or self.config.default_ttl, tags)
+                self.sets += 1
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"写入缓存失败 {key}: {e}")
+        return value
+
+    async def _get(self, key: str) -> Any:
+        try:
+            return await self.backend.get(key)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"读取缓存失败 {key}: {e}")
+            return MISSING
+
+    async def invalidate(self, *tags: str) -> int:
+        """失效带有任一标签的缓存条目；缓存故障只记录日志，不影响写入流程"""
+        for tag in tags:
+            self._tag_versions[tag] = self._tag_versions.get(tag, 0) + 1
+        self.invalidations += 1
+
+        try:
+            return await self.backend.invalidate_tags(tags)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"失效缓存标签失败 {tags}: {e}")
+            return 0
+
+    async def clear(self) -> None:
+        """清空全部缓存条目"""
+        for tag in list(self._tag_versions):
+            self._tag_versions[tag] += 1
+        await self.backend.clear()
+
+    async def close(self) -> None:
+        if self._backend is not None:
+            await self._backend.close()
+            self._backend = None
+
+    def cached(
+        self,
+        namespace: str,
+        ttl: Optional[int] = None,
+        tags: Sequence[str] = (),
+        vary: Optional[Sequence[str]] = None
+    ):
+        """
+        缓存异步函数（路由或服务方法）的返回值
+
+        Args:
+            namespace: 缓存键命名空间
+            ttl: 缓存时间（秒），默认使用 cache.default_ttl
+            tags: 失效标签
+            vary: 参与缓存键的参数名，默认为除 self/cls 外的全部参数；
+                  参数中包含会话、当前用户等对象时必须显式指定
+        """
+        def decorator(func: Callable[..., Awaitable[Any]]):
+            signature = inspect.signature(func)
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                params = {
+                    name: value
+                    for name, value in bound.arguments.items()
+                    if (name in vary if vary is not None else name not in ("self", "cls"))
+                }
+                return await self.get_or_set(
+                    self.make_key(namespace, params),
+                    lambda: func(*args, **kwargs),
+                    ttl=ttl,
+                    tags=tags
+                )
+
+            return wrapper
+
+        return decorator
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.config.enabled,
+            "backend": self.backend.name,
+            "entries": self.backend.size(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "sets": self.sets,
+            "invalidations": self.invalidations,
+            "errors": self.errors,
+            "recomputes": self._flight.get_stats()
+        }
+
+
+# 全局缓存实例
+cache = CacheManager()
@@ -28,13 +28,57 @@ class RedisConfig(BaseModel):
     enabled: bool = Field(default=False, description="是否启用Redis")
 
 
+class CacheConfig(BaseModel):
+    """接口结果缓存配置"""
+    enabled: bool = Field(default=True, description="是否启用接口结果缓存")
+    backend: str = Field(default="auto", description="缓存后端：auto（启用Redis时使用Redis，否则进程内缓存）、memory、redis")
+    default_ttl: int = Field(default=60, description="默认缓存时间（秒）")
+    max_entries: int = Field(default=1024, description="进程内缓存的最大条目数（LRU淘汰）")
+    key_prefix: str = Field(default="sentinel:cache", description="Redis 缓存键前缀")
+
+
+class StorageConfig(BaseModel):
+    """报告文件存储配置"""
+    enabled: bool = Field(default=True, description="是否将报告正文写入本地文件存储（关闭时写入数据库 content 列）")
+    path: str = Field(default="data/reports", description="报告文件存储目录")
+    compress_level: int = Field(default=6, ge=1, le=9, description="gzip 压缩级别（1-9）")
+
+
 class GitHubConfig(BaseModel):
     """GitHub API 配置"""
     token: str = Field(description="GitHub Personal Access Token")
+    tokens: List[str] = Field(default_factory=list, description="额外的访问令牌（PAT或GitHub App安装令牌），与token一起组成令牌池")
     api_url: str = Field(default="https://api.github.com", description="GitHub API URL")
-    max_requests_per_hour: int = Field(default=5000, description="每小时最大请求数")
+    max_requests_per_hour: int = Field(default=5000, description="每个令牌每小时最大请求数")
+    burst_size: int = Field(default=10, ge=1, description="每个令牌允许连续发出的突发请求数（本地令牌桶容量）")
     retry_attempts: int = Field(default=3, description="重试次数")
     retry_delay: int = Field(default=60, description="重试延迟(秒)")
+    rate_limit_reserve: int = Field(default=100, description="剩余配额低于此值时开始放慢请求节奏")
+    
+    # HTTP 连接池配置
+    http2: bool = Field(default=True, description="是否启用HTTP/2多路复用")
+    max_connections: int = Field(default=100, description="连接池最大连接数")
+    max_keepalive_connections: int = Field(default=20, description="最大保持活跃连接数")
+    keepalive_expiry: float = Field(default=30.0, description="空闲连接保持时间(秒)")
+    timeout: float = Field(default=30.0, description="请求超时时间(秒)")
+    connect_timeout: float = Field(default=10.0, description="连接超时时间(秒)")
+    
+    # 条件请求缓存配置
+    conditional_requests: bool = Field(default=True, description="是否启用ETag/Last-Modified条件请求")
+    response_cache_size: int = Field(default=2000, description="内存中保留的响应缓存条目数")
+    response_cache_ttl_hours: int = Field(default=48, ge=1, description="数据库中的响应缓存超过此时长未更新即清理（小时）")
+    max_pages: int = Field(default=10, description="单个列表接口最多读取的分页数（每页100条）")
+    event_probe: bool = Field(default=True, description="增量同步前是否先通过 Events API 探测仓库变化")
+    
+    # 收集器后端配置
+    collector_backend: str = Field(default="rest", description="收集器后端 (rest/graphql)")
+    graphql_url: str = Field(default="https://api.github.com/graphql", description="GitHub GraphQL API URL")
+    graphql_batch_size: int = Field(default=10, description="GraphQL 后端单次查询的仓库数")
+    
+    # Webhook 配置
+    webhook_secret: str = Field(default="", description="GitHub Webhook 签名密钥（为空时拒绝所有 Webhook）")
+    webhook_queue_size: int = Field(default=1000, description="待处理 Webhook 队列长度")
+    webhook_stale_hours: int = Field(default=24, description="超过此时长未收到 Webhook 时恢复正常轮询（小时）")
 
 
 class AIConfig(BaseModel):
@@ -55,6 +99,16 @@ class ScheduleSettings(BaseModel):
     daily_time: str = Field(default="09:00", description="每日执行时间")
     weekly_time: str = Field(default="09:00", description="每周执行时间")
     weekly_day: int = Field(default=1, description="每周执行日期 (1=周一)")
+    collection_concurrency: int = Field(default=10, description="同时收集的仓库数上限")
+    collection_per_owner_concurrency: int = Field(default=3, description="同一owner下同时收集的仓库数上限")
+    full_sync_interval_hours: int = Field(default=24, description="全量对账间隔（小时），其余轮询按水位线增量同步")
+    full_sync_days: int = Field(default=2, description="全量对账及首次同步回溯的天数")
+    adaptive_polling: bool = Field(default=True, description="是否按仓库活跃度自适应调整轮询间隔")
+    min_poll_interval: int = Field(default=60, description="最短轮询间隔（秒）")
+    max_poll_interval: int = Field(default=3600, description="最长轮询间隔（秒）")
+    poll_target_activities: float = Field(default=5.0, description="期望每次轮询获得的新活动数")
+    poll_ewma_alpha: float = Field(default=0.3, description="活跃度指数加权移动平均的平滑系数 (0-1)")
+    poll_batch_size: int = Field(default=50, description="每轮最多处理的到期订阅数")
 
 
 class NotificationConfig(BaseModel):
@@ -124,6 +178,8 @@ class Settings(BaseSettings):
     # 各模块配置
     database: DatabaseConfig = Field(default_factory=DatabaseConfig)
     redis: RedisConfig = Field(default_factory=RedisConfig)
+    cache: CacheConfig = Field(default_factory=CacheConfig)
+    storage: StorageConfig = Field(default_factory=StorageConfig)
     github: GitHubConfig = Field(default_factory=lambda: GitHubConfig(token=""))
     ai: AIConfig = Field(default_factory=AIConfig)
     schedule: ScheduleSettings = Field(default_factory=ScheduleSettings)
@@ -5,6 +5,7 @@
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
+from sqlalchemy import inspect, text
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import DeclarativeBase
@@ -58,10 +59,63 @@ async def init_database() -> None:
     # 创建所有表
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_ensure_columns)
+        await conn.run_sync(_ensure_indexes)
     
     logger.info("数据库初始化完成")
 
 
+def _ensure_columns(conn) -> None:
+    """补建模型中新增但数据库中缺失的列（create_all 不会修改已存在的表）
+    
+    新增的列都允许为空，已有记录取空值，之后同步或 Webhook 更新该记录时补全。
+    """
+    inspector = inspect(conn)
+    existing_tables = set(inspector.get_table_names())
+    
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if not column.nullable:
+                logger.warning(f"{table.name}.{column.name} 不允许为空，无法自动添加，请手动迁移")
+                continue
+            column_type = column.type.compile(dialect=conn.dialect)
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+            logger.info(f"已为 {table.name} 添加列 {column.name}")
+
+
+def _ensure_indexes(conn) -> None:
+    """补建模型中声明但数据库中缺失的索引（create_all 不会修改已存在的表）"""
+    inspector = inspect(conn)
+    existing_tables = set(inspector.get_table_names())
+    
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            if index.name == "uq_repository_activity":
+                _remove_duplicate_activities(conn)
+            index.create(conn)
+            logger.info(f"已为 {table.name} 创建索引 {index.name}")
+
+
+def _remove_duplicate_activities(conn) -> None:
+    """旧的逐条写入逻辑可能留下重复的活动记录，建唯一索引前保留每组中最新的一条"""
+    result = conn.execute(text(
+        "DELETE FROM repository_activities WHERE id NOT IN ("
+        "SELECT MAX(id) FROM repository_activities GROUP BY subscription_id, activity_type, activity_id)"
+    ))
+    if result.rowcount:
+        logger.warning(f"清理了 {result.rowcount} 条重复的活动记录")
+
+
 async def close_database() -> None:
     """关闭数据库连接"""
     global engine
@@ -0,0 +1,69 @@
+"""
+HTTP 客户端管理模块
+提供进程级共享的 httpx.AsyncClient，复用 TCP/TLS 连接
+"""
+
+from typing import Optional
+
+import httpx
+from loguru import logger
+
+from .config import get_settings
+
+
+# 全局共享客户端
+http_client: Optional[httpx.AsyncClient] = None
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """根据配置创建带连接池的 HTTP 客户端"""
+    settings = get_settings()
+    github_config = settings.github
+
+    limits = httpx.Limits(
+        max_connections=github_config.max_connections,
+        max_keepalive_connections=github_config.max_keepalive_connections,
+        keepalive_expiry=github_config.keepalive_expiry,
+    )
+    timeout = httpx.Timeout(
+        github_config.timeout,
+        connect=github_config.connect_timeout,
+    )
+
+    http2 = github_config.http2
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("未安装 h2 依赖，HTTP/2 已降级为 HTTP/1.1 (pip install httpx[http2])")
+            http2 = False
+
+    return httpx.AsyncClient(limits=limits, timeout=timeout, http2=http2)
+
+
+async def init_http_client() -> None:
+    """初始化全局 HTTP 客户端"""
+    global http_client
+
+    if http_client is not None and not http_client.is_closed:
+        return
+
+    http_client = create_http_client()
+    logger.info("HTTP 客户端连接池初始化完成")
+
+
+async def close_http_client() -> None:
+    """关闭全局 HTTP 客户端"""
+    global http_client
+
+    if http_client is not None:
+        await http_client.aclose()
+        http_client = None
+        logger.info("HTTP 客户端连接池已关闭")
+
+
+def get_http_client() -> Optional[httpx.AsyncClient]:
+    """获取全局 HTTP 客户端，未初始化时返回 None"""
+    if http_client is None or http_client.is_closed:
+        return None
+    return http_client
@@ -0,0 +1,29 @@
+"""
+GitHub 响应缓存模型定义
+持久化条件请求所需的 ETag / Last-Modified 校验值及解析后的响应数据
+"""
+
+from sqlalchemy import Column, String, DateTime, JSON
+
+from app.core.database import Base
+from app.utils.timezone_utils import beijing_now
+
+
+class GitHubResponseCache(Base):
+    """GitHub REST 响应校验缓存"""
+    __tablename__ = "github_response_cache"
+
+    cache_key = Column(String(64), primary_key=True, comment="缓存键（URL+参数的SHA-256）")
+    url = Column(String(1000), nullable=False, comment="请求URL")
+    etag = Column(String(200), comment="ETag 校验值")
+    last_modified = Column(String(100), comment="Last-Modified 校验值")
+    payload = Column(JSON, comment="解析后的响应数据（JSON）")
+    next_url = Column(String(1000), comment="Link 响应头中的下一页URL")
+
+    # 时间戳
+    created_at = Column(DateTime(timezone=True), default=beijing_now, comment="创建时间")
+    updated_at = Column(DateTime(timezone=True), default=beijing_now, onupdate=beijing_now, comment="更新时间")
+
+    __table_args__ = (
+        {'comment': 'GitHub 条件请求缓存'},
+    )
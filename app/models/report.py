@@ -7,7 +7,7 @@ from datetime import datetime
 from enum import Enum
 from typing import Optional
 
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -95,6 +95,15 @@ class Report(Base):
     # 关系
     user = relationship("User", back_populates="reports")
     subscriptions_included = Column(JSON, comment="包含的订阅ID列表（JSON）")
+    
+    __table_args__ = (
+        # 用户报告列表：按用户筛选、按创建时间倒序
+        Index('ix_report_user_created', 'user_id', 'created_at'),
+        # 按状态筛选的报告列表和计数
+        Index('ix_report_status_created', 'status', 'created_at'),
+        # 最近报告、按时间段统计
+        Index('ix_report_created', 'created_at'),
+    )
 
 
 class ReportTemplate(Base):
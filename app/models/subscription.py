@@ -7,7 +7,7 @@ from datetime import datetime
 from typing import Optional, List
 from enum import Enum
 
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Date, DateTime, Boolean, Text, ForeignKey, UniqueConstraint, Float, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -104,6 +104,9 @@ class Subscription(Base):
     # 关系
     user = relationship("User", back_populates="subscriptions")
     activities = relationship("RepositoryActivity", back_populates="subscription", cascade="all, delete-orphan")
+    watermarks = relationship("SyncWatermark", back_populates="subscription", cascade="all, delete-orphan")
+    polling_state = relationship("PollingState", back_populates="subscription", uselist=False, cascade="all, delete-orphan")
+    daily_rollups = relationship("ActivityDailyRollup", back_populates="subscription", cascade="all, delete-orphan")
 
 
 class RepositoryActivity(Base):
@@ -114,7 +117,7 @@ class RepositoryActivity(Base):
     subscription_id = Column(Integer, ForeignKey("subscriptions.id"), nullable=False, comment="订阅ID")
     
     # 活动基本信息
-    activity_type = Column(String(50), nullable=False, index=True, comment="活动类型")
+    activity_type = Column(String(50), nullable=False, comment="活动类型")
     activity_id = Column(String(100), nullable=False, comment="活动ID（GitHub ID）")
     title = Column(String(500), comment="标题")
     description = Column(Text, comment="描述")
@@ -134,6 +137,10 @@ class RepositoryActivity(Base):
     # 统计信息
     comments_count = Column(Integer, default=0, comment="评论数")
     reactions_count = Column(Integer, default=0, comment="反应数")
+    commits_count = Column(Integer, default=0, comment="提交数（PR）")
+    additions = Column(Integer, default=0, comment="新增行数（PR）")
+    deletions = Column(Integer, default=0, comment="删除行数（PR）")
+    changed_files = Column(Integer, default=0, comment="变更文件数（PR）")
     
     # 状态信息
     state = Column(String(50), comment="状态（open/closed等）")
@@ -143,6 +150,8 @@ class RepositoryActivity(Base):
     # 时间信息
     github_created_at = Column(DateTime(timezone=True), comment="GitHub创建时间")
     github_updated_at = Column(DateTime(timezone=True), comment="GitHub更新时间")
+    github_closed_at = Column(DateTime(timezone=True), comment="GitHub关闭时间")
+    github_merged_at = Column(DateTime(timezone=True), comment="GitHub合并时间（PR）")
     created_at = Column(DateTime(timezone=True), default=beijing_now, comment="本地创建时间")
     
     # 关系
@@ -150,5 +159,94 @@ class RepositoryActivity(Base):
     
     # 创建复合索引
     __table_args__ = (
+        # 入库时按此唯一键 upsert；用唯一索引而非表约束，已有数据库可在启动时补建
+        Index('uq_repository_activity', 'subscription_id', 'activity_type', 'activity_id', unique=True),
+        # 订阅活动列表：按订阅筛选、按 GitHub 创建时间倒序
+        Index('ix_activity_subscription_github_created', 'subscription_id', 'github_created_at'),
+        # 仪表板最近活动：按 GitHub 创建时间筛选和排序
+        Index('ix_activity_github_created', 'github_created_at'),
+        # 按类型统计、按类型和入库时间统计（活动趋势、热门类型）
+        Index('ix_activity_type_created', 'activity_type', 'created_at'),
+        # 按入库时间段统计活动总数、按天和类型聚合活动图表（覆盖索引）
+        Index('ix_activity_created_type', 'created_at', 'activity_type'),
         {'comment': '仓库活动记录'},
-    ) 
\ No newline at end of file
+    )
+
+
+class SyncWatermark(Base):
+    """增量同步水位线模型（每个订阅、每种活动端点一条）"""
+    __tablename__ = "sync_watermarks"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    subscription_id = Column(Integer, ForeignKey("subscriptions.id"), nullable=False, comment="订阅ID")
+    endpoint = Column(String(50), nullable=False, comment="端点（commits/issues/pull_requests/releases）")
+    
+    # 水位线
+    last_updated_at = Column(DateTime(timezone=True), comment="已同步数据的最新更新时间（UTC）")
+    last_item_id = Column(String(100), comment="最新一条数据的ID（提交SHA/编号/发布ID）")
+    
+    # 同步时间
+    last_full_sync_at = Column(DateTime(timezone=True), comment="最后一次全量对账时间")
+    updated_at = Column(DateTime(timezone=True), default=beijing_now, onupdate=beijing_now, comment="更新时间")
+    
+    # 关系
+    subscription = relationship("Subscription", back_populates="watermarks")
+    
+    __table_args__ = (
+        UniqueConstraint('subscription_id', 'endpoint', name='uq_sync_watermark_endpoint'),
+        {'comment': '增量同步水位线'},
+    )
+
+
+class ActivityDailyRollup(Base):
+    """每日活动汇总模型（每个订阅、每天、每种活动类型一条），随活动入库同步维护"""
+    __tablename__ = "activity_daily_rollups"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    subscription_id = Column(Integer, ForeignKey("subscriptions.id"), nullable=False, comment="订阅ID")
+    repository = Column(String(200), nullable=False, comment="仓库名称 (owner/repo)")
+    day = Column(Date, nullable=False, comment="日期（GitHub创建时间在配置时区下的日期）")
+    activity_type = Column(String(50), nullable=False, comment="活动类型")
+    
+    # 统计信息
+    activity_count = Column(Integer, default=0, comment="活动数")
+    author_count = Column(Integer, default=0, comment="不同作者数")
+    
+    updated_at = Column(DateTime(timezone=True), default=beijing_now, onupdate=beijing_now, comment="更新时间")
+    
+    # 关系
+    subscription = relationship("Subscription", back_populates="daily_rollups")
+    
+    __table_args__ = (
+        UniqueConstraint('subscription_id', 'repository', 'day', 'activity_type', name='uq_activity_daily_rollup'),
+        # 按日期范围汇总（活动图表、性能指标），包含活动数以便只读索引
+        Index('ix_activity_rollup_day_type', 'day', 'activity_type', 'activity_count'),
+        {'comment': '每日活动汇总'},
+    )
+
+
+class PollingState(Base):
+    """订阅的自适应轮询状态"""
+    __tablename__ = "polling_states"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    subscription_id = Column(Integer, ForeignKey("subscriptions.id"), nullable=False, unique=True, comment="订阅ID")
+    
+    # 活跃度估计
+    activity_rate = Column(Float, default=0.0, comment="新活动速率的指数加权移动平均（条/小时）")
+    last_new_activities = Column(Integer, default=0, comment="上次轮询获得的新活动数")
+    
+    # 轮询计划
+    poll_interval = Column(Integer, comment="当前轮询间隔（秒）")
+    next_poll_at = Column(DateTime(timezone=True), index=True, comment="下次轮询时间（UTC）")
+    last_polled_at = Column(DateTime(timezone=True), comment="上次轮询时间（UTC）")
+    last_webhook_at = Column(DateTime(timezone=True), comment="最近一次收到 Webhook 的时间（UTC），非空表示由 Webhook 驱动")
+    
+    updated_at = Column(DateTime(timezone=True), default=beijing_now, onupdate=beijing_now, comment="更新时间")
+    
+    # 关系
+    subscription = relationship("Subscription", back_populates="polling_state")
+    
+    __table_args__ = (
+        {'comment': '自适应轮询状态'},
+    )
@@ -0,0 +1,31 @@
+"""
+Webhook 投递记录模型定义
+按 X-GitHub-Delivery 去重，并记录每次投递的处理结果
+"""
+
+from sqlalchemy import Column, String, DateTime, Integer, Text
+
+from app.core.database import Base
+from app.utils.timezone_utils import beijing_now
+
+
+class WebhookDelivery(Base):
+    """GitHub Webhook 投递记录"""
+    __tablename__ = "webhook_deliveries"
+
+    delivery_id = Column(String(100), primary_key=True, comment="投递ID（X-GitHub-Delivery）")
+    event = Column(String(50), nullable=False, comment="事件类型（X-GitHub-Event）")
+    repository = Column(String(200), index=True, comment="仓库名称 (owner/repo)")
+
+    # 处理结果
+    status = Column(String(20), default="queued", comment="处理状态（queued/processed/ignored/failed）")
+    activities_count = Column(Integer, default=0, comment="写入的活动记录数")
+    error_message = Column(Text, comment="错误信息")
+
+    # 时间戳
+    received_at = Column(DateTime(timezone=True), default=beijing_now, comment="接收时间")
+    processed_at = Column(DateTime(timezone=True), comment="处理完成时间")
+
+    __table_args__ = (
+        {'comment': 'GitHub Webhook 投递记录'},
+    )
@@ -26,8 +26,8 @@ class ReportUpdate(BaseModel):
     status: Optional[str] = Field(None, description="报告状态")
 
 
-class ReportResponse(ReportBase):
-    """报告响应模型"""
+class ReportSummaryResponse(ReportBase):
+    """报告列表项响应模型（不含报告正文和AI分析，完整内容通过报告详情接口获取）"""
     id: int = Field(..., description="报告ID")
     user_id: int = Field(..., description="用户ID")
     description: Optional[str] = Field(None, description="报告描述")
@@ -37,8 +37,6 @@ class ReportResponse(ReportBase):
     period_start: datetime = Field(..., description="报告开始时间")
     period_end: datetime = Field(..., description="报告结束时间")
     summary: Optional[str] = Field(None, description="报告摘要")
-    content: Optional[str] = Field(None, description="报告内容")
-    ai_analysis: Optional[str] = Field(None, description="AI分析结果")
     total_repositories: int = Field(0, description="总仓库数")
     total_activities: int = Field(0, description="总活动数")
     total_commits: int = Field(0, description="总提交数")
@@ -58,12 +56,19 @@ class ReportResponse(ReportBase):
         from_attributes = True
 
 
+class ReportResponse(ReportSummaryResponse):
+    """报告响应模型"""
+    content: Optional[str] = Field(None, description="报告内容")
+    ai_analysis: Optional[str] = Field(None, description="AI分析结果")
+
+
 class ReportListResponse(BaseModel):
     """报告列表响应模型"""
-    reports: List[ReportResponse] = Field(..., description="报告列表")
+    reports: List[ReportSummaryResponse] = Field(..., description="报告列表")
     total: int = Field(..., description="总数量")
     skip: int = Field(..., description="跳过数量")
     limit: int = Field(..., description="限制数量")
+    next_cursor: Optional[str] = Field(None, description="下一页游标，没有更多数据时为空")
 
 
 class ReportTemplateBase(BaseModel):
@@ -80,6 +80,7 @@ class SubscriptionListResponse(BaseModel):
     total: int
     skip: int
     limit: int
+    next_cursor: Optional[str] = None  # 下一页游标，没有更多数据时为空
 
 
 class RepositoryActivityResponse(BaseModel):
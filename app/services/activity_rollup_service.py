@@ -0,0 +1,360 @@
+"""
+每日活动汇总服务
+按 (订阅, 仓库, 日期, 活动类型) 维护活动数和不同作者数：活动入库时在同一事务中重算受影响的汇总行，
+仪表板、性能指标、趋势分析等统计直接读取汇总表，读取耗时不随原始活动表增长
+"""
+
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+import pytz
+from sqlalchemy import and_, delete, desc, func, insert, or_, select
+
+from app.core.cache import cache, TAG_ACTIVITIES
+from app.core.config import get_settings
+from app.core.database import get_db_session
+from app.core.logger import get_logger
+from app.models.subscription import ActivityDailyRollup, RepositoryActivity, Subscription
+from app.utils.timezone_utils import beijing_now
+
+logger = get_logger(__name__)
+
+
+# 汇总键：(订阅ID, 日期, 活动类型)
+RollupKey = Tuple[int, date, str]
+
+
+class ActivityRollupService:
+    """每日活动汇总服务"""
+
+    # 重建时每次读取的原始记录数
+    REBUILD_CHUNK_SIZE = 10000
+
+    def __init__(self):
+        self.settings = get_settings()
+
+    @property
+    def tz(self) -> pytz.BaseTzInfo:
+        return pytz.timezone(self.settings.schedule.timezone)
+
+    def today(self) -> date:
+        """配置时区下的今天"""
+        return datetime.now(self.tz).date()
+
+    def day_of(self, moment: datetime) -> date:
+        """GitHub 时间所在的日期（数据库读出的不带时区的时间按 UTC 处理）"""
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        return moment.astimezone(self.tz).date()
+
+    def _day_bounds(self, day: date) -> Tuple[datetime, datetime]:
+        """日期在配置时区下的起止时间（UTC）"""
+        start = self.tz.localize(datetime.combine(day, time.min))
+        end = self.tz.localize(datetime.combine(day + timedelta(days=1), time.min))
+        return start.astimezone(timezone.utc), end.astimezone(timezone.utc)
+
+    # ---------- 维护 ----------
+
+    async def refresh(self, session, activities: Iterable[Mapping[str, Any]]) -> int:
+        """
+        在活动入库的事务中重算受影响的汇总行
+
+        Args:
+            session: 活动入库使用的数据库会话（调用方负责提交）
+            activities: 新写入的活动记录，需包含 subscription_id、activity_type、github_created_at
+
+        Returns:
+            int: 重算的汇总行数
+        """
+        keys: Set[RollupKey] = {
+            (activity["subscription_id"], self.day_of(activity["github_created_at"]), activity["activity_type"])
+            for activity in activities
+            if activity.get("github_created_at")
+        }
+        if not keys:
+            return 0
+
+        subscription_ids = {key[0] for key in keys}
+        days = {key[1] for key in keys}
+        activity_types = {key[2] for key in keys}
+
+        # 扫描受影响日期内这些订阅的原始记录；查询范围覆盖 订阅×日期×类型 的全部组合，一并重算
+        ranges = [self._day_bounds(day) for day in sorted(days)]
+        result = await session.execute(
+            select(
+                RepositoryActivity.subscription_id,
+                RepositoryActivity.activity_type,
+                RepositoryActivity.github_created_at,
+                RepositoryActivity.author_login
+            ).where(
+                RepositoryActivity.subscription_id.in_(subscription_ids),
+                RepositoryActivity.activity_type.in_(activity_types),
+                or_(*[
+                    and_(RepositoryActivity.github_created_at >= start, RepositoryActivity.github_created_at < end)
+                    for start, end in ranges
+                ])
+            )
+        )
+        counts, authors = self._aggregate(result.all())
+
+        repositories = await self._load_repositories(session, subscription_ids)
+        rows = self._rollup_rows(counts, authors, repositories)
+        await self._upsert(session, rows)
+        return len(rows)
+
+    async def rebuild(self, subscription_ids: Optional[List[int]] = None) -> int:
+        """
+        从原始活动记录重建汇总（历史数据回填、修改时区配置后使用）
+
+        Args:
+            subscription_ids: 只重建这些订阅，默认全部
+
+        Returns:
+            int: 写入的汇总行数
+        """
+        async with get_db_session() as session:
+            query = select(Subscription.id)
+            if subscription_ids:
+                query = query.where(Subscription.id.in_(subscription_ids))
+            ids = list((await session.execute(query.order_by(Subscription.id))).scalars().all())
+
+        total = 0
+        for subscription_id in ids:
+            async with get_db_session() as session:
+                stream = await session.stream(
+                    select(
+                        RepositoryActivity.subscription_id,
+                        RepositoryActivity.activity_type,
+                        RepositoryActivity.github_created_at,
+                        RepositoryActivity.author_login
+                    )
+                    .where(
+                        RepositoryActivity.subscription_id == subscription_id,
+                        RepositoryActivity.github_created_at.is_not(None)
+                    )
+                    .execution_options(yield_per=self.REBUILD_CHUNK_SIZE)
+                )
+                counts: Dict[RollupKey, int] = defaultdict(int)
+                authors: Dict[RollupKey, Set[str]] = defaultdict(set)
+                async for partition in stream.partitions():
+                    chunk_counts, chunk_authors = self._aggregate(partition)
+                    for key, count in chunk_counts.items():
+                        counts[key] += count
+                        authors[key] |= chunk_authors[key]
+
+                repositories = await self._load_repositories(session, {subscription_id})
+                rows = self._rollup_rows(counts, authors, repositories)
+
+                await session.execute(
+                    delete(ActivityDailyRollup).where(ActivityDailyRollup.subscription_id == subscription_id)
+                )
+                if rows:
+                    await session.execute(insert(ActivityDailyRollup), rows)
+                await session.commit()
+
+            total += len(rows)
+            logger.info(f"🔁 重建订阅 {subscription_id} 的活动汇总: {len(rows)} 行")
+
+        await cache.invalidate(TAG_ACTIVITIES)
+        logger.info(f"✅ 活动汇总重建完成: {len(ids)} 个订阅，共 {total} 行")
+        return total
+
+    async def backfill(self) -> int:
+        """
+        汇总表为空而原始活动表已有数据时（升级到带汇总表的版本后首次启动）自动重建一次
+
+        Returns:
+            int: 写入的汇总行数，无需回填时为 0
+        """
+        async with get_db_session() as session:
+            has_rollups = (await session.execute(select(ActivityDailyRollup.id).limit(1))).first() is not None
+            has_activities = (await session.execute(select(RepositoryActivity.id).limit(1))).first() is not None
+        if has_rollups or not has_activities:
+            return 0
+
+        logger.info("📦 每日活动汇总为空，从已有活动记录回填")
+        return await self.rebuild()
+
+    def _aggregate(self, rows) -> Tuple[Dict[RollupKey, int], Dict[RollupKey, Set[str]]]:
+        counts: Dict[RollupKey, int] = defaultdict(int)
+        authors: Dict[RollupKey, Set[str]] = defaultdict(set)
+        for subscription_id, activity_type, github_created_at, author_login in rows:
+            key = (subscription_id, self.day_of(github_created_at), activity_type)
+            counts[key] += 1
+            if author_login:
+                authors[key].add(author_login)
+        return counts, authors
+
+    async def _load_repositories(self, session, subscription_ids: Set[int]) -> Dict[int, str]:
+        result = await session.execute(
+            select(Subscription.id, Subscription.repository).where(Subscription.id.in_(subscription_ids))
+        )
+        return dict(result.all())
+
+    def _rollup_rows(
+        self,
+        counts: Dict[RollupKey, int],
+        authors: Dict[RollupKey, Set[str]],
+        repositories: Dict[int, str]
+    ) -> List[Dict[str, Any]]:
+        now = beijing_now()
+        return [
+            {
+                "subscription_id": subscription_id,
+                "repository": repositories[subscription_id],
+                "day": day,
+                "activity_type": activity_type,
+                "activity_count": count,
+                "author_count": len(authors[(subscription_id, day, activity_type)]),
+                "updated_at": now
+            }
+            for (subscription_id, day, activity_type), count in counts.items()
+            if subscription_id in repositories
+        ]
+
+    async def _upsert(self, session, rows: List[Dict[str, Any]]) -> None:
+        """按唯一键写入汇总行（SQLite / PostgreSQL 使用 ON CONFLICT，其它数据库逐行合并）"""
+        if not rows:
+            return
+
+        dialect = session.bind.dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            if dialect == "sqlite":
+                from sqlalchemy.dialects.sqlite import insert as upsert
+            else:
+                from sqlalchemy.dialects.postgresql import insert as upsert
+
+            stmt = upsert(ActivityDailyRollup)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["subscription_id", "repository", "day", "activity_type"],
+                set_={
+                    "activity_count": stmt.excluded.activity_count,
+                    "author_count": stmt.excluded.author_count,
+                    "updated_at": stmt.excluded.updated_at
+                }
+            )
+            await session.execute(stmt, rows)
+            return
+
+        for row in rows:
+            result = await session.execute(
+                select(ActivityDailyRollup).where(
+                    ActivityDailyRollup.subscription_id == row["subscription_id"],
+                    ActivityDailyRollup.repository == row["repository"],
+                    ActivityDailyRollup.day == row["day"],
+                    ActivityDailyRollup.activity_type == row["activity_type"]
+                )
+            )
+            rollup = result.scalar_one_or_none()
+            if rollup is None:
+                session.add(ActivityDailyRollup(**row))
+            else:
+                rollup.activity_count = row["activity_count"]
+                rollup.author_count = row["author_count"]
+                rollup.updated_at = row["updated_at"]
+
+    # ---------- 查询 ----------
+
+    async def daily_counts(
+        self,
+        start_day: date,
+        end_day: date,
+        subscription_ids: Optional[List[int]] = None
+    ) -> Dict[Tuple[date, str], int]:
+        """[start_day, end_day] 内每天各类型的活动数"""
+        query = (
+            select(
+                ActivityDailyRollup.day,
+                ActivityDailyRollup.activity_type,
+                func.sum(ActivityDailyRollup.activity_count)
+            )
+            .where(ActivityDailyRollup.day >= start_day, ActivityDailyRollup.day <= end_day)
+            .group_by(ActivityDailyRollup.day, ActivityDailyRollup.activity_type)
+        )
+        if subscription_ids:
+            query = query.where(ActivityDailyRollup.subscription_id.in_(subscription_ids))
+
+        async with get_db_session() as session:
+            result = await session.execute(query)
+            return {(day, activity_type): int(count or 0) for day, activity_type, count in result.all()}
+
+    async def total(self, start_day: Optional[date] = None, end_day: Optional[date] = None) -> int:
+        """时间段内的活动总数（不指定日期时为全部）"""
+        query = select(func.sum(ActivityDailyRollup.activity_count))
+        if start_day is not None:
+            query = query.where(ActivityDailyRollup.day >= start_day)
+        if end_day is not None:
+            query = query.where(ActivityDailyRollup.day <= end_day)
+
+        async with get_db_session() as session:
+            return int(await session.scalar(query) or 0)
+
+    async def type_totals(self, start_day: Optional[date] = None, end_day: Optional[date] = None) -> Dict[str, int]:
+        """各活动类型的活动数"""
+        query = select(
+            ActivityDailyRollup.activity_type,
+            func.sum(ActivityDailyRollup.activity_count)
+        ).group_by(ActivityDailyRollup.activity_type)
+        if start_day is not None:
+            query = query.where(ActivityDailyRollup.day >= start_day)
+        if end_day is not None:
+            query = query.where(ActivityDailyRollup.day <= end_day)
+
+        async with get_db_session() as session:
+            result = await session.execute(query)
+            return {activity_type: int(count or 0) for activity_type, count in result.all()}
+
+    async def repository_totals(self, limit: int = 10) -> List[Tuple[str, int]]:
+        """各订阅仓库的活动总数（含没有活动的仓库），按活动数倒序"""
+        activity_count = func.coalesce(func.sum(ActivityDailyRollup.activity_count), 0).label("activity_count")
+        async with get_db_session() as session:
+            result = await session.execute(
+                select(Subscription.repository, activity_count)
+                .select_from(Subscription)
+                .outerjoin(ActivityDailyRollup, ActivityDailyRollup.subscription_id == Subscription.id)
+                .group_by(Subscription.repository)
+                .order_by(desc(activity_count))
+                .limit(limit)
+            )
+            return [(repository, int(count)) for repository, count in result.all()]
+
+    async def activity_history(self, subscription_id: int, days: int = 14) -> List[Dict[str, Any]]:
+        """订阅最近若干天的每日活动统计，按日期升序，没有活动的日期补零"""
+        end_day = self.today()
+        start_day = end_day - timedelta(days=days - 1)
+
+        async with get_db_session() as session:
+            result = await session.execute(
+                select(
+                    ActivityDailyRollup.day,
+                    ActivityDailyRollup.activity_type,
+                    ActivityDailyRollup.activity_count,
+                    ActivityDailyRollup.author_count
+                ).where(
+                    ActivityDailyRollup.subscription_id == subscription_id,
+                    ActivityDailyRollup.day >= start_day,
+                    ActivityDailyRollup.day <= end_day
+                )
+            )
+            rows = result.all()
+
+        history = {
+            start_day + timedelta(days=offset): {
+                "date": (start_day + timedelta(days=offset)).isoformat(),
+                "total_activities": 0,
+                "activity_types": {},
+                "authors": {}
+            }
+            for offset in range(days)
+        }
+        for day, activity_type, activity_count, author_count in rows:
+            entry = history[day]
+            entry["total_activities"] += activity_count
+            entry["activity_types"][activity_type] = activity_count
+            entry["authors"][activity_type] = author_count
+        return list(history.values())
+
+
+# 全局活动汇总服务实例
+activity_rollup_service = ActivityRollupService()
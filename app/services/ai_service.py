@@ -11,6 +11,7 @@ from datetime import datetime
 import httpx
 from app.core.config import get_settings
 from app.core.logger import get_logger
+from app.services.activity_rollup_service import activity_rollup_service
 
 logger = get_logger(__name__)
 
@@ -53,6 +54,14 @@ class AIService:
         Returns:
             str: 生成的趋势分析
         """
+        # 提供订阅ID时，结合每日活动汇总中最近两周的活动变化
+        if analysis_data.get("subscription_id") and "history_trend" not in analysis_data:
+            try:
+                history_trend = await self.generate_subscription_trend_analysis(analysis_data["subscription_id"])
+                analysis_data = {**analysis_data, "history_trend": history_trend}
+            except Exception as e:
+                logger.warning(f"⚠️ 读取每日活动汇总失败，趋势分析只使用本期数据: {e}")
+
         try:
             if self.ai_config.provider == "openai" and self.ai_config.openai_api_key:
                 return await self._generate_openai_trend_analysis(analysis_data)
@@ -226,6 +235,7 @@ class AIService:
         issues = analysis_data.get('issues', [])
         prs = analysis_data.get('pull_requests', [])
         period = analysis_data.get('period', {})
+        history_trend = analysis_data.get('history_trend') or {}
         
         # 分析提交者
         committers = set()
@@ -285,7 +295,7 @@ class AIService:
 {commits_detail}
 {issues_detail}
 {prs_detail}
-
+{self._format_history_trend(history_trend)}
 请基于以上详细信息从以下角度分析：
 1. 开发活跃度趋势
 2. 代码质量和维护情况
@@ -296,6 +306,18 @@ class AIService:
 """
         return prompt
 
+    @staticmethod
+    def _format_history_trend(history_trend: Dict[str, Any]) -> str:
+        """格式化每日活动汇总得出的历史趋势（数据不足时为空）"""
+        if not history_trend or history_trend.get("trend") == "insufficient_data":
+            return ""
+        counts = "、".join(str(count) for count in history_trend.get("daily_counts", []))
+        return (
+            f"\n近{len(history_trend.get('daily_counts', []))}天每日活动数：{counts}\n"
+            f"历史趋势：{history_trend['description']}（近3天日均 {history_trend['recent_average']:.1f}，"
+            f"此前日均 {history_trend['earlier_average']:.1f}）\n"
+        )
+
     def _generate_simple_repository_summary(self, analysis_data: Dict[str, Any]) -> str:
         """生成简单的仓库摘要"""
         repo = analysis_data.get('repository', {})
@@ -330,6 +352,10 @@ class AIService:
         
         analysis_parts = []
         
+        history_trend = analysis_data.get('history_trend') or {}
+        if history_trend.get("trend") not in (None, "insufficient_data"):
+            analysis_parts.append(f"近两周{history_trend['description']}")
+        
         if len(commits) > 10:
             analysis_parts.append("代码提交频繁，开发活跃度较高")
         elif len(commits) > 0:
@@ -642,6 +668,22 @@ class AIService:
             "recommendations": recommendations
         }
     
+    async def generate_subscription_trend_analysis(self, subscription_id: int, days: int = 14) -> Dict[str, Any]:
+        """
+        基于每日活动汇总生成订阅的趋势分析
+        
+        Args:
+            subscription_id: 订阅ID
+            days: 分析的天数
+        
+        Returns:
+            Dict[str, Any]: 趋势分析结果
+        """
+        historical_data = await activity_rollup_service.activity_history(subscription_id, days)
+        trend = await self.generate_trend_analysis(historical_data)
+        trend["daily_counts"] = [data["total_activities"] for data in historical_data]
+        return trend
+    
     def _generate_recommendations(
         self, 
         trend: str, 
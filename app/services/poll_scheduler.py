@@ -0,0 +1,176 @@
+"""
+自适应轮询调度
+为每个订阅维护新活动速率的指数加权移动平均（EWMA），据此在配置的上下限之间调整轮询间隔；
+到期的订阅按下次轮询时间组成优先队列依次处理，API 配额优先留给活跃仓库。
+"""
+
+import heapq
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from app.core.config import get_settings
+from app.core.database import get_db_session
+from app.core.logger import get_logger
+from app.collectors.github_collector import GitHubCollector
+from app.collectors.sweep import SweepResult
+from app.models.subscription import Subscription, SubscriptionStatus, PollingState
+
+logger = get_logger(__name__)
+
+
+class AdaptivePollScheduler:
+    """按活跃度调整轮询间隔的调度器"""
+
+    def __init__(self, github_collector: GitHubCollector):
+        self.settings = get_settings()
+        self.github_collector = github_collector
+
+    def _now(self) -> datetime:
+        return datetime.now(timezone.utc)
+
+    def _as_utc(self, value: Optional[datetime]) -> Optional[datetime]:
+        if value is None:
+            return None
+        if value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc)
+
+    async def run_due(self) -> float:
+        """处理当前到期的订阅，返回距下一个订阅到期的秒数"""
+        schedule = self.settings.schedule
+        now = self._now()
+
+        async with get_db_session() as session:
+            result = await session.execute(
+                select(Subscription, PollingState)
+                .outerjoin(PollingState, PollingState.subscription_id == Subscription.id)
+                .where(Subscription.status == SubscriptionStatus.ACTIVE)
+            )
+            rows = result.all()
+
+        if not rows:
+            return float(schedule.max_poll_interval)
+
+        # 优先队列：按下次轮询时间排序，从未轮询过的订阅立即到期
+        queue: List[Tuple[datetime, int]] = []
+        subscriptions: Dict[int, Subscription] = {}
+        for subscription, state in rows:
+            due_at = self._as_utc(state.next_poll_at) if state and state.next_poll_at else now
+            subscriptions[subscription.id] = subscription
+            heapq.heappush(queue, (due_at, subscription.id))
+
+        due: List[Subscription] = []
+        while queue and queue[0][0] <= now and len(due) < schedule.poll_batch_size:
+            _, subscription_id = heapq.heappop(queue)
+            due.append(subscriptions[subscription_id])
+
+        if due:
+            logger.info(f"📋 {len(due)} 个订阅到期（共 {len(rows)} 个活跃订阅）")
+            success_count = 0
+            error_count = 0
+            async for sweep_result in self.github_collector.collect_subscriptions(
+                due,
+                days=schedule.full_sync_days,
+                include_states=['open', 'closed', 'merged'],
+                incremental=True
+            ):
+                next_due = await self._reschedule(sweep_result)
+                heapq.heappush(queue, (next_due, sweep_result.subscription.id))
+                if sweep_result.ok:
+                    success_count += 1
+                else:
+                    error_count += 1
+            logger.info(f"✅ 数据收集完成 - 成功: {success_count}, 失败: {error_count}")
+
+        if not queue:
+            return float(schedule.max_poll_interval)
+        return max(0.0, (queue[0][0] - self._now()).total_seconds())
+
+    async def _reschedule(self, sweep_result: SweepResult) -> datetime:
+        """根据本次轮询结果更新活跃度估计和下次轮询时间"""
+        now = self._now()
+        # 只统计新插入的活动，已存在记录的更新（upsert）不算新活动
+        new_activities = sweep_result.data.get("inserted_count", 0) if sweep_result.ok else 0
+
+        async with get_db_session() as session:
+            result = await session.execute(
+                select(PollingState).where(PollingState.subscription_id == sweep_result.subscription.id)
+            )
+            state = result.scalar_one_or_none()
+            if state is None:
+                state = PollingState(
+                    subscription_id=sweep_result.subscription.id,
+                    activity_rate=0.0,
+                    poll_interval=self.settings.schedule.min_poll_interval
+                )
+                session.add(state)
+
+            if sweep_result.ok:
+                last_polled_at = self._as_utc(state.last_polled_at)
+                # 首次轮询回填整个时间窗口、全量对账重新拉取窗口内的数据，
+                # 这两种情况入库的条数不代表两次轮询之间的新活动，不更新速率估计
+                if last_polled_at is not None and not sweep_result.data.get("full_sync_endpoints"):
+                    elapsed = (now - last_polled_at).total_seconds()
+                    state.activity_rate = self._update_rate(state.activity_rate or 0.0, new_activities, elapsed)
+                    state.poll_interval = self._next_interval(state.poll_interval, state.activity_rate)
+                state.last_new_activities = new_activities
+                state.last_polled_at = now
+            # 失败时保持原间隔，下次按原节奏重试
+
+            interval = state.poll_interval
+            if self._is_webhook_driven(state, now):
+                # 由 Webhook 推送驱动的订阅只需低频轮询做对账
+                interval = self.settings.schedule.max_poll_interval
+
+            state.next_poll_at = now + timedelta(seconds=interval)
+            await session.commit()
+            return state.next_poll_at
+
+    def _is_webhook_driven(self, state: PollingState, now: datetime) -> bool:
+        """最近 webhook_stale_hours 小时内收到过 Webhook"""
+        last_webhook_at = self._as_utc(state.last_webhook_at)
+        if last_webhook_at is None:
+            return False
+        return now - last_webhook_at < timedelta(hours=self.settings.github.webhook_stale_hours)
+
+    def _update_rate(self, rate: float, new_activities: int, elapsed_seconds: float) -> float:
+        """更新新活动速率（条/小时）的 EWMA"""
+        alpha = self.settings.schedule.poll_ewma_alpha
+        observed = new_activities / max(elapsed_seconds, 1.0) * 3600
+        return alpha * observed + (1 - alpha) * rate
+
+    def _next_interval(self, interval: Optional[int], rate: float) -> int:
+        """使每次轮询期望获得 poll_target_activities 条新活动，单次最多放大或缩小一倍"""
+        schedule = self.settings.schedule
+        interval = interval or schedule.min_poll_interval
+
+        if rate <= 0:
+            target = interval * 2
+        else:
+            target = schedule.poll_target_activities / rate * 3600
+            target = min(max(target, interval / 2), interval * 2)
+
+        return int(min(max(target, schedule.min_poll_interval), schedule.max_poll_interval))
+
+    async def get_schedule(self) -> List[Dict]:
+        """获取各订阅的轮询计划（按下次轮询时间排序）"""
+        async with get_db_session() as session:
+            result = await session.execute(
+                select(Subscription.repository, PollingState)
+                .join(PollingState, PollingState.subscription_id == Subscription.id)
+                .order_by(PollingState.next_poll_at)
+            )
+            return [
+                {
+                    "subscription_id": state.subscription_id,
+                    "repository": repository,
+                    "activity_rate": round(state.activity_rate or 0.0, 2),
+                    "poll_interval": state.poll_interval,
+                    "next_poll_at": state.next_poll_at.isoformat() if state.next_poll_at else None,
+                    "last_polled_at": state.last_polled_at.isoformat() if state.last_polled_at else None,
+                    "last_webhook_at": state.last_webhook_at.isoformat() if state.last_webhook_at else None
+                }
+                for repository, state in result.all()
+            ]
@@ -0,0 +1,254 @@
+"""
+报告数据服务
+从数据库中已入库的活动构建报告数据（结构与 GitHubCollector.collect_repository_data 相同），
+报告与通知使用同一份活动记录；只有报告时间段中晚于订阅最后同步时间的部分才实时从 GitHub 补齐
+"""
+
+import json
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import and_, desc, func, or_, select
+
+from app.collectors.github_collector import GitHubCollector
+from app.core.database import get_db_session
+from app.core.logger import get_logger
+from app.models.subscription import RepositoryActivity, Subscription
+from app.utils.timezone_utils import beijing_to_utc
+
+logger = get_logger(__name__)
+
+
+class ReportDataService:
+    """报告数据服务"""
+
+    # 最后同步时间与时间段结束相差不超过该值时不再实时补齐
+    SYNC_TOLERANCE = timedelta(minutes=5)
+
+    def __init__(self, collector_factory: Callable[[], GitHubCollector] = GitHubCollector):
+        self.collector_factory = collector_factory
+
+    @staticmethod
+    def _as_utc(value: datetime) -> datetime:
+        """数据库读出的活动时间和同步时间不带时区时按 UTC 处理"""
+        if value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc)
+
+    @staticmethod
+    def _utc_now() -> datetime:
+        return datetime.now(timezone.utc)
+
+    async def build_repository_data(
+        self,
+        subscription: Subscription,
+        period_start: datetime,
+        period_end: datetime
+    ) -> Dict[str, Any]:
+        """
+        构建报告时间段内的仓库数据
+
+        报告时间段按北京时间处理（不带时区的时间视为北京时间，各报告入口均以 beijing_now() 构造时间段），
+        时间段内创建或更新过的活动都会计入
+        """
+        start, end = beijing_to_utc(period_start), beijing_to_utc(period_end)
+        gap_filled = await self._fill_gap(subscription, start, end)
+
+        async with get_db_session() as session:
+            result = await session.execute(
+                select(RepositoryActivity)
+                .where(
+                    RepositoryActivity.subscription_id == subscription.id,
+                    or_(
+                        and_(RepositoryActivity.github_created_at >= start, RepositoryActivity.github_created_at <= end),
+                        and_(RepositoryActivity.github_updated_at >= start, RepositoryActivity.github_updated_at <= end),
+                    )
+                )
+                .order_by(
+                    desc(func.coalesce(RepositoryActivity.github_updated_at, RepositoryActivity.github_created_at)),
+                    desc(RepositoryActivity.id)
+                )
+            )
+            activities = result.scalars().all()
+
+        grouped: Dict[str, List[RepositoryActivity]] = {}
+        for activity in activities:
+            grouped.setdefault(activity.activity_type, []).append(activity)
+
+        commits = [self._commit(activity) for activity in grouped.get("commit", [])]
+        issues = [self._issue(activity) for activity in grouped.get("issue", [])]
+        pull_requests = [self._pull_request(activity) for activity in grouped.get("pull_request", [])]
+        releases = [self._release(activity) for activity in grouped.get("release", [])]
+
+        logger.info(
+            f"从数据库构建报告数据: {subscription.repository} {start.isoformat()} ~ {end.isoformat()}，"
+            f"共 {len(activities)} 条活动{'（已实时补齐）' if gap_filled else ''}"
+        )
+        return {
+            "repository": await self._repository_info(subscription),
+            "commits": commits,
+            "issues": issues,
+            "pull_requests": pull_requests,
+            "releases": releases,
+            "collected_at": self._utc_now().isoformat(),
+            "summary": {
+                "commits_count": len(commits),
+                "issues_count": len(issues),
+                "pull_requests_count": len(pull_requests),
+                "releases_count": len(releases)
+            },
+            "errors": {},
+            "source": {
+                "period_start": start.isoformat(),
+                "period_end": end.isoformat(),
+                "gap_filled": gap_filled
+            }
+        }
+
+    async def _fill_gap(self, subscription: Subscription, start: datetime, end: datetime) -> bool:
+        """
+        订阅最后同步时间早于时间段结束时，增量同步一次补齐之后的活动（写入数据库，与定时同步相同）
+
+        同步失败时只记录警告，报告使用已入库的数据生成
+        """
+        last_sync = self._as_utc(subscription.last_sync_at) if subscription.last_sync_at else None
+        if last_sync is not None and last_sync >= end - self.SYNC_TOLERANCE:
+            return False
+
+        # 增量同步按水位线只拉取上次同步之后的数据；没有水位线时回溯到时间段开始
+        days = max(1, math.ceil((self._utc_now() - start).total_seconds() / 86400))
+        try:
+            await self.collector_factory().collect_repository_activities(subscription, days=days, incremental=True)
+            return True
+        except Exception as e:
+            logger.warning(f"实时补齐 {subscription.repository} 的活动失败，使用已入库的数据生成报告: {e}")
+            return False
+
+    def _time(self, value: Optional[datetime]) -> Optional[str]:
+        return self._as_utc(value).isoformat() if value else None
+
+    @staticmethod
+    def _number(activity_id: str) -> Any:
+        return int(activity_id) if activity_id and activity_id.isdigit() else activity_id
+
+    @staticmethod
+    def _json_list(value: Optional[str]) -> List[Any]:
+        try:
+            return json.loads(value) if value else []
+        except (TypeError, ValueError):
+            return []
+
+    async def _repository_info(self, subscription: Subscription) -> Dict[str, Any]:
+        """
+        仓库基本信息：从 GitHub 获取（经过条件请求缓存，仓库未变化时不消耗速率限制额度），
+        其中 open_issues_count、license、topics 只有 GitHub 返回的才准确
+
+        获取失败时使用订阅中保存的仓库信息
+        """
+        try:
+            owner, repo = subscription.repository.split('/')
+            return await self.collector_factory().fetch_repository_info(owner, repo)
+        except Exception as e:
+            logger.warning(f"获取 {subscription.repository} 的仓库信息失败，使用订阅中保存的信息: {e}")
+
+        async with get_db_session() as session:
+            # 只能统计已入库（收集窗口内）的未关闭 Issue 和 PR，可能少于 GitHub 的实际数量
+            open_result = await session.execute(
+                select(func.count(RepositoryActivity.id)).where(
+                    RepositoryActivity.subscription_id == subscription.id,
+                    RepositoryActivity.activity_type.in_(["issue", "pull_request"]),
+                    RepositoryActivity.state == "open"
+                )
+            )
+            open_issues_count = open_result.scalar() or 0
+        return self._stored_repository_info(subscription, open_issues_count)
+
+    @staticmethod
+    def _stored_repository_info(subscription: Subscription, open_issues_count: int) -> Dict[str, Any]:
+        """订阅中保存的仓库信息"""
+        return {
+            "name": subscription.repository.split('/')[-1],
+            "full_name": subscription.repository_full_name or subscription.repository,
+            "description": subscription.repository_description or "",
+            "html_url": subscription.repository_url or f"https://github.com/{subscription.repository}",
+            "language": subscription.repository_language or "",
+            "stargazers_count": subscription.repository_stars or 0,
+            "forks_count": subscription.repository_forks or 0,
+            # GitHub REST 接口的 watchers_count 与 stargazers_count 相同
+            "watchers_count": subscription.repository_stars or 0,
+            "open_issues_count": open_issues_count,
+            "topics": [],
+            "license": ""
+        }
+
+    def _commit(self, activity: RepositoryActivity) -> Dict[str, Any]:
+        return {
+            "sha": activity.activity_id,
+            "message": activity.description or activity.title or "",
+            "author": {
+                "name": activity.author_name or activity.author_login or "",
+                "email": "",
+                "login": activity.author_login or ""
+            },
+            "date": self._time(activity.github_created_at or activity.github_updated_at),
+            "html_url": activity.url
+        }
+
+    def _issue(self, activity: RepositoryActivity) -> Dict[str, Any]:
+        return {
+            "number": self._number(activity.activity_id),
+            "title": activity.title or "",
+            "body": activity.description or "",
+            "state": activity.state,
+            "user": {
+                "login": activity.author_login or "unknown",
+                "avatar_url": activity.author_avatar_url or ""
+            },
+            "labels": self._json_list(activity.labels),
+            "assignees": self._json_list(activity.assignees),
+            "milestone": activity.milestone or "",
+            "comments": activity.comments_count or 0,
+            "created_at": self._time(activity.github_created_at or activity.github_updated_at),
+            "updated_at": self._time(activity.github_updated_at or activity.github_created_at),
+            "closed_at": self._time(activity.github_closed_at),
+            "html_url": activity.url
+        }
+
+    def _pull_request(self, activity: RepositoryActivity) -> Dict[str, Any]:
+        pull_request = self._issue(activity)
+        pull_request.update({
+            "commits": activity.commits_count or 0,
+            "additions": activity.additions or 0,
+            "deletions": activity.deletions or 0,
+            "changed_files": activity.changed_files or 0,
+            "merged": bool(activity.is_merged),
+            "merged_at": self._time(activity.github_merged_at),
+            "draft": bool(activity.is_draft)
+        })
+        return pull_request
+
+    def _release(self, activity: RepositoryActivity) -> Dict[str, Any]:
+        # 活动记录不单独保存标签名，从发布链接（.../releases/tag/<tag>）中解析
+        url = activity.url or ""
+        tag_name = url.split("/releases/tag/", 1)[1] if "/releases/tag/" in url else (activity.title or "")
+        return {
+            "id": self._number(activity.activity_id),
+            "tag_name": tag_name,
+            "name": activity.title or "",
+            "body": activity.description or "",
+            "draft": False,
+            "prerelease": False,
+            "author": {
+                "login": activity.author_login or "",
+                "avatar_url": activity.author_avatar_url or ""
+            },
+            "created_at": self._time(activity.github_created_at or activity.github_updated_at),
+            # 入库时 GitHub 更新时间取自发布时间
+            "published_at": self._time(activity.github_updated_at or activity.github_created_at),
+            "html_url": activity.url
+        }
+
+
+# 全局报告数据服务实例
+report_data_service = ReportDataService()
@@ -7,18 +7,39 @@ from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 import json
 
-from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm import Session, load_only, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy import and_, or_, desc, select, func
 
 from app.models.report import Report, ReportTemplate, TaskExecution, ReportType, ReportStatus, ReportFormat
 from app.models.subscription import User, Subscription, SubscriptionStatus, ReportFrequency
+from app.core.blob_store import blob_store
+from app.core.cache import cache, TAG_REPORTS
+from app.core.config import get_settings
 from app.core.database import get_db_session
 from app.core.logger import get_logger
 from app.services.ai_service import AIService
 from app.services.notification_service import NotificationService
+from app.utils.pagination import fetch_keyset_page, keyset_order
 
 logger = get_logger(__name__)
 
+# 报告列表只加载列表项需要的列；报告正文、AI分析和原始数据可达数百KB，只在查看详情和下载时读取。
+# 未加载的列在访问时直接报错，避免在异步会话中隐式懒加载
+REPORT_LIST_COLUMNS = (
+    Report.id, Report.user_id, Report.title, Report.description, Report.repository,
+    Report.report_type, Report.status, Report.format, Report.period_start, Report.period_end,
+    Report.summary, Report.total_repositories, Report.total_activities, Report.total_commits,
+    Report.total_issues, Report.total_pull_requests, Report.total_releases,
+    Report.file_path, Report.file_size, Report.sent_at, Report.error_message, Report.retry_count,
+    Report.created_at, Report.updated_at, Report.generated_at,
+)
+
+
+def report_list_query():
+    """报告列表查询（按 REPORT_LIST_COLUMNS 投影）"""
+    return select(Report).options(load_only(*REPORT_LIST_COLUMNS, raiseload=True))
+
 
 class ReportService:
     """报告服务类"""
@@ -51,18 +72,50 @@ class ReportService:
             session.add(report)
             await session.commit()
             await session.refresh(report)
-            return report
+        await cache.invalidate(TAG_REPORTS)
+        return report
     
     @staticmethod
-    async def get_report(report_id: int) -> Optional[Report]:
-        """根据ID获取报告"""
+    async def get_report(report_id: int, load_content: bool = True) -> Optional[Report]:
+        """根据ID获取报告（load_content 为 True 时从文件存储读取报告正文填充 content）"""
         async with get_db_session() as session:
             result = await session.execute(
                 select(Report)
                 .options(selectinload(Report.user))
                 .filter(Report.id == report_id)
             )
-            return result.scalar_one_or_none()
+            report = result.scalar_one_or_none()
+        
+        if report and load_content and report.content is None and report.file_hash:
+            # 只填充属性值，不标记为修改
+            set_committed_value(report, "content", await ReportService.read_content(report))
+        return report
+    
+    @staticmethod
+    async def read_content(report: Report) -> Optional[str]:
+        """读取报告正文：已写入文件存储的从磁盘读取，旧报告直接使用数据库中的内容"""
+        if report.content is not None or not report.file_hash:
+            return report.content
+        try:
+            data = await blob_store.get(report.file_hash)
+            return data.decode("utf-8")
+        except FileNotFoundError:
+            logger.error(f"报告文件不存在 - 报告ID: {report.id}, 哈希: {report.file_hash}")
+            return None
+    
+    @staticmethod
+    async def _store_content(report: Report, content: str) -> None:
+        """保存报告正文：启用文件存储时写入内容寻址存储，数据库只保留路径、大小和哈希"""
+        if not get_settings().storage.enabled:
+            report.content = content
+            report.file_path = report.file_size = report.file_hash = None
+            return
+        
+        blob = await blob_store.put(content.encode("utf-8"))
+        report.content = None
+        report.file_path = blob.path
+        report.file_size = blob.size
+        report.file_hash = blob.digest
     
     @staticmethod
     async def get_user_reports(
@@ -70,11 +123,12 @@ class ReportService:
         skip: int = 0,
         limit: int = 100,
         status: Optional[str] = None,
-        report_type: Optional[str] = None
+        report_type: Optional[str] = None,
+        cursor: Optional[str] = None
     ) -> List[Report]:
-        """获取用户的报告列表"""
+        """获取用户的报告列表（传入 cursor 时按游标分页，忽略 skip）"""
         async with get_db_session() as session:
-            query = select(Report).filter(Report.user_id == user_id)
+            query = report_list_query().filter(Report.user_id == user_id)
             
             if status:
                 query = query.filter(Report.status == status)
@@ -82,9 +136,11 @@ class ReportService:
             if report_type:
                 query = query.filter(Report.report_type == report_type)
             
+            if cursor or not skip:
+                return await fetch_keyset_page(session, query, Report.created_at, Report.id, cursor, limit)
+            
             result = await session.execute(
-                query.order_by(desc(Report.created_at))
-                .offset(skip).limit(limit)
+                query.order_by(*keyset_order(Report.created_at, Report.id)).offset(skip).limit(limit)
             )
             return result.scalars().all()
     
@@ -93,11 +149,12 @@ class ReportService:
         skip: int = 0,
         limit: int = 100,
         status: Optional[str] = None,
-        report_type: Optional[str] = None
+        report_type: Optional[str] = None,
+        cursor: Optional[str] = None
     ) -> List[Report]:
-        """获取所有报告"""
+        """获取所有报告（传入 cursor 时按游标分页，忽略 skip）"""
         async with get_db_session() as session:
-            query = select(Report)
+            query = report_list_query()
             
             if status:
                 query = query.filter(Report.status == status)
@@ -105,9 +162,12 @@ class ReportService:
             if report_type:
                 query = query.filter(Report.report_type == report_type)
             
-            query = query.order_by(desc(Report.created_at)).offset(skip).limit(limit)
+            if cursor or not skip:
+                return await fetch_keyset_page(session, query, Report.created_at, Report.id, cursor, limit)
             
-            result = await session.execute(query)
+            result = await session.execute(
+                query.order_by(*keyset_order(Report.created_at, Report.id)).offset(skip).limit(limit)
+            )
             return result.scalars().all()
     
     @staticmethod
@@ -139,7 +199,7 @@ class ReportService:
             if summary is not None:
                 report.summary = summary
             if content is not None:
-                report.content = content
+                await ReportService._store_content(report, content)
             if ai_analysis is not None:
                 report.ai_analysis = ai_analysis
             if raw_data is not None:
@@ -149,7 +209,11 @@ class ReportService:
             
             await session.commit()
             await session.refresh(report)
-            return report
+        
+        if content is not None and report.content is None:
+            set_committed_value(report, "content", content)
+        await cache.invalidate(TAG_REPORTS)
+        return report
     
     @staticmethod
     async def update_report_statistics(
@@ -182,7 +246,8 @@ class ReportService:
             
             await session.commit()
             await session.refresh(report)
-            return report
+        await cache.invalidate(TAG_REPORTS)
+        return report
     
     @staticmethod
     async def delete_report(report_id: int) -> bool:
@@ -194,8 +259,47 @@ class ReportService:
             
             await session.delete(report)
             await session.commit()
-            return True
-    
+        await cache.invalidate(TAG_REPORTS)
+        return True
+
+    @staticmethod
+    async def compact_report_storage(batch_size: int = 100, min_age: int = 3600) -> Dict[str, int]:
+        """
+        整理报告文件存储
+
+        将旧报告保存在数据库中的正文迁移到文件存储，并删除已没有报告引用的文件
+        （删除报告、重新生成报告后遗留的文件）
+        """
+        migrated = 0
+        last_id = 0
+        # 未启用文件存储时只清理文件
+        while get_settings().storage.enabled:
+            async with get_db_session() as session:
+                result = await session.execute(
+                    select(Report)
+                    .where(Report.id > last_id, Report.content.is_not(None), Report.file_hash.is_(None))
+                    .order_by(Report.id)
+                    .limit(batch_size)
+                )
+                reports = result.scalars().all()
+                if not reports:
+                    break
+                for report in reports:
+                    await ReportService._store_content(report, report.content)
+                await session.commit()
+            migrated += len(reports)
+            last_id = reports[-1].id
+
+        async with get_db_session() as session:
+            result = await session.execute(
+                select(Report.file_hash).where(Report.file_hash.is_not(None)).distinct()
+            )
+            referenced = set(result.scalars().all())
+        removed = await blob_store.collect_garbage(referenced, min_age=min_age)
+
+        logger.info(f"报告文件存储整理完成：迁移 {migrated} 个报告，删除 {removed} 个无引用文件")
+        return {"migrated": migrated, "removed": removed}
+
     @staticmethod
     async def get_report_count(
         user_id: Optional[int] = None,
@@ -224,7 +328,7 @@ class ReportService:
         async with get_db_session() as session:
             cutoff_date = datetime.now() - timedelta(days=days)
             result = await session.execute(
-                select(Report)
+                report_list_query()
                 .filter(Report.created_at >= cutoff_date)
                 .order_by(desc(Report.created_at))
                 .limit(limit)
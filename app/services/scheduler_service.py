@@ -4,16 +4,20 @@
 """
 
 import asyncio
+import time
 from datetime import datetime, timedelta
 from typing import Dict, Any, List
 
+from app.core.config import get_settings
 from app.core.logger import get_logger
+from app.core.cache import cache, TAG_ACTIVITIES, TAG_SUBSCRIPTIONS
 from app.core.database import get_db_session
 from app.models.subscription import Subscription, RepositoryActivity
 from app.services.subscription_service import SubscriptionService
 from app.collectors.github_collector import GitHubCollector
+from app.services.poll_scheduler import AdaptivePollScheduler
 from app.utils.timezone_utils import beijing_now
-from sqlalchemy import select
+from sqlalchemy import func, select
 
 logger = get_logger(__name__)
 
@@ -21,9 +25,17 @@ logger = get_logger(__name__)
 class SchedulerService:
     """定时任务服务"""
     
+    # Dashboard 统计数据的缓存时间（秒）
+    DASHBOARD_STATS_TTL = 30
+    # 清理过期条件请求缓存的间隔（秒）
+    RESPONSE_CACHE_PRUNE_INTERVAL = 3600
+    
     def __init__(self):
+        self.settings = get_settings()
         self.github_collector = GitHubCollector()
+        self.poll_scheduler = AdaptivePollScheduler(self.github_collector)
         self.is_running = False
+        self._last_cache_prune = 0.0
     
     async def start_scheduler(self):
         """启动定时任务调度器"""
@@ -43,17 +55,34 @@ class SchedulerService:
         logger.info("🛑 停止定时任务调度器")
     
     async def _data_collection_loop(self):
-        """数据收集循环 - 每分钟执行一次"""
+        """数据收集循环 - 自适应轮询时按各订阅的下次轮询时间唤醒，否则每分钟执行一次"""
         while self.is_running:
             try:
-                await self.collect_repository_data()
-                # 等待60秒
-                await asyncio.sleep(60)
+                await self._prune_response_cache()
+                if self.settings.schedule.adaptive_polling:
+                    delay = await self.poll_scheduler.run_due()
+                    # 至少每个最短轮询间隔唤醒一次，以便及时处理新增的订阅
+                    await asyncio.sleep(min(max(delay, 1.0), self.settings.schedule.min_poll_interval))
+                else:
+                    await self.collect_repository_data()
+                    # 等待60秒
+                    await asyncio.sleep(60)
             except Exception as e:
                 logger.error(f"💥 数据收集循环出错: {e}", exc_info=True)
                 # 出错后等待30秒再重试
                 await asyncio.sleep(30)
     
+    async def _prune_response_cache(self):
+        """每小时清理一次数据库中过期的条件请求缓存，清理失败不影响数据收集"""
+        now = time.monotonic()
+        if self._last_cache_prune and now - self._last_cache_prune < self.RESPONSE_CACHE_PRUNE_INTERVAL:
+            return
+        self._last_cache_prune = now
+        try:
+            await self.github_collector.response_cache.prune()
+        except Exception as e:
+            logger.warning(f"⚠️ 清理条件请求缓存失败: {e}")
+    
     async def collect_repository_data(self):
         """收集仓库数据"""
         try:
@@ -75,12 +104,19 @@ class SchedulerService:
             success_count = 0
             error_count = 0
             
-            for subscription in subscriptions:
-                try:
-                    await self._collect_subscription_data(subscription)
+            # 按配置的收集器后端收集（REST 有界并发 / GraphQL 批量），单个仓库失败不影响其它仓库
+            # 按水位线增量收集（GitHub收集器会自动存储到数据库），定期全量对账最近几天的数据
+            async for result in self.github_collector.collect_subscriptions(
+                subscriptions,
+                days=self.settings.schedule.full_sync_days,
+                include_states=['open', 'closed', 'merged'],
+                incremental=True
+            ):
+                if result.ok:
                     success_count += 1
-                except Exception as e:
-                    logger.error(f"💥 收集订阅 {subscription.id} 数据失败: {e}", exc_info=True)
+                    if result.data.get('activities'):
+                        logger.info(f"✅ {result.subscription.repository} 收集并存储了 {len(result.data['activities'])} 条活动记录")
+                else:
                     error_count += 1
             
             logger.info(f"✅ 数据收集完成 - 成功: {success_count}, 失败: {error_count}")
@@ -88,36 +124,6 @@ class SchedulerService:
         except Exception as e:
             logger.error(f"💥 收集仓库数据失败: {e}", exc_info=True)
     
-    async def _collect_subscription_data(self, subscription: Subscription):
-        """收集单个订阅的数据"""
-        try:
-            logger.info(f"📊 收集订阅数据: {subscription.repository}")
-            
-            # 解析仓库信息
-            repo_parts = subscription.repository.split('/')
-            if len(repo_parts) != 2:
-                logger.error(f"❌ 仓库格式错误: {subscription.repository}")
-                return
-            
-            owner, repo = repo_parts
-            
-            # 收集最近1天的活动数据（GitHub收集器会自动存储到数据库）
-            activities_data = await self.github_collector.collect_repository_activities(
-                subscription, 
-                days=1,  # 收集最近1天的数据，但会过滤重复
-                include_states=['open', 'closed', 'merged']
-            )
-            
-            # 记录收集结果
-            if activities_data.get('activities'):
-                logger.info(f"✅ 收集并存储了 {len(activities_data['activities'])} 条活动记录")
-            else:
-                logger.info(f"📭 没有新的活动数据")
-            
-        except Exception as e:
-            logger.error(f"💥 收集订阅 {subscription.id} 数据失败: {e}", exc_info=True)
-            raise
-    
     async def _store_activities(self, activities: List[Dict[str, Any]]):
         """存储活动数据到数据库"""
         try:
@@ -182,52 +188,14 @@ class SchedulerService:
             logger.error(f"💥 更新订阅同步时间失败: {e}", exc_info=True)
     
     async def get_dashboard_statistics(self) -> Dict[str, Any]:
-        """获取 Dashboard 统计数据"""
+        """获取 Dashboard 统计数据（结果缓存 DASHBOARD_STATS_TTL 秒，写入活动或订阅时失效）"""
         try:
-            async with get_db_session() as session:
-                # 获取最近24小时的活动统计
-                cutoff_time = beijing_now() - timedelta(hours=24)
-                
-                # 按活动类型统计
-                activity_stats = {}
-                for activity_type in ['commit', 'issue', 'pull_request', 'release']:
-                    result = await session.execute(
-                        select(RepositoryActivity).where(
-                            RepositoryActivity.activity_type == activity_type,
-                            RepositoryActivity.created_at >= cutoff_time
-                        )
-                    )
-                    count = len(result.scalars().all())
-                    activity_stats[activity_type] = count
-                
-                # 获取最活跃的仓库
-                from sqlalchemy import func
-                result = await session.execute(
-                    select(
-                        RepositoryActivity.repository_full_name,
-                        func.count(RepositoryActivity.id).label('activity_count')
-                    ).where(
-                        RepositoryActivity.created_at >= cutoff_time
-                    ).group_by(
-                        RepositoryActivity.repository_full_name
-                    ).order_by(
-                        func.count(RepositoryActivity.id).desc()
-                    ).limit(10)
-                )
-                
-                top_repositories = []
-                for row in result:
-                    top_repositories.append({
-                        'name': row.repository_full_name,
-                        'activity_count': row.activity_count
-                    })
-                
-                return {
-                    'activity_stats': activity_stats,
-                    'top_repositories': top_repositories,
-                    'last_updated': beijing_now().isoformat()
-                }
-                
+            return await cache.get_or_set(
+                "dashboard:activity-stats",
+                self._load_dashboard_statistics,
+                ttl=self.DASHBOARD_STATS_TTL,
+                tags=[TAG_ACTIVITIES, TAG_SUBSCRIPTIONS]
+            )
         except Exception as e:
             logger.error(f"💥 获取 Dashboard 统计数据失败: {e}")
             return {
@@ -235,6 +203,41 @@ class SchedulerService:
                 'top_repositories': [],
                 'last_updated': beijing_now().isoformat()
             }
+    
+    async def _load_dashboard_statistics(self) -> Dict[str, Any]:
+        """按仓库和活动类型统计最近24小时的活动"""
+        async with get_db_session() as session:
+            # 获取最近24小时的活动统计
+            cutoff_time = beijing_now() - timedelta(hours=24)
+            
+            # 一次聚合查询：按仓库和活动类型计数
+            activity_count = func.count(RepositoryActivity.id)
+            result = await session.execute(
+                select(Subscription.repository, RepositoryActivity.activity_type, activity_count)
+                .join(Subscription, Subscription.id == RepositoryActivity.subscription_id)
+                .where(RepositoryActivity.created_at >= cutoff_time)
+                .group_by(Subscription.repository, RepositoryActivity.activity_type)
+            )
+            rows = result.all()
+        
+        # 按活动类型统计
+        activity_stats = {activity_type: 0 for activity_type in ['commit', 'issue', 'pull_request', 'release']}
+        repository_counts: Dict[str, int] = {}
+        for repository, activity_type, count in rows:
+            activity_stats[activity_type] = activity_stats.get(activity_type, 0) + count
+            repository_counts[repository] = repository_counts.get(repository, 0) + count
+        
+        # 获取最活跃的仓库
+        top_repositories = [
+            {'name': repository, 'activity_count': count}
+            for repository, count in sorted(repository_counts.items(), key=lambda item: item[1], reverse=True)[:10]
+        ]
+        
+        return {
+            'activity_stats': activity_stats,
+            'top_repositories': top_repositories,
+            'last_updated': beijing_now().isoformat()
+        }
 
 
 # 全局调度器实例
@@ -11,7 +11,10 @@ from sqlalchemy.orm import Session, selectinload
 from sqlalchemy import and_, or_, desc, select
 
 from app.models.subscription import Subscription, RepositoryActivity, SubscriptionStatus, ReportFrequency
+from app.core.cache import cache, TAG_ACTIVITIES, TAG_SUBSCRIPTIONS
 from app.core.database import get_db_session
+from app.services.activity_rollup_service import activity_rollup_service
+from app.utils.pagination import fetch_keyset_page, keyset_order
 
 
 class SubscriptionService:
@@ -70,7 +73,8 @@ class SubscriptionService:
             session.add(subscription)
             await session.commit()
             await session.refresh(subscription)
-            return subscription
+        await cache.invalidate(TAG_SUBSCRIPTIONS)
+        return subscription
 
     @staticmethod
     async def get_subscription(subscription_id: int) -> Optional[Subscription]:
@@ -89,9 +93,10 @@ class SubscriptionService:
             user_id: int,
             skip: int = 0,
             limit: int = 100,
-            status: Optional[str] = None
+            status: Optional[str] = None,
+            cursor: Optional[str] = None
     ) -> List[Subscription]:
-        """获取用户的订阅列表"""
+        """获取用户的订阅列表（传入 cursor 时按游标分页，忽略 skip）"""
         async with get_db_session() as session:
             from sqlalchemy import select
             query = select(Subscription).filter(Subscription.user_id == user_id)
@@ -99,9 +104,11 @@ class SubscriptionService:
             if status:
                 query = query.filter(Subscription.status == status)
 
+            if cursor or not skip:
+                return await fetch_keyset_page(session, query, Subscription.created_at, Subscription.id, cursor, limit)
+
             result = await session.execute(
-                query.order_by(desc(Subscription.created_at))
-                .offset(skip).limit(limit)
+                query.order_by(*keyset_order(Subscription.created_at, Subscription.id)).offset(skip).limit(limit)
             )
             return result.scalars().all()
 
@@ -110,9 +117,10 @@ class SubscriptionService:
             skip: int = 0,
             limit: int = 100,
             status: Optional[str] = None,
-            repository: Optional[str] = None
+            repository: Optional[str] = None,
+            cursor: Optional[str] = None
     ) -> List[Subscription]:
-        """获取所有订阅"""
+        """获取所有订阅（传入 cursor 时按游标分页，忽略 skip）"""
         async with get_db_session() as session:
             from sqlalchemy import select
             query = select(Subscription)
@@ -123,9 +131,11 @@ class SubscriptionService:
             if repository:
                 query = query.filter(Subscription.repository.ilike(f"%{repository}%"))
 
+            if cursor or not skip:
+                return await fetch_keyset_page(session, query, Subscription.created_at, Subscription.id, cursor, limit)
+
             result = await session.execute(
-                query.order_by(desc(Subscription.created_at))
-                .offset(skip).limit(limit)
+                query.order_by(*keyset_order(Subscription.created_at, Subscription.id)).offset(skip).limit(limit)
             )
             return result.scalars().all()
 
@@ -194,7 +204,8 @@ class SubscriptionService:
 
             await session.commit()
             await session.refresh(subscription)
-            return subscription
+        await cache.invalidate(TAG_SUBSCRIPTIONS)
+        return subscription
 
     @staticmethod
     async def delete_subscription(subscription_id: int) -> bool:
@@ -206,7 +217,8 @@ class SubscriptionService:
 
             await session.delete(subscription)
             await session.commit()
-            return True
+        await cache.invalidate(TAG_SUBSCRIPTIONS, TAG_ACTIVITIES)
+        return True
 
     @staticmethod
     async def update_repository_info(
@@ -238,7 +250,8 @@ class SubscriptionService:
 
             await session.commit()
             await session.refresh(subscription)
-            return subscription
+        await cache.invalidate(TAG_SUBSCRIPTIONS)
+        return subscription
 
     @staticmethod
     async def get_subscription_count(
@@ -299,18 +312,26 @@ class SubscriptionService:
                 **kwargs
             )
             session.add(activity)
+            await session.flush()
+            await activity_rollup_service.refresh(session, [{
+                "subscription_id": subscription_id,
+                "activity_type": activity_type,
+                "github_created_at": github_created_at
+            }])
             await session.commit()
             await session.refresh(activity)
-            return activity
+        await cache.invalidate(TAG_ACTIVITIES)
+        return activity
 
     @staticmethod
     async def get_subscription_activities(
             subscription_id: int,
             activity_type: Optional[str] = None,
             skip: int = 0,
-            limit: int = 100
+            limit: int = 100,
+            cursor: Optional[str] = None
     ) -> List[RepositoryActivity]:
-        """获取订阅的活动记录"""
+        """获取订阅的活动记录（传入 cursor 时按游标分页，忽略 skip）"""
         async with get_db_session() as session:
             from sqlalchemy import select
             query = select(RepositoryActivity).filter(
@@ -320,8 +341,13 @@ class SubscriptionService:
             if activity_type:
                 query = query.filter(RepositoryActivity.activity_type == activity_type)
 
+            if cursor or not skip:
+                return await fetch_keyset_page(
+                    session, query, RepositoryActivity.github_created_at, RepositoryActivity.id, cursor, limit
+                )
+
             result = await session.execute(
-                query.order_by(desc(RepositoryActivity.github_created_at))
+                query.order_by(*keyset_order(RepositoryActivity.github_created_at, RepositoryActivity.id))
                 .offset(skip).limit(limit)
             )
             return result.scalars().all()
@@ -8,6 +8,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import and_
 
 from app.models.subscription import User
+from app.core.auth import invalidate_user_cache
 from app.core.database import get_db_session
 
 
@@ -124,7 +125,8 @@ class UserService:
             
             await session.commit()
             await session.refresh(user)
-            return user
+        await invalidate_user_cache(user_id)
+        return user
     
     @staticmethod
     async def delete_user(user_id: int) -> bool:
@@ -136,7 +138,8 @@ class UserService:
             
             await session.delete(user)
             await session.commit()
-            return True
+        await invalidate_user_cache(user_id)
+        return True
     
     @staticmethod
     async def get_user_count(is_active: Optional[bool] = None) -> int:
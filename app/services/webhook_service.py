@@ -0,0 +1,272 @@
+"""
+GitHub Webhook 处理服务
+校验签名、按投递ID去重后放入队列立即返回，由后台任务把 push / issues / pull_request / release
+事件转换为与收集器相同的 RepositoryActivity 记录，并将收到推送的订阅标记为 Webhook 驱动
+"""
+
+import asyncio
+import hashlib
+import hmac
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import get_settings
+from app.core.database import get_db_session
+from app.core.logger import get_logger
+from app.collectors.github_collector import GitHubCollector
+from app.models.subscription import Subscription, SubscriptionStatus, PollingState
+from app.models.webhook import WebhookDelivery
+from app.utils.timezone_utils import beijing_now
+
+logger = get_logger(__name__)
+
+
+# 会写入活动记录的事件类型
+SUPPORTED_EVENTS = {"push", "issues", "pull_request", "release"}
+
+
+class WebhookQueueFull(Exception):
+    """待处理队列已满"""
+
+
+@dataclass
+class WebhookEvent:
+    """待处理的 Webhook 投递"""
+    delivery_id: str
+    event: str
+    payload: Dict[str, Any]
+
+
+class WebhookService:
+    """GitHub Webhook 处理服务"""
+
+    # 内存中保留的最近投递ID数量，用于快速去重
+    RECENT_DELIVERIES = 5000
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.github_collector = GitHubCollector()
+        self.queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._recent: "OrderedDict[str, None]" = OrderedDict()
+
+        # 统计信息
+        self.received = 0
+        self.duplicates = 0
+        self.processed = 0
+        self.failed = 0
+
+    def verify_signature(self, body: bytes, signature: Optional[str]) -> bool:
+        """校验 X-Hub-Signature-256（HMAC-SHA256）"""
+        secret = self.settings.github.webhook_secret
+        if not secret or not signature or not signature.startswith("sha256="):
+            return False
+        expected = "sha256=" + hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(expected, signature)
+
+    async def start(self) -> None:
+        """启动后台处理任务"""
+        if self._worker is not None:
+            return
+        self.queue = asyncio.Queue(maxsize=self.settings.github.webhook_queue_size)
+        self._worker = asyncio.create_task(self._run())
+        logger.info("🚀 Webhook 处理任务已启动")
+
+    async def stop(self) -> None:
+        """停止后台处理任务"""
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        logger.info("🛑 Webhook 处理任务已停止")
+
+    async def enqueue(self, delivery_id: str, event: str, payload: Dict[str, Any]) -> bool:
+        """记录投递并放入队列；重复投递返回 False"""
+        self.received += 1
+
+        if delivery_id in self._recent:
+            self.duplicates += 1
+            return False
+
+        if event in SUPPORTED_EVENTS:
+            if self.queue is None:
+                await self.start()
+            if self.queue.full():
+                # 未记录投递，GitHub 重新投递时仍可处理
+                raise WebhookQueueFull("Webhook 队列已满")
+
+        repository = (payload.get("repository") or {}).get("full_name")
+        try:
+            async with get_db_session() as session:
+                if await session.get(WebhookDelivery, delivery_id) is not None:
+                    self._remember(delivery_id)
+                    self.duplicates += 1
+                    return False
+                session.add(WebhookDelivery(
+                    delivery_id=delivery_id,
+                    event=event,
+                    repository=repository,
+                    status="queued" if event in SUPPORTED_EVENTS else "ignored"
+                ))
+                await session.commit()
+        except IntegrityError:
+            # 同一投递并发到达（GitHub 重试或多个进程），另一请求已先写入记录
+            self._remember(delivery_id)
+            self.duplicates += 1
+            return False
+        self._remember(delivery_id)
+
+        if event not in SUPPORTED_EVENTS:
+            return True
+
+        try:
+            self.queue.put_nowait(WebhookEvent(delivery_id, event, payload))
+        except asyncio.QueueFull:
+            # 并发请求在写入记录期间占满了队列：撤销记录，GitHub 重新投递时仍可处理
+            await self._forget(delivery_id)
+            raise WebhookQueueFull("Webhook 队列已满")
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            item = await self.queue.get()
+            try:
+                count = await self.process(item)
+                await self._finish(item.delivery_id, "processed", count)
+                self.processed += 1
+            except Exception as e:
+                logger.error(f"💥 处理 Webhook 失败 {item.event} ({item.delivery_id}): {e}", exc_info=True)
+                await self._finish(item.delivery_id, "failed", 0, str(e))
+                self.failed += 1
+            finally:
+                self.queue.task_done()
+
+    async def process(self, item: WebhookEvent) -> int:
+        """把一次投递写入订阅该仓库的所有订阅，返回写入的活动记录数"""
+        repository = (item.payload.get("repository") or {}).get("full_name")
+        if not repository:
+            return 0
+
+        async with get_db_session() as session:
+            result = await session.execute(
+                select(Subscription).where(
+                    func.lower(Subscription.repository) == repository.lower(),
+                    Subscription.status == SubscriptionStatus.ACTIVE
+                )
+            )
+            subscriptions = result.scalars().all()
+
+        if not subscriptions:
+            return 0
+
+        stored = 0
+        for subscription in subscriptions:
+            activities = self.to_activities(item.event, item.payload, subscription)
+            if activities:
+                rows = await self.github_collector._store_in_batches(activities)
+                stored += len(rows)
+                # 与轮询入库相同：只通知新增的活动，轮询之后再看到这些记录时不会重复通知
+                await self.github_collector._send_activity_notifications(
+                    subscription, [row for row in rows if row["inserted"]]
+                )
+        await self._mark_webhook_driven([subscription.id for subscription in subscriptions])
+
+        logger.info(f"📥 Webhook {item.event} {repository}: 写入 {stored} 条活动记录")
+        return stored
+
+    def to_activities(self, event: str, payload: Dict[str, Any], subscription: Subscription) -> List[Dict]:
+        """将 Webhook 载荷转换为与收集器相同的活动记录"""
+        collector = self.github_collector
+
+        if event == "push" and subscription.monitor_commits:
+            default_branch = (payload.get("repository") or {}).get("default_branch")
+            if payload.get("ref") != f"refs/heads/{default_branch}":
+                return []
+            commits = [
+                {
+                    "sha": commit["id"],
+                    "message": commit["message"],
+                    "author": {
+                        "name": commit["author"].get("name", ""),
+                        "email": commit["author"].get("email", ""),
+                        "login": commit["author"].get("username", "")
+                    },
+                    "date": commit["timestamp"],
+                    "html_url": commit["url"]
+                }
+                for commit in payload.get("commits", [])
+                if commit.get("distinct", True)
+            ]
+            return collector._convert_commits_to_activities(commits, subscription.id)
+
+        # issues / pull_request / release 载荷中的对象与 REST 接口返回的结构相同
+        if event == "issues" and subscription.monitor_issues:
+            return collector._convert_issues_to_activities([collector._parse_issue(payload["issue"])], subscription.id)
+        if event == "pull_request" and subscription.monitor_pull_requests:
+            return collector._convert_prs_to_activities([collector._parse_pull_request(payload["pull_request"])], subscription.id)
+        if event == "release" and subscription.monitor_releases:
+            return collector._convert_releases_to_activities([collector._parse_release(payload["release"])], subscription.id)
+        return []
+
+    async def _mark_webhook_driven(self, subscription_ids: List[int]) -> None:
+        """记录最近收到 Webhook 的时间，轮询调度器据此降低这些订阅的轮询频率"""
+        now = datetime.now(timezone.utc)
+        async with get_db_session() as session:
+            result = await session.execute(
+                select(PollingState).where(PollingState.subscription_id.in_(subscription_ids))
+            )
+            states = {state.subscription_id: state for state in result.scalars().all()}
+            for subscription_id in subscription_ids:
+                state = states.get(subscription_id)
+                if state is None:
+                    state = PollingState(subscription_id=subscription_id, activity_rate=0.0)
+                    session.add(state)
+                state.last_webhook_at = now
+            await session.commit()
+
+    async def _finish(self, delivery_id: str, status: str, count: int, error: Optional[str] = None) -> None:
+        try:
+            async with get_db_session() as session:
+                delivery = await session.get(WebhookDelivery, delivery_id)
+                if delivery:
+                    delivery.status = status
+                    delivery.activities_count = count
+                    delivery.error_message = error
+                    delivery.processed_at = beijing_now()
+                    await session.commit()
+        except Exception as e:
+            logger.error(f"更新 Webhook 投递状态失败 {delivery_id}: {e}")
+
+    async def _forget(self, delivery_id: str) -> None:
+        self._recent.pop(delivery_id, None)
+        async with get_db_session() as session:
+            await session.execute(delete(WebhookDelivery).where(WebhookDelivery.delivery_id == delivery_id))
+
+    def _remember(self, delivery_id: str) -> None:
+        self._recent[delivery_id] = None
+        while len(self._recent) > self.RECENT_DELIVERIES:
+            self._recent.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取 Webhook 处理统计"""
+        return {
+            "enabled": bool(self.settings.github.webhook_secret),
+            "received": self.received,
+            "duplicates": self.duplicates,
+            "processed": self.processed,
+            "failed": self.failed,
+            "queued": self.queue.qsize() if self.queue else 0
+        }
+
+
+# 全局 Webhook 服务实例
+webhook_service = WebhookService()
@@ -0,0 +1,85 @@
+"""
+HTTP 工具函数
+"""
+
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional, Sequence
+
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    """解析 Accept-Encoding 请求头，返回 {编码: q 值}"""
+    encodings: Dict[str, float] = {}
+    for item in (header or "").split(","):
+        parts = [part.strip() for part in item.split(";")]
+        name = parts[0].lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in parts[1:]:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        encodings[name] = quality
+    return encodings
+
+
+def accepts_encoding(header: Optional[str], encoding: str) -> bool:
+    """客户端是否接受指定的内容编码（q=0 表示拒绝）"""
+    encodings = parse_accept_encoding(header)
+    quality = encodings.get(encoding, encodings.get("*", 0.0))
+    return quality > 0
+
+
+def choose_encoding(header: Optional[str], available: Sequence[str]) -> Optional[str]:
+    """
+    按 Accept-Encoding 选择内容编码
+
+    available 按服务端优先级排列，q 值相同时取靠前的编码；都不接受时返回 None（不压缩）
+    """
+    encodings = parse_accept_encoding(header)
+    best, best_quality = None, 0.0
+    for encoding in available:
+        quality = encodings.get(encoding, encodings.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def http_date(value: datetime) -> str:
+    """格式化为 HTTP 日期（无时区的时间按服务器本地时间处理）"""
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def _opaque_tag(etag: str) -> str:
+    """去掉弱校验前缀 W/"""
+    etag = etag.strip()
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def is_not_modified(headers, etag: str, last_modified: Optional[datetime]) -> bool:
+    """
+    条件请求是否命中（应返回 304）
+
+    If-None-Match 存在时只比较 ETag（弱比较），否则比较 If-Modified-Since（精确到秒）
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        tags = {_opaque_tag(tag) for tag in if_none_match.split(",")}
+        return _opaque_tag(etag) in tags
+
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return int(last_modified.astimezone(timezone.utc).timestamp()) <= int(since.timestamp())
+    return False
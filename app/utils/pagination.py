@@ -0,0 +1,69 @@
+"""
+游标分页工具
+列表按 (排序时间, id) 倒序排列，排序时间为空的记录排在最后；游标是上一页最后一条记录的排序键，
+编码为不透明字符串。下一页用行值比较从索引上的游标位置继续读取，查询耗时不随翻页深度增长
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import desc, tuple_
+
+
+def encode_cursor(sort_value: Optional[datetime], row_id: int) -> str:
+    """将排序键编码为游标"""
+    payload = json.dumps([sort_value.isoformat() if sort_value else None, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    """解析游标，格式不正确时抛出 ValueError"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return (datetime.fromisoformat(sort_value) if sort_value else None), int(row_id)
+    except Exception:
+        raise ValueError(f"无效的分页游标: {cursor}")
+
+
+def keyset_order(sort_column, id_column) -> tuple:
+    """与游标分页一致的排序（offset 分页使用）"""
+    return desc(sort_column).nulls_last(), desc(id_column)
+
+
+async def fetch_keyset_page(session, query, sort_column, id_column, cursor: Optional[str], limit: int) -> List[Any]:
+    """
+    取游标之后的一页记录
+
+    排序时间非空和为空的两段分别查询，每段都是索引上的一次范围扫描：
+    先按 (sort_column, id_column) 倒序读取非空段，不足一页时再按 id 倒序读取空值段
+    """
+    sort_value, row_id = decode_cursor(cursor) if cursor else (None, None)
+    items: List[Any] = []
+
+    # 游标已进入空值段时跳过非空段
+    if cursor is None or sort_value is not None:
+        page_query = query.where(sort_column.is_not(None))
+        if cursor:
+            page_query = page_query.where(tuple_(sort_column, id_column) < tuple_(sort_value, row_id))
+        result = await session.execute(page_query.order_by(desc(sort_column), desc(id_column)).limit(limit))
+        items.extend(result.scalars().all())
+
+    if len(items) < limit:
+        null_query = query.where(sort_column.is_(None))
+        if cursor and sort_value is None:
+            null_query = null_query.where(id_column < row_id)
+        result = await session.execute(null_query.order_by(desc(id_column)).limit(limit - len(items)))
+        items.extend(result.scalars().all())
+
+    return items
+
+
+def next_cursor(items: Sequence[Any], sort_attr: str, limit: int) -> Optional[str]:
+    """本页已满时返回下一页游标，否则返回 None"""
+    if not items or len(items) < limit:
+        return None
+    last = items[-1]
+    return encode_cursor(getattr(last, sort_attr), last.id)
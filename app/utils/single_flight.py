@@ -0,0 +1,58 @@
+"""
+Single-flight 工具
+同一个键同时只执行一次异步调用，并发的重复调用等待并共享同一个结果
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class SingleFlight:
+    """合并并发的重复调用"""
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        # 统计信息
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """执行 factory()；若相同 key 的调用正在进行，则等待其结果而不重复执行"""
+        self.calls += 1
+        future = self._inflight.get(key)
+        if future is not None:
+            self.shared += 1
+            # shield：某个等待者被取消时不影响正在执行的调用和其它等待者
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await factory()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            if not future.done():
+                future.set_exception(e)
+                # 没有其它等待者时避免 "exception was never retrieved" 警告
+                future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    def in_flight(self, key: Optional[Hashable] = None) -> int:
+        """正在进行的调用数"""
+        if key is not None:
+            return 1 if key in self._inflight else 0
+        return len(self._inflight)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "shared": self.shared,
+            "in_flight": len(self._inflight)
+        }
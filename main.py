@@ -19,7 +19,9 @@ from loguru import logger
 sys.path.insert(0, str(Path(__file__).parent))
 
 from app.core.config import get_settings
-from app.core.database import init_database
+from app.core.database import init_database, close_database
+from app.core.http_client import init_http_client, close_http_client
+from app.core.cache import cache
 from app.core.scheduler import TaskScheduler
 from app.api.main import api_router
 from app.api.middleware.logging import LoggingMiddleware
@@ -115,6 +117,13 @@ def create_app() -> FastAPI:
         await init_database()
         logger.info("数据库初始化完成")
         
+        # 升级后首次启动时回填每日活动汇总，否则图表和统计在手动重建前都是 0
+        from app.services.activity_rollup_service import activity_rollup_service
+        await activity_rollup_service.backfill()
+        
+        # 初始化共享 HTTP 客户端连接池
+        await init_http_client()
+        
         # 启动任务调度器
         scheduler = TaskScheduler()
         await scheduler.start()
@@ -125,6 +134,10 @@ def create_app() -> FastAPI:
         await scheduler_service.start_scheduler()
         logger.info("数据收集定时任务启动完成")
         
+        # 启动 Webhook 处理任务
+        from app.services.webhook_service import webhook_service
+        await webhook_service.start()
+        
         logger.info("GitHub Sentinel 启动完成！")
     
     # 应用关闭事件
@@ -137,10 +150,23 @@ def create_app() -> FastAPI:
         await scheduler_service.stop_scheduler()
         logger.info("数据收集定时任务已停止")
         
+        # 停止 Webhook 处理任务
+        from app.services.webhook_service import webhook_service
+        await webhook_service.stop()
+        
         # 停止任务调度器
         scheduler = TaskScheduler()
         await scheduler.stop()
         
+        # 关闭共享 HTTP 客户端连接池
+        await close_http_client()
+        
+        # 关闭接口结果缓存（Redis 连接）
+        await cache.close()
+        
+        # 关闭数据库连接
+        await close_database()
+        
         logger.info("GitHub Sentinel 已关闭")
     
     return app
@@ -209,6 +235,40 @@ def collect():
     asyncio.run(collect_async())
 
 
+@cli.command()
+@click.option("--subscription-id", "subscription_ids", type=int, multiple=True, help="只重建指定订阅（可重复），默认全部")
+def rebuild_rollups(subscription_ids):
+    """从原始活动记录重建每日活动汇总"""
+    from app.services.activity_rollup_service import activity_rollup_service
+    
+    async def rebuild_async():
+        await init_database()
+        try:
+            total = await activity_rollup_service.rebuild(list(subscription_ids) or None)
+            logger.info(f"每日活动汇总重建完成，共 {total} 行")
+        finally:
+            await close_database()
+    
+    asyncio.run(rebuild_async())
+
+
+@cli.command()
+@click.option("--min-age", default=3600, help="只删除早于该秒数的无引用文件")
+def compact_reports(min_age: int):
+    """将旧报告正文迁移到文件存储，并清理无引用的报告文件"""
+    from app.services.report_service import ReportService
+    
+    async def compact_async():
+        await init_database()
+        try:
+            result = await ReportService.compact_report_storage(min_age=min_age)
+            logger.info(f"报告文件存储整理完成: {result}")
+        finally:
+            await close_database()
+    
+    asyncio.run(compact_async())
+
+
 if __name__ == "__main__":
     # 使用全局日志配置
     from app.core.logger import app_logger as logger
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+活动图表查询基准测试脚本
+在临时 SQLite 数据库中逐步增加活动记录，对比直接聚合原始活动表与读取每日汇总表的耗时，
+并校验两者结果一致；汇总表的读取耗时应基本不随原始记录数增长
+
+用法:
+    python scripts/benchmark_activity_chart.py --sizes 100000,1000000 --days 30
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import create_engine, func, select
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import get_settings
+from app.core import database
+from app.models.subscription import User, Subscription, RepositoryActivity
+from app.api.routes.dashboard import CHART_ACTIVITY_TYPES
+from app.services.activity_rollup_service import activity_rollup_service
+
+
+def populate(url: str, start_id: int, rows: int, subscriptions: int, span_days: int, now: datetime):
+    """追加测试数据（GitHub 时间以 UTC 保存）"""
+    rng = random.Random(start_id)
+    engine = create_engine(url)
+
+    with engine.begin() as conn:
+        if start_id == 0:
+            conn.execute(User.__table__.insert(), [{"id": 1, "username": "bench", "email": "bench@example.com"}])
+            conn.execute(Subscription.__table__.insert(), [
+                {"id": i, "user_id": 1, "repository": f"org{i}/repo{i}"} for i in range(1, subscriptions + 1)
+            ])
+
+        batch = []
+        for i in range(start_id, start_id + rows):
+            created = now - timedelta(seconds=rng.randint(0, span_days * 86400))
+            batch.append({
+                "subscription_id": rng.randint(1, subscriptions),
+                "activity_type": rng.choices(list(CHART_ACTIVITY_TYPES), weights=[60, 20, 18, 2])[0],
+                "activity_id": str(i),
+                "author_login": f"dev{rng.randint(1, 200)}",
+                "github_created_at": created,
+                "github_updated_at": created,
+                "created_at": created,
+            })
+            if len(batch) == 50000:
+                conn.execute(RepositoryActivity.__table__.insert(), batch)
+                batch = []
+        if batch:
+            conn.execute(RepositoryActivity.__table__.insert(), batch)
+    engine.dispose()
+
+
+async def raw_chart(start_day, end_day):
+    """直接聚合原始活动表：按小时分组后换算到配置时区的日期"""
+    tz = activity_rollup_service.tz
+    start = tz.localize(datetime.combine(start_day, datetime.min.time())).astimezone(timezone.utc)
+    end = tz.localize(datetime.combine(end_day + timedelta(days=1), datetime.min.time())).astimezone(timezone.utc)
+    bucket = func.strftime('%Y-%m-%d %H:00:00', RepositoryActivity.github_created_at)
+
+    async with database.get_db_session() as session:
+        result = await session.execute(
+            select(bucket, RepositoryActivity.activity_type, func.count(RepositoryActivity.id))
+            .where(RepositoryActivity.github_created_at >= start, RepositoryActivity.github_created_at < end)
+            .group_by(bucket, RepositoryActivity.activity_type)
+        )
+        counts = defaultdict(int)
+        for bucket_value, activity_type, count in result.all():
+            hour = datetime.strptime(bucket_value, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+            counts[(hour.astimezone(tz).date(), activity_type)] += count
+        return dict(counts)
+
+
+async def measure(factory, repeat: int):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = await factory()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return result, timings[len(timings) // 2]
+
+
+async def run(args):
+    sizes = [int(size) for size in args.sizes.split(",")]
+    now = datetime.now(timezone.utc)
+    end_day = activity_rollup_service.today()
+    start_day = end_day - timedelta(days=args.days - 1)
+    report = []
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = f"{tmpdir}/benchmark.db"
+        get_settings().database.url = f"sqlite+aiosqlite:///{path}"
+        await database.init_database()
+
+        loaded = 0
+        for size in sizes:
+            start = time.perf_counter()
+            populate(f"sqlite:///{path}", loaded, size - loaded, args.subscriptions, args.span_days, now)
+            loaded = size
+            print(f"📦 活动记录增加到 {size}，耗时 {time.perf_counter() - start:.1f}s")
+
+            start = time.perf_counter()
+            rollup_rows = await activity_rollup_service.rebuild()
+            print(f"🔁 重建汇总 {rollup_rows} 行，耗时 {time.perf_counter() - start:.1f}s")
+
+            raw, raw_ms = await measure(lambda: raw_chart(start_day, end_day), args.repeat)
+            rollup, rollup_ms = await measure(
+                lambda: activity_rollup_service.daily_counts(start_day, end_day), args.repeat
+            )
+            assert raw == rollup, "原始表聚合与汇总表结果不一致"
+            report.append((size, raw_ms, rollup_ms))
+
+        await database.close_database()
+
+    print(f"\n📈 {args.days} 天活动图表（中位数，结果一致）")
+    for size, raw_ms, rollup_ms in report:
+        print(f"  {size:>10} 条: 原始表聚合 {raw_ms:8.1f} ms | 汇总表 {rollup_ms:6.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对比原始活动表聚合与每日汇总表的图表查询耗时")
+    parser.add_argument("--sizes", default="100000,1000000", help="逐步增加到的活动记录数，逗号分隔")
+    parser.add_argument("--subscriptions", type=int, default=500, help="订阅数")
+    parser.add_argument("--span-days", type=int, default=90, help="活动记录分布的天数")
+    parser.add_argument("--days", type=int, default=30, help="图表天数")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+索引基准测试脚本
+在临时 SQLite 数据库中生成活动记录和报告，对比加索引前后仪表板、订阅、报告等查询的执行计划与耗时
+
+用法:
+    python scripts/benchmark_indexes.py --rows 1000000
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import and_, create_engine, desc, func, select, text
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.database import Base
+from app.models.subscription import User, Subscription, RepositoryActivity
+from app.models.report import Report
+
+ACTIVITY_TYPES = ["commit", "issue", "pull_request", "release"]
+REPORT_STATUSES = ["pending", "generating", "completed", "failed", "sent"]
+
+# 本次新增的查询对齐索引（基线中不存在）
+ALIGNED_INDEXES = [
+    index
+    for table in (RepositoryActivity.__table__, Report.__table__)
+    for index in table.indexes
+    if index.name.startswith(("ix_activity_", "ix_report_"))
+]
+
+
+def build_queries(now: datetime):
+    """与 dashboard / scheduler_service / subscription_service / report_service 中相同形状的查询"""
+    week_ago = now - timedelta(days=7)
+    return {
+        "订阅活动列表（subscription_service）": select(RepositoryActivity)
+            .where(RepositoryActivity.subscription_id == 42)
+            .order_by(desc(RepositoryActivity.github_created_at)).limit(100),
+        "按类型筛选的订阅活动": select(RepositoryActivity)
+            .where(RepositoryActivity.subscription_id == 42, RepositoryActivity.activity_type == "issue")
+            .order_by(desc(RepositoryActivity.github_created_at)).limit(100),
+        "最近活动（dashboard）": select(RepositoryActivity)
+            .where(RepositoryActivity.github_created_at >= week_ago)
+            .order_by(desc(RepositoryActivity.github_created_at)).limit(50),
+        "时间段活动数（dashboard）": select(func.count(RepositoryActivity.id))
+            .where(RepositoryActivity.created_at >= week_ago),
+        "类型+时间段活动数（scheduler_service）": select(func.count(RepositoryActivity.id))
+            .where(RepositoryActivity.activity_type == "release", RepositoryActivity.created_at >= week_ago),
+        "按类型计数（dashboard）": select(func.count(RepositoryActivity.id))
+            .where(RepositoryActivity.activity_type == "release"),
+        "用户报告列表（report_service）": select(Report)
+            .where(Report.user_id == 7).order_by(desc(Report.created_at)).limit(20),
+        "按状态的报告列表": select(Report)
+            .where(Report.status == "failed").order_by(desc(Report.created_at)).limit(20),
+        "最近报告": select(Report)
+            .where(Report.created_at >= week_ago).order_by(desc(Report.created_at)).limit(10),
+        "时间段报告数": select(func.count(Report.id))
+            .where(and_(Report.created_at >= week_ago, Report.created_at <= now)),
+    }
+
+
+def populate(engine, rows: int, reports: int, subscriptions: int, users: int, now: datetime):
+    """批量生成测试数据"""
+    rng = random.Random(42)
+    start = time.perf_counter()
+
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [
+            {"id": i, "username": f"user{i}", "email": f"user{i}@example.com"} for i in range(1, users + 1)
+        ])
+        conn.execute(Subscription.__table__.insert(), [
+            {"id": i, "user_id": rng.randint(1, users), "repository": f"org{i}/repo{i}"}
+            for i in range(1, subscriptions + 1)
+        ])
+
+        batch = []
+        for i in range(rows):
+            created = now - timedelta(seconds=rng.randint(0, 365 * 86400))
+            batch.append({
+                "subscription_id": rng.randint(1, subscriptions),
+                "activity_type": rng.choices(ACTIVITY_TYPES, weights=[60, 20, 18, 2])[0],
+                "activity_id": str(i),
+                "title": f"activity {i}",
+                "github_created_at": created,
+                "github_updated_at": created,
+                "created_at": created + timedelta(minutes=rng.randint(1, 120)),
+            })
+            if len(batch) == 50000:
+                conn.execute(RepositoryActivity.__table__.insert(), batch)
+                batch = []
+        if batch:
+            conn.execute(RepositoryActivity.__table__.insert(), batch)
+
+        conn.execute(Report.__table__.insert(), [
+            {
+                "user_id": rng.randint(1, users),
+                "title": f"report {i}",
+                "report_type": "daily",
+                "status": rng.choice(REPORT_STATUSES),
+                "period_start": now - timedelta(days=1),
+                "period_end": now,
+                "created_at": now - timedelta(seconds=rng.randint(0, 365 * 86400)),
+            }
+            for i in range(reports)
+        ])
+
+    print(f"📦 生成 {rows} 条活动记录、{reports} 条报告，耗时 {time.perf_counter() - start:.1f}s")
+
+
+def run_queries(engine, queries, repeat: int):
+    """输出每个查询的执行计划和平均耗时"""
+    results = {}
+    with engine.connect() as conn:
+        for name, query in queries.items():
+            sql = str(query.compile(engine, compile_kwargs={"literal_binds": True}))
+            plan = [row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+
+            start = time.perf_counter()
+            for _ in range(repeat):
+                conn.execute(query).all()
+            elapsed = (time.perf_counter() - start) / repeat * 1000
+
+            results[name] = elapsed
+            print(f"  {name}: {elapsed:.2f} ms")
+            for step in plan:
+                print(f"      {step}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对比加索引前后的查询计划与耗时")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="活动记录数")
+    parser.add_argument("--reports", type=int, default=100_000, help="报告数")
+    parser.add_argument("--subscriptions", type=int, default=500, help="订阅数")
+    parser.add_argument("--users", type=int, default=50, help="用户数")
+    parser.add_argument("--repeat", type=int, default=5, help="每个查询重复次数")
+    args = parser.parse_args()
+
+    now = datetime(2026, 10, 1, 12, 0, 0)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        engine = create_engine(f"sqlite:///{tmpdir}/benchmark.db")
+        Base.metadata.create_all(engine)
+
+        # 基线：去掉查询对齐索引，恢复原来的 activity_type 单列索引
+        with engine.begin() as conn:
+            for index in ALIGNED_INDEXES:
+                index.drop(conn)
+            conn.execute(text(
+                "CREATE INDEX ix_repository_activities_activity_type ON repository_activities (activity_type)"
+            ))
+
+        populate(engine, args.rows, args.reports, args.subscriptions, args.users, now)
+        queries = build_queries(now)
+
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
+        print("\n🐢 基线索引")
+        before = run_queries(engine, queries, args.repeat)
+
+        start = time.perf_counter()
+        with engine.begin() as conn:
+            conn.execute(text("DROP INDEX ix_repository_activities_activity_type"))
+            for index in ALIGNED_INDEXES:
+                index.create(conn)
+            conn.execute(text("ANALYZE"))
+        print(f"\n🔧 创建 {len(ALIGNED_INDEXES)} 个索引，耗时 {time.perf_counter() - start:.1f}s")
+
+        print("\n🚀 查询对齐索引")
+        after = run_queries(engine, queries, args.repeat)
+        engine.dispose()
+
+    print("\n📊 对比")
+    for name in queries:
+        speedup = before[name] / after[name] if after[name] else float("inf")
+        print(f"  {name}: {before[name]:.2f} ms -> {after[name]:.2f} ms ({speedup:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+分页基准测试脚本
+在临时 SQLite 数据库中为单个订阅生成活动记录，对比 offset 分页与游标分页在不同翻页深度下的耗时，
+并校验两种分页的结果一致、游标逐页遍历不重复不遗漏
+
+用法:
+    python scripts/benchmark_pagination.py --rows 1000000 --page-size 100
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine, select
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import get_settings
+from app.core import database
+from app.models.subscription import User, Subscription, RepositoryActivity
+from app.models.report import Report  # noqa: F401  注册 User.reports 关系的映射
+from app.utils.pagination import fetch_keyset_page, keyset_order, next_cursor
+
+
+def populate(url: str, rows: int, now: datetime):
+    """生成测试数据（部分记录的 GitHub 时间相同或为空，用于验证 id 次级排序和空值段）"""
+    rng = random.Random(42)
+    start = time.perf_counter()
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [{"id": 1, "username": "bench", "email": "bench@example.com"}])
+        conn.execute(Subscription.__table__.insert(), [{"id": 1, "user_id": 1, "repository": "org/repo"}])
+
+        batch = []
+        for i in range(rows):
+            created = None if i % 10000 == 0 else now - timedelta(minutes=rng.randint(0, rows // 2))
+            batch.append({
+                "subscription_id": 1,
+                "activity_type": "commit",
+                "activity_id": str(i),
+                "title": f"activity {i}",
+                "github_created_at": created,
+                "created_at": now,
+            })
+            if len(batch) == 50000:
+                conn.execute(RepositoryActivity.__table__.insert(), batch)
+                batch = []
+        if batch:
+            conn.execute(RepositoryActivity.__table__.insert(), batch)
+    engine.dispose()
+    print(f"📦 生成 {rows} 条活动记录，耗时 {time.perf_counter() - start:.1f}s")
+
+
+def base_query():
+    return select(RepositoryActivity).where(RepositoryActivity.subscription_id == 1)
+
+
+async def offset_page(offset: int, limit: int):
+    async with database.get_db_session() as session:
+        result = await session.execute(
+            base_query()
+            .order_by(*keyset_order(RepositoryActivity.github_created_at, RepositoryActivity.id))
+            .offset(offset).limit(limit)
+        )
+        return result.scalars().all()
+
+
+async def cursor_page(cursor, limit: int):
+    async with database.get_db_session() as session:
+        return await fetch_keyset_page(
+            session, base_query(), RepositoryActivity.github_created_at, RepositoryActivity.id, cursor, limit
+        )
+
+
+async def timed(factory, repeat: int):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = await factory()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return result, timings[len(timings) // 2]
+
+
+async def run(args):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = f"{tmpdir}/benchmark.db"
+        get_settings().database.url = f"sqlite+aiosqlite:///{path}"
+        await database.init_database()
+        populate(f"sqlite:///{path}", args.rows, datetime(2026, 10, 1, 12, 0, 0))
+
+        depths = [depth for depth in (0, 1_000, 10_000, 100_000, 500_000, args.rows - args.page_size) if depth < args.rows]
+        print(f"\n📈 从第 N 条记录开始的一页（每页 {args.page_size} 条，中位数）")
+        for depth in depths:
+            offset_rows, offset_ms = await timed(lambda: offset_page(depth, args.page_size), args.repeat)
+            # 游标取自上一页的最后一条记录，与客户端逐页翻页时相同
+            previous = await offset_page(depth - 1, 1) if depth else []
+            cursor = next_cursor(previous, "github_created_at", 1)
+            cursor_rows, cursor_ms = await timed(lambda: cursor_page(cursor, args.page_size), args.repeat)
+            assert [row.id for row in offset_rows] == [row.id for row in cursor_rows], "分页结果不一致"
+            print(f"  {depth:>10}: offset {offset_ms:8.2f} ms | 游标 {cursor_ms:6.2f} ms")
+
+        # 游标逐页遍历全部记录
+        start = time.perf_counter()
+        seen, cursor, pages = set(), None, 0
+        while True:
+            page = await cursor_page(cursor, args.traverse_page_size)
+            seen.update(row.id for row in page)
+            pages += 1
+            cursor = next_cursor(page, "github_created_at", args.traverse_page_size)
+            if cursor is None:
+                break
+        assert len(seen) == args.rows, "游标遍历结果不完整"
+        print(f"\n🔁 游标逐页遍历 {pages} 页共 {len(seen)} 条，耗时 {time.perf_counter() - start:.1f}s")
+
+        await database.close_database()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对比 offset 分页与游标分页的深页耗时")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="活动记录数")
+    parser.add_argument("--page-size", type=int, default=100, help="每页记录数")
+    parser.add_argument("--traverse-page-size", type=int, default=1000, help="完整遍历时的每页记录数")
+    parser.add_argument("--repeat", type=int, default=3, help="每个查询重复次数")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+测试GraphQL批量收集器
+使用录制的响应数据（tests/fixtures/graphql_batch.json）模拟 GitHub GraphQL 服务，无需网络和Token
+"""
+
+import sys
+import os
+import json
+import asyncio
+from datetime import datetime, timezone
+from pathlib import Path
+
+# 获取项目根目录并切换工作目录
+project_root = Path(__file__).parent.parent
+os.chdir(project_root)
+print(f"切换工作目录到: {project_root}")
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, str(project_root))
+
+FIXTURE = project_root / "tests" / "fixtures" / "graphql_batch.json"
+
+
+def create_fixture_client(requests):
+    """创建按顺序返回录制响应的替身客户端"""
+    import httpx
+
+    pages = json.loads(FIXTURE.read_text(encoding="utf-8"))["pages"]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        requests.append(body)
+        index = len(requests) - 1
+        if index >= len(pages):
+            return httpx.Response(500, json={"message": "录制数据中没有更多页面"})
+        return httpx.Response(200, json=pages[index], headers={
+            "X-RateLimit-Limit": "5000",
+            "X-RateLimit-Remaining": str(pages[index]["data"]["rateLimit"]["remaining"]),
+            "X-RateLimit-Resource": "graphql"
+        })
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+async def main():
+    try:
+        from app.collectors.graphql_collector import GraphQLBatchCollector, RepositoryTarget
+        from app.collectors.github_collector import GitHubCollector
+        from app.collectors.rate_limiter import RateLimitGovernor
+        from app.collectors.token_pool import TokenPool
+
+        print("🔧 测试GraphQL批量收集器")
+        print("=" * 50)
+
+        since = datetime(2026, 10, 10, tzinfo=timezone.utc)
+        targets = [
+            RepositoryTarget(key="hello-world", owner="octo-org", name="hello-world",
+                             since={name: since for name in ("commits", "issues", "pull_requests", "releases")},
+                             states=["open", "closed", "merged"]),
+            RepositoryTarget(key="missing", owner="octo-org", name="missing",
+                             since={name: since for name in ("commits", "issues", "pull_requests", "releases")})
+        ]
+
+        requests = []
+        governor = RateLimitGovernor(TokenPool(["fixture-token"], 5000))
+        collector = GraphQLBatchCollector(governor)
+
+        async with create_fixture_client(requests) as client:
+            results = await collector.fetch(client, targets)
+
+        hello, missing = results
+
+        # 一次查询覆盖两个仓库，第二次只继续读取未取完的 Issues
+        assert len(requests) == 2, f"请求次数应为2，实际为{len(requests)}"
+        assert "r1:" in requests[0]["query"] and "r1:" not in requests[1]["query"]
+        assert requests[1]["variables"]["a0_issues"] == "Y3Vyc29yOjE="
+        print(f"✅ 2 个仓库共发送 {len(requests)} 次 GraphQL 请求")
+
+        assert hello.ok and hello.repository["full_name"] == "octo-org/hello-world"
+        assert [issue["number"] for issue in hello.items["issues"]] == [101, 99]
+        assert len(hello.items["commits"]) == 1 and len(hello.items["releases"]) == 1
+        print("✅ 仓库信息、提交、Issues（含游标续页）、发布解析正确")
+
+        # 早于 since 的 PR 被丢弃，且合并状态、增删行数来自 GraphQL
+        assert [pr["number"] for pr in hello.items["pull_requests"]] == [102]
+        pr = hello.items["pull_requests"][0]
+        assert pr["merged"] and pr["state"] == "closed" and pr["additions"] == 42 and pr["deletions"] == 7
+        print("✅ Pull Request 合并状态与增删行数正确")
+
+        assert not missing.ok and "Could not resolve" in missing.error
+        print(f"✅ 不存在的仓库单独失败: {missing.error}")
+
+        # 与 REST 收集器共用活动转换逻辑
+        github_collector = GitHubCollector()
+        activities = (
+            github_collector._convert_commits_to_activities(hello.items["commits"], 1)
+            + github_collector._convert_issues_to_activities(hello.items["issues"], 1)
+            + github_collector._convert_prs_to_activities(hello.items["pull_requests"], 1)
+            + github_collector._convert_releases_to_activities(hello.items["releases"], 1)
+        )
+        assert [a["activity_type"] for a in activities] == ["commit", "issue", "issue", "pull_request", "release"]
+        assert activities[3]["is_merged"] is True
+        print(f"✅ 转换为 {len(activities)} 条活动记录")
+
+        print("\n🎉 GraphQL批量收集器测试通过!")
+
+    except Exception as e:
+        print(f"❌ 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+报告文件存储测试脚本
+在临时目录中验证内容寻址、去重、压缩文件流式读取、解压读取、br 转码、不在存储中的内容压缩和无引用文件清理，
+以及下载接口使用的内容编码协商和条件请求判断
+"""
+
+import asyncio
+import gzip
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.blob_store import BlobStore, brotli
+from app.utils.http_utils import accepts_encoding, choose_encoding, http_date, is_not_modified
+
+
+async def collect(iterator) -> bytes:
+    return b"".join([chunk async for chunk in iterator])
+
+
+async def main():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        store = BlobStore(root=tmpdir, compress_level=6)
+        body = ("<tr><td>commit</td><td>修复缓存失效</td></tr>\n" * 20000).encode("utf-8")
+
+        first = await store.put(body)
+        assert first.created and first.size == len(body) and first.stored_size < len(body) // 10
+        assert first.path == f"{first.digest[:2]}/{first.digest[2:4]}/{first.digest}.gz"
+        assert (Path(tmpdir) / first.path).is_file()
+        print(f"✅ 写入并压缩: {first.size} -> {first.stored_size} 字节")
+
+        second = await store.put(body)
+        assert not second.created and second.digest == first.digest and second.path == first.path
+        assert len(list(Path(tmpdir).glob("*/*/*.gz"))) == 1
+        print("✅ 相同内容去重")
+
+        assert await store.get(first.digest) == body
+        compressed = await collect(store.iter_compressed(first.digest, chunk_size=4096))
+        assert compressed == (Path(tmpdir) / first.path).read_bytes() and gzip.decompress(compressed) == body
+        assert await collect(store.iter_decompressed(first.digest, chunk_size=4096)) == body
+        print("✅ 按块读取压缩文件和解压内容")
+
+        if brotli is not None:
+            br_path = await store.encoded_path(first.digest, "br")
+            assert br_path.suffix == ".br" and brotli.decompress(br_path.read_bytes()) == body
+            assert await store.encoded_path(first.digest, "br") == br_path
+            print(f"✅ br 转码: {br_path.stat().st_size} 字节")
+        else:
+            print("⏭️ 未安装 brotli，跳过 br 转码")
+
+        # 正文仍在数据库中的旧报告：下载时在内存中压缩
+        assert gzip.decompress(await store.encode(body, "gzip")) == body
+        if brotli is not None:
+            assert brotli.decompress(await store.encode(body, "br")) == body
+        print("✅ 压缩不在存储中的内容")
+
+        try:
+            store.path_for("../../etc/passwd")
+            raise AssertionError("非法哈希应被拒绝")
+        except ValueError:
+            print("✅ 拒绝非法哈希")
+
+        # 无引用文件只在超过最短保留时间后删除
+        other = await store.put(b"orphan report")
+        assert await store.collect_garbage({first.digest}, min_age=3600) == 0
+        old = time.time() - 7200
+        os.utime(store.path_for(other.digest), (old, old))
+        os.utime(store.path_for(first.digest), (old, old))
+        assert await store.collect_garbage({first.digest}, min_age=3600) == 1
+        assert store.exists(first.digest) and not store.exists(other.digest)
+        print("✅ 清理无引用文件")
+
+    assert accepts_encoding("gzip, deflate, br", "gzip")
+    assert accepts_encoding("br;q=1.0, *;q=0.5", "gzip")
+    assert not accepts_encoding("gzip;q=0, br", "gzip")
+    assert not accepts_encoding(None, "gzip")
+    assert choose_encoding("gzip, deflate, br", ("br", "gzip")) == "br"
+    assert choose_encoding("gzip;q=0.8, br;q=0.5", ("br", "gzip")) == "gzip"
+    assert choose_encoding("br", ("gzip",)) is None and choose_encoding(None, ("br", "gzip")) is None
+    print("✅ 解析 Accept-Encoding 并协商编码")
+
+    modified = datetime(2026, 10, 1, 8, 30, 15, 500000, tzinfo=timezone.utc)
+    assert http_date(modified) == "Thu, 01 Oct 2026 08:30:15 GMT"
+    assert is_not_modified({"if-none-match": '"abc-gzip"'}, '"abc-gzip"', modified)
+    assert is_not_modified({"if-none-match": 'W/"abc-gzip", "other"'}, '"abc-gzip"', modified)
+    assert not is_not_modified({"if-none-match": '"abc-br"'}, '"abc-gzip"', modified)
+    assert is_not_modified({"if-modified-since": http_date(modified)}, '"abc"', modified)
+    assert not is_not_modified({"if-modified-since": "Wed, 30 Sep 2026 00:00:00 GMT"}, '"abc"', modified)
+    # If-None-Match 优先于 If-Modified-Since
+    assert not is_not_modified({"if-none-match": '"x"', "if-modified-since": http_date(modified)}, '"abc"', modified)
+    assert not is_not_modified({"if-modified-since": "not a date"}, '"abc"', modified)
+    print("✅ 条件请求判断")
+
+    print("\n🎉 报告文件存储测试全部通过")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+接口结果缓存测试脚本
+分别在进程内后端和模拟 Redis 后端上验证读穿缓存、TTL、LRU 淘汰、并发单次回源和标签失效
+"""
+
+import asyncio
+import fnmatch
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.cache import MISSING, CacheManager, MemoryCacheBackend, RedisCacheBackend, TAG_ACTIVITIES, TAG_REPORTS
+
+
+class FakeRedis:
+    """实现缓存用到的 Redis 命令子集"""
+
+    def __init__(self):
+        self.values = {}
+        self.sets = {}
+
+    def _alive(self, key):
+        entry = self.values.get(key)
+        if entry and entry[1] is not None and entry[1] <= time.monotonic():
+            del self.values[key]
+        return key in self.values
+
+    async def get(self, key):
+        return self.values[key][0] if self._alive(key) else None
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = (value, time.monotonic() + ex if ex else None)
+
+    async def sadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(members)
+
+    async def smembers(self, key):
+        return set(self.sets.get(key, set()))
+
+    async def delete(self, *keys):
+        removed = 0
+        for key in keys:
+            removed += (self.values.pop(key, None) is not None) + (self.sets.pop(key, None) is not None)
+        return removed
+
+    async def scan_iter(self, match):
+        for key in list(self.values) + list(self.sets):
+            if fnmatch.fnmatch(key, match):
+                yield key
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def aclose(self):
+        pass
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def set(self, *args, **kwargs):
+        self.commands.append(self.client.set(*args, **kwargs))
+
+    def sadd(self, *args):
+        self.commands.append(self.client.sadd(*args))
+
+    async def execute(self):
+        return [await command for command in self.commands]
+
+
+async def check_backend(name: str, manager: CacheManager):
+    print(f"\n🧪 {name}")
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"total": len(calls)}
+
+    # 并发未命中只回源一次
+    results = await asyncio.gather(*[
+        manager.get_or_set("stats", load, tags=[TAG_ACTIVITIES]) for _ in range(10)
+    ])
+    assert len(calls) == 1 and all(result == {"total": 1} for result in results)
+    print("✅ 并发未命中只回源一次")
+
+    assert await manager.get_or_set("stats", load, tags=[TAG_ACTIVITIES]) == {"total": 1}
+    assert manager.hits >= 1
+    print("✅ 命中缓存")
+
+    # 无关标签不影响，相关标签失效后重新计算
+    await manager.invalidate(TAG_REPORTS)
+    assert await manager.get_or_set("stats", load, tags=[TAG_ACTIVITIES]) == {"total": 1}
+    await manager.invalidate(TAG_ACTIVITIES)
+    assert await manager.get_or_set("stats", load, tags=[TAG_ACTIVITIES]) == {"total": 2}
+    print("✅ 标签失效")
+
+    # 计算期间发生失效时结果不写入缓存
+    async def slow_load():
+        await asyncio.sleep(0.05)
+        return "stale"
+
+    task = asyncio.create_task(manager.get_or_set("racy", slow_load, tags=[TAG_ACTIVITIES]))
+    await asyncio.sleep(0.01)
+    await manager.invalidate(TAG_ACTIVITIES)
+    assert await task == "stale"
+    assert await manager.get_or_set("racy", lambda: asyncio.sleep(0, result="fresh"), tags=[TAG_ACTIVITIES]) == "fresh"
+    print("✅ 失效期间的计算结果不写入缓存")
+
+    # TTL 过期
+    await manager.get_or_set("short", lambda: asyncio.sleep(0, result=1), ttl=1)
+    await asyncio.sleep(1.1)
+    assert await manager.get_or_set("short", lambda: asyncio.sleep(0, result=2), ttl=1) == 2
+    print("✅ TTL 过期")
+
+    # 装饰器按参数区分缓存键
+    @manager.cached("chart", tags=[TAG_ACTIVITIES])
+    async def chart(days: int = 7):
+        calls.append(days)
+        return days * 10
+
+    before = len(calls)
+    assert await chart(7) == 70 and await chart(days=7) == 70 and await chart(30) == 300
+    assert len(calls) - before == 2
+    print("✅ 装饰器按参数缓存")
+
+    await manager.clear()
+    assert await chart(7) == 70 and len(calls) - before == 3
+    print("✅ 清空缓存")
+    print(f"📊 {manager.get_stats()}")
+
+
+async def main():
+    await check_backend("进程内缓存", CacheManager(MemoryCacheBackend(max_entries=100)))
+    await check_backend("Redis 缓存（模拟）", CacheManager(RedisCacheBackend(FakeRedis(), "test:cache")))
+
+    # LRU 淘汰
+    backend = MemoryCacheBackend(max_entries=2)
+    for key in ("a", "b"):
+        await backend.set(key, key, ttl=60, tags=[TAG_REPORTS])
+    await backend.get("a")
+    await backend.set("c", "c", ttl=60)
+    assert await backend.get("b") is MISSING and backend.size() == 2 and backend.evictions == 1
+    assert await backend.get("a") == "a"
+    print("\n✅ LRU 淘汰最久未使用的条目")
+
+    print("\n🎉 缓存测试全部通过")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
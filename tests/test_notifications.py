@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+活动通知测试脚本
+在临时 SQLite 数据库上模拟一次自适应轮询和之后的每日收集任务（仓库数据使用替身，不访问 GitHub），
+验证新增活动在入库时通知一次，之后的收集看到已有记录不再重复通知；
+Webhook 与轮询并发写入同一条记录时只有一方记为新增
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import get_settings
+from app.core.database import close_database, get_db_session, init_database
+from app.models.subscription import ReportFrequency, Subscription
+
+
+def commit(sha: str, date: datetime) -> dict:
+    return {
+        "sha": sha,
+        "message": f"提交 {sha}",
+        "html_url": f"https://github.com/octo/demo/commit/{sha}",
+        "author": {"login": "alice", "name": "Alice", "email": "alice@example.com"},
+        "date": date.strftime("%Y-%m-%dT%H:%M:%SZ")
+    }
+
+
+async def main():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        get_settings().database.url = f"sqlite+aiosqlite:///{os.path.join(tmpdir, 'test.db')}"
+        await init_database()
+
+        from app.collectors.github_collector import GitHubCollector, RepositoryFetch
+        from app.services.notification_service import NotificationService
+
+        async with get_db_session() as session:
+            subscription = Subscription(
+                user_id=1, repository="octo/demo", frequency=ReportFrequency.DAILY,
+                monitor_issues=False, monitor_pull_requests=False, monitor_releases=False
+            )
+            session.add(subscription)
+
+        fetch = RepositoryFetch(items={"commits": [commit("abc123", datetime.now(timezone.utc) - timedelta(hours=1))]}, errors={})
+        collector = GitHubCollector()
+        collector.event_probe.enabled = False
+
+        with patch.object(GitHubCollector, "_fetch_repository", AsyncMock(return_value=fetch)), \
+                patch.object(NotificationService, "send_subscription_notification", AsyncMock(return_value=True)) as notify:
+            # 轮询（与定时收集相同的增量路径）入库并通知
+            results = [result async for result in collector.collect_subscriptions([subscription], 7, incremental=True)]
+            assert results[0].ok and results[0].data["inserted_count"] == 1
+            assert notify.await_count == 1
+            assert notify.await_args.args[1]["activity_title"] == "提交 abc123"
+            print("✅ 轮询入库的新增活动发送通知")
+
+            # 每日任务再次看到同一条提交：已有记录，不重复通知
+            summary = await collector.collect_daily_updates()
+            assert summary["success_count"] == 1
+            assert notify.await_count == 1, f"通知应只发送一次，实际 {notify.await_count} 次"
+            print("✅ 之后的每日任务不重复通知")
+
+        # 两个写入方同时写入同一条新 Issue（GitHub 更新时间不同），只有一方记为新增
+        created = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+        def issue(updated_at):
+            return {
+                "subscription_id": subscription.id, "activity_type": "issue", "activity_id": "7",
+                "title": "并发写入", "github_created_at": created, "github_updated_at": updated_at
+            }
+
+        first, second = await asyncio.gather(
+            collector._store_activities([issue(created)]),
+            collector._store_activities([issue(created + timedelta(minutes=1))])
+        )
+        assert sorted(row["inserted"] for row in first + second) == [False, True]
+        print("✅ 并发写入同一条记录时只有一方记为新增")
+
+        await close_database()
+
+    print("\n🎉 活动通知测试全部通过")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
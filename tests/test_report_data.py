@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+报告数据服务测试脚本
+在临时 SQLite 数据库中验证：按报告时间段（北京时间）从已入库的活动构建报告数据，
+最后同步时间覆盖时间段时不访问 GitHub，未覆盖时实时补齐，补齐失败时仍使用已入库的数据；
+仓库信息从 GitHub 获取，获取失败时使用订阅中保存的信息
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import get_settings
+from app.core.database import close_database, get_db_session, init_database
+from app.models.subscription import RepositoryActivity, Subscription
+from app.services.report_data_service import ReportDataService
+
+
+class FakeCollector:
+    """记录增量同步调用，可选地写入一条新活动或抛出异常；仓库信息返回固定数据"""
+
+    calls = []
+    error = None
+    new_activity = None
+    repository_error = None
+
+    async def fetch_repository_info(self, owner, repo):
+        if FakeCollector.repository_error:
+            raise FakeCollector.repository_error
+        return {"full_name": f"{owner}/{repo}", "open_issues_count": 321, "license": "MIT License", "topics": ["demo"]}
+
+    async def collect_repository_activities(self, subscription, days=7, include_states=None, incremental=False):
+        FakeCollector.calls.append((subscription.id, days, incremental))
+        if FakeCollector.error:
+            raise FakeCollector.error
+        if FakeCollector.new_activity:
+            async with get_db_session() as session:
+                session.add(FakeCollector.new_activity)
+        return {"success": True}
+
+
+def activity(subscription_id, activity_type, activity_id, created_at, **kwargs):
+    return RepositoryActivity(
+        subscription_id=subscription_id,
+        activity_type=activity_type,
+        activity_id=activity_id,
+        title=kwargs.pop("title", f"{activity_type} {activity_id}"),
+        github_created_at=created_at,
+        github_updated_at=kwargs.pop("updated_at", created_at),
+        **kwargs
+    )
+
+
+async def main():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        get_settings().database.url = f"sqlite+aiosqlite:///{os.path.join(tmpdir, 'test.db')}"
+        await init_database()
+
+        # 时间段：北京时间 2026-10-01 08:00 ~ 2026-10-02 08:00，即 UTC 2026-10-01 00:00 ~ 2026-10-02 00:00
+        period_start, period_end = datetime(2026, 10, 1, 8), datetime(2026, 10, 2, 8)
+        utc = datetime(2026, 10, 1)
+
+        async with get_db_session() as session:
+            subscription = Subscription(
+                user_id=1, repository="octo/demo", repository_description="演示仓库",
+                repository_stars=42, repository_forks=7, repository_language="Python",
+                last_sync_at=utc + timedelta(days=1, minutes=1)
+            )
+            session.add(subscription)
+            await session.flush()
+            sid = subscription.id
+            session.add_all([
+                activity(sid, "commit", "abc123", utc + timedelta(hours=2), description="修复缓存失效", author_name="Alice"),
+                activity(sid, "issue", "10", utc + timedelta(hours=3), state="open", labels='["bug"]'),
+                # 时间段之前创建、时间段内更新的 PR 也计入
+                activity(sid, "pull_request", "11", utc - timedelta(days=3), updated_at=utc + timedelta(hours=5),
+                         state="closed", is_merged=True, commits_count=3, additions=40, deletions=2,
+                         github_closed_at=utc + timedelta(hours=5), github_merged_at=utc + timedelta(hours=5)),
+                activity(sid, "release", "900", utc + timedelta(hours=6), title="v1.0",
+                         url="https://github.com/octo/demo/releases/tag/v1.0"),
+                # 时间段之外
+                activity(sid, "commit", "old", utc - timedelta(hours=1)),
+                activity(sid, "issue", "9", utc + timedelta(days=1, hours=1), state="open"),
+            ])
+
+        service = ReportDataService(collector_factory=FakeCollector)
+
+        data = await service.build_repository_data(subscription, period_start, period_end)
+        assert FakeCollector.calls == [], "已同步的时间段不应访问 GitHub"
+        assert data["summary"] == {"commits_count": 1, "issues_count": 1, "pull_requests_count": 1, "releases_count": 1}
+        assert data["commits"][0]["sha"] == "abc123" and data["commits"][0]["author"]["name"] == "Alice"
+        assert data["issues"][0]["number"] == 10 and data["issues"][0]["labels"] == ["bug"]
+        pull_request = data["pull_requests"][0]
+        assert pull_request["merged"] is True and pull_request["commits"] == 3 and pull_request["additions"] == 40
+        assert pull_request["merged_at"].startswith("2026-10-01T05:00:00") and pull_request["closed_at"] == pull_request["merged_at"]
+        assert data["releases"][0]["tag_name"] == "v1.0"
+        assert data["repository"]["open_issues_count"] == 321 and data["repository"]["license"] == "MIT License"
+        assert data["source"]["period_start"].startswith("2026-10-01T00:00:00")
+        print("✅ 按时间段从数据库构建报告数据")
+
+        # 最后同步早于时间段结束：增量同步补齐
+        subscription.last_sync_at = utc + timedelta(hours=12)
+        FakeCollector.new_activity = activity(sid, "commit", "def456", utc + timedelta(hours=20))
+        data = await service.build_repository_data(subscription, period_start, period_end)
+        assert len(FakeCollector.calls) == 1 and FakeCollector.calls[0][2] is True
+        assert data["source"]["gap_filled"] and data["summary"]["commits_count"] == 2
+        assert data["commits"][0]["sha"] == "def456"
+        print("✅ 最后同步之后的部分实时补齐")
+
+        # 补齐失败：使用已入库的数据
+        FakeCollector.new_activity, FakeCollector.error = None, RuntimeError("API rate limit exceeded")
+        data = await service.build_repository_data(subscription, period_start, period_end)
+        assert len(FakeCollector.calls) == 2 and not data["source"]["gap_filled"]
+        assert data["summary"]["commits_count"] == 2
+        print("✅ 补齐失败时使用已入库的数据")
+
+        # 仓库信息获取失败：使用订阅中保存的信息，未关闭数量按已入库的 Issue/PR 统计
+        FakeCollector.repository_error = RuntimeError("API rate limit exceeded")
+        data = await service.build_repository_data(subscription, period_start, period_end)
+        assert data["repository"]["stargazers_count"] == 42 and data["repository"]["open_issues_count"] == 2
+        print("✅ 仓库信息获取失败时使用订阅中保存的信息")
+
+        await close_database()
+
+    print("\n🎉 报告数据服务测试全部通过")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
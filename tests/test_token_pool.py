@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+令牌池测试脚本
+验证 REST（core）与 GraphQL（graphql）配额分别记录、按资源选择和暂停令牌，
+二级速率限制暂停整个令牌，本地令牌桶只允许小规模突发，以及条件请求缓存按令牌区分
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.collectors.github_collector import GitHubCollector
+from app.collectors.rate_limiter import RateLimitGovernor
+from app.collectors.response_cache import ResponseCache
+from app.collectors.token_pool import TokenBucket, TokenPool
+
+
+def rate_limit_response(resource: str, remaining: int, reset_at: float, status_code: int = 200) -> httpx.Response:
+    return httpx.Response(status_code, headers={
+        "X-RateLimit-Limit": "5000",
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Reset": str(int(reset_at)),
+        "X-RateLimit-Resource": resource
+    })
+
+
+async def main():
+    reset_at = time.time() + 1800
+    pool = TokenPool(["token-a-0000", "token-b-0000"], 5000)
+    first, second = pool.tokens
+
+    # GraphQL 配额耗尽只暂停 graphql，core 预算不受影响
+    first.update_from_response(rate_limit_response("core", 4000, reset_at))
+    first.update_from_response(rate_limit_response("graphql", 0, reset_at))
+    assert first.budget("core").remaining == 4000 and first.budget("graphql").remaining == 0
+    assert first.is_parked(resource="graphql") and not first.is_parked(resource="core")
+    print("✅ core 与 graphql 配额分别记录")
+
+    second.update_from_response(rate_limit_response("core", 100, reset_at))
+    assert await pool.select("graphql") is second
+    assert await pool.select("core") is first
+    assert pool.total_remaining() == 4100 and pool.total_remaining("graphql") == 0
+    print("✅ 按请求的资源选择令牌")
+
+    # 二级速率限制（没有配额信息）暂停整个令牌
+    second.park(time.time() + 60)
+    assert second.is_parked(resource="core") and second.is_parked(resource="graphql")
+    assert await pool.select("core") is first
+    print("✅ 二级速率限制暂停整个令牌")
+
+    # 调度器按资源限速并记录响应所属的资源
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        resource = "graphql" if request.url.path == "/graphql" else "core"
+        response = rate_limit_response(resource, 50 if resource == "graphql" else 4900, reset_at)
+        response.request = request
+        return response
+
+    governor = RateLimitGovernor(TokenPool(["token-c-0000"], 5000))
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        await governor.request(client, "POST", "https://api.github.com/graphql", resource="graphql", json={})
+        await governor.request(client, "GET", "https://api.github.com/repos/octo/demo")
+    state = governor.token_pool.tokens[0]
+    assert state.budget("graphql").remaining == 50 and state.budget("core").remaining == 4900
+    # graphql 低于保留值时放慢节奏，core 仍不等待
+    assert governor._budget_delay(state.budget("graphql")) > 0
+    assert governor._budget_delay(state.budget("core")) == 0
+    print("✅ 调度器按资源更新预算和限速")
+
+    # 每小时 3600 次（每秒补充 1 个），突发 3 个后需要等待补充
+    assert TokenPool(["token-d-0000"], 5000, burst_size=3).tokens[0].bucket.capacity == 3
+    bucket = TokenBucket(capacity=3, refill_per_second=1)
+    waits = [await bucket.acquire() for _ in range(4)]
+    assert waits[:3] == [0.0, 0.0, 0.0] and 0.5 < waits[3] <= 1.0
+    print(f"✅ 突发 3 次后按配额放行，第 4 次等待 {waits[3]:.2f} 秒")
+
+    # 条件请求缓存按令牌区分：ETag 随 Authorization 变化，其它令牌的校验值不会被发送
+    sent = []
+
+    def conditional(request: httpx.Request) -> httpx.Response:
+        auth = request.headers["Authorization"]
+        sent.append((auth, request.headers.get("If-None-Match")))
+        etag = f'"{auth[-12:]}"'
+        if request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304, headers={"ETag": etag})
+        return httpx.Response(200, json={"token": auth[-12:]}, headers={"ETag": etag})
+
+    collector = GitHubCollector()
+    collector.governor = RateLimitGovernor(TokenPool(["token-e-0000", "token-f-0000"], 5000))
+    collector.response_cache = ResponseCache(max_entries=10)
+    token_e, token_f = collector.governor.token_pool.tokens
+    url = "https://api.github.com/repos/octo/demo"
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(conditional)) as client:
+        token_f.park(time.time() + 60)
+        assert await collector._get_json(client, url) == {"token": "token-e-0000"}
+        token_f.parked_until, token_e.parked_until = None, time.time() + 60
+        assert await collector._get_json(client, url) == {"token": "token-f-0000"}
+        token_f.parked_until, token_e.parked_until = time.time() + 60, None
+        assert await collector._get_json(client, url) == {"token": "token-e-0000"}
+
+    assert sent == [
+        ("token token-e-0000", None),
+        ("token token-f-0000", None),
+        ("token token-e-0000", '"token-e-0000"')
+    ]
+    assert token_e.fingerprint != token_f.fingerprint and "token" not in token_e.fingerprint
+    print("✅ 条件请求缓存按令牌区分")
+
+    print("\n🎉 令牌池测试全部通过")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Webhook 接收测试脚本
+不需要启动服务：在临时 SQLite 数据库上通过 ASGI 直接调用接收接口，使用 tests/fixtures/webhooks
+中录制的载荷，验证签名校验、重复投递（包括并发到达的同一投递）去重、队列已满时返回 503，
+以及处理投递时新增的活动发送一次通知
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import sys
+import tempfile
+import uuid
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import get_settings
+from app.core.database import close_database, get_db_session, init_database
+from app.models.subscription import Subscription
+from app.models.webhook import WebhookDelivery
+from app.services.notification_service import NotificationService
+
+FIXTURE_DIR = Path(__file__).parent / "fixtures" / "webhooks"
+SECRET = "test-webhook-secret"
+
+
+def sign(body: bytes, secret: str = SECRET) -> str:
+    return "sha256=" + hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+
+
+def delivery(event: str, body: bytes, delivery_id: str = None, signature: str = None) -> dict:
+    return {
+        "Content-Type": "application/json",
+        "X-GitHub-Event": event,
+        "X-GitHub-Delivery": delivery_id or str(uuid.uuid4()),
+        "X-Hub-Signature-256": signature if signature is not None else sign(body)
+    }
+
+
+async def main():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        settings = get_settings()
+        settings.database.url = f"sqlite+aiosqlite:///{os.path.join(tmpdir, 'test.db')}"
+        settings.github.webhook_secret = SECRET
+        await init_database()
+
+        from app.api.routes import webhooks
+        from app.services.webhook_service import webhook_service
+
+        # 不启动后台处理任务，投递留在队列中便于检查
+        webhook_service.queue = asyncio.Queue(maxsize=3)
+
+        app = FastAPI()
+        app.include_router(webhooks.router, prefix="/webhooks")
+
+        fixture = json.loads((FIXTURE_DIR / "issues.json").read_text(encoding="utf-8"))
+        body = json.dumps(fixture["payload"]).encode("utf-8")
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            async def post(headers):
+                return await client.post("/webhooks/github", content=body, headers=headers)
+
+            # 签名错误、缺少签名、密钥不一致都拒绝
+            assert (await post(delivery("issues", body, signature="sha256=" + "0" * 64))).status_code == 401
+            assert (await post(delivery("issues", body, signature=""))).status_code == 401
+            assert (await post(delivery("issues", body, signature=sign(body, "other-secret")))).status_code == 401
+            assert webhook_service.queue.qsize() == 0
+            print("✅ 签名无效时返回 401")
+
+            headers = delivery("issues", body)
+            response = await post(headers)
+            assert response.status_code == 202 and response.json()["status"] == "queued"
+            response = await post(headers)
+            assert response.status_code == 202 and response.json()["status"] == "duplicate"
+            assert webhook_service.queue.qsize() == 1
+            print("✅ 重复投递返回 202 且不重复入队")
+
+            # 进程内去重表之外的并发投递：两个请求都未查到记录，后写入的一方触发唯一约束
+            headers = delivery("issues", body)
+            with patch.object(AsyncSession, "get", AsyncMock(return_value=None)):
+                first = await post(headers)
+                webhook_service._recent.clear()
+                second = await post(headers)
+            assert first.status_code == 202 and first.json()["status"] == "queued"
+            assert second.status_code == 202 and second.json()["status"] == "duplicate"
+            assert webhook_service.queue.qsize() == 2
+            print("✅ 同一投递并发写入时按重复处理，不返回 500")
+
+            webhook_service._recent.clear()
+            headers = delivery("issues", body)
+            responses = await asyncio.gather(post(headers), post(headers))
+            assert sorted(r.json()["status"] for r in responses) == ["duplicate", "queued"]
+            assert all(r.status_code == 202 for r in responses)
+            print("✅ 同时到达的同一投递只入队一次")
+
+            # 队列已满：返回 503 且不记录投递，GitHub 重新投递时仍可处理
+            headers = delivery("issues", body)
+            response = await post(headers)
+            assert response.status_code == 503
+            async with get_db_session() as session:
+                assert await session.get(WebhookDelivery, headers["X-GitHub-Delivery"]) is None
+            print("✅ 队列已满时返回 503 且不记录投递")
+
+        # 处理队列中的投递：新增的活动通知一次，同一活动再次到达时不重复写入也不通知
+        async with get_db_session() as session:
+            session.add(Subscription(user_id=1, repository="octo-org/hello-world"))
+        with patch.object(NotificationService, "send_subscription_notification", AsyncMock(return_value=True)) as notify:
+            first = await webhook_service.process(webhook_service.queue.get_nowait())
+            second = await webhook_service.process(webhook_service.queue.get_nowait())
+        assert first == 1 and second == 0
+        assert notify.await_count == 1
+        assert notify.await_args.args[1]["activity_type"] == "issue"
+        print("✅ Webhook 写入的新增活动发送一次通知")
+
+        await close_database()
+
+    print("\n🎉 Webhook 接收测试全部通过")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())